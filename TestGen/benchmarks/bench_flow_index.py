@@ -0,0 +1,56 @@
+#!/usr/bin/env python3
+"""
+Cost of fingerprinting flows and of recording / looking them up in FlowIndex.
+
+A lookup is what a duplicate check adds in front of a Maestro run, which
+costs tens of seconds.
+
+Usage:
+    python TestGen/benchmarks/bench_flow_index.py [--flows 2000]
+"""
+
+from __future__ import annotations
+
+import argparse
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+TESTGEN_DIR = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(TESTGEN_DIR))
+
+from bench_validator import make_flow  # noqa: E402
+from flow_index import FlowIndex, fingerprint  # noqa: E402
+
+
+def per_flow_us(fn, items) -> float:
+    start = time.perf_counter()
+    for item in items:
+        fn(item)
+    return (time.perf_counter() - start) / len(items) * 1e6
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--flows", type=int, default=2000)
+    args = parser.parse_args()
+
+    flows = [make_flow(i) for i in range(args.flows)]
+    fingerprint(flows[0])  # load the parser outside the timing
+    fp = per_flow_us(fingerprint, flows)
+    distinct = len({fingerprint(f) for f in flows})
+
+    with tempfile.TemporaryDirectory() as tmp, FlowIndex(Path(tmp) / "index.sqlite3") as index:
+        jobs = iter(range(10**9))
+        record = per_flow_us(lambda f: index.record(f, f"job-{next(jobs)}", "passed"), flows)
+        lookup = per_flow_us(index.lookup, flows)
+        stats = index.stats()
+
+    print(f"fingerprint:  {fp:7.0f} us/flow ({args.flows} flows, {distinct} distinct)")
+    print(f"record:       {record:7.0f} us/flow")
+    print(f"lookup:       {lookup:7.0f} us/flow ({stats['flows']} indexed flows)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+"""
+Memory and time of keeping a corpus of parsed flows as Lark trees vs the IR.
+
+  trees:  parser.parse() results, as the grammar tests produce them
+  IR:     flow_ir.parse_flow() results (parse + Transformer)
+
+Retained memory is measured with tracemalloc while every result is alive.
+
+Usage:
+    python TestGen/benchmarks/bench_flow_ir.py [--flows 2000]
+"""
+
+from __future__ import annotations
+
+import argparse
+import gc
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+TESTGEN_DIR = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(TESTGEN_DIR))
+
+import validator  # noqa: E402
+from bench_validator import make_flow  # noqa: E402
+from flow_ir import parse_flow  # noqa: E402
+
+
+def retained(build, flows):
+    gc.collect()
+    tracemalloc.start()
+    start = time.perf_counter()
+    kept = [build(text) for text in flows]
+    elapsed = time.perf_counter() - start
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    assert len(kept) == len(flows)
+    return size, elapsed
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--flows", type=int, default=2000)
+    args = parser.parse_args()
+
+    flows = [make_flow(i) for i in range(args.flows)]
+    lark = validator.get_parser()
+    parse_flow(flows[0])  # load the parser outside the measurement
+    assert all(parse_flow(f).to_yaml() == f for f in flows), "flows should round-trip"
+
+    tree_bytes, tree_s = retained(lark.parse, flows)
+    ir_bytes, ir_s = retained(parse_flow, flows)
+    text_bytes = sum(len(f) for f in flows)
+
+    print(f"source text:  {text_bytes / 1e6:7.2f} MB ({args.flows} flows)")
+    print(f"Lark trees:   {tree_bytes / 1e6:7.2f} MB  {tree_s / len(flows) * 1e6:6.0f} us/flow")
+    print(f"IR:           {ir_bytes / 1e6:7.2f} MB  {ir_s / len(flows) * 1e6:6.0f} us/flow")
+
+
+if __name__ == "__main__":
+    main()
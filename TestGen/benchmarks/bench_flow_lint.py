@@ -0,0 +1,52 @@
+#!/usr/bin/env python3
+"""
+Per-flow cost of the static pre-flight linter, with every rule enabled.
+
+Usage:
+    python TestGen/benchmarks/bench_flow_lint.py [--flows 2000]
+"""
+
+from __future__ import annotations
+
+import argparse
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+TESTGEN_DIR = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(TESTGEN_DIR))
+
+from bench_validator import make_flow  # noqa: E402
+from flow_ir import parse_flow  # noqa: E402
+from flow_lint import lint_many, load_known_text  # noqa: E402
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--flows", type=int, default=2000)
+    args = parser.parse_args()
+
+    flows = [make_flow(i) for i in range(args.flows)]
+    sources = " ".join(f"Welcome {i}" for i in range(args.flows))
+    parse_flow(flows[0])  # load the parser outside the timing
+
+    with tempfile.TemporaryDirectory() as tmp:
+        (Path(tmp) / "app.tsx").write_text(sources)
+        known = load_known_text([tmp])
+        batch = [(f"flow-{i}.yaml", text) for i, text in enumerate(flows)]
+        start = time.perf_counter()
+        diagnostics = lint_many(batch, base_dir=Path(tmp), known_text=known)
+        text_s = time.perf_counter() - start
+
+        irs = [(label, parse_flow(text)) for label, text in batch]
+        start = time.perf_counter()
+        lint_many(irs, base_dir=Path(tmp), known_text=known)
+        ir_s = time.perf_counter() - start
+
+    print(f"parse + lint:  {text_s / len(flows) * 1e6:7.0f} us/flow ({len(diagnostics)} diagnostics)")
+    print(f"lint on IR:    {ir_s / len(flows) * 1e6:7.0f} us/flow")
+
+
+if __name__ == "__main__":
+    main()
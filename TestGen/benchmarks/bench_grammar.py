@@ -0,0 +1,162 @@
+#!/usr/bin/env python3
+"""
+Parse throughput of maestro_grammar.lark, with a regression gate for CI.
+
+Three workloads go through validator.validate():
+
+  typical:      --flows flows from flow_fuzz.FlowFuzzer (fixed seed)
+  worst case:   one flow of --steps steps, each a STRING or NAME at its
+                length limit, the longest input the grammar accepts per step
+  rejected:     the same flow with a STRING one past its limit at the end,
+                so the parser reads all of it before failing
+
+Raw times depend on the machine, so the gate compares costs divided by a
+fixed pure-Python calibration loop timed in the same process. `--check`
+exits 1 when a normalized cost exceeds the baseline by more than
+--tolerance, or when doubling the worst-case flow more than MAX_SCALING
+times its parse time (parse time must stay linear in input length).
+`--update-baseline` rewrites the baseline after an intended grammar change.
+
+Usage:
+    python TestGen/benchmarks/bench_grammar.py [--flows 2000] [--steps 2000]
+    python TestGen/benchmarks/bench_grammar.py --check [--tolerance 0.5]
+    python TestGen/benchmarks/bench_grammar.py --update-baseline
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import statistics
+import sys
+import time
+from pathlib import Path
+from typing import Callable, Dict, List
+
+TESTGEN_DIR = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(TESTGEN_DIR))
+
+from flow_fuzz import FlowFuzzer, grammar_facts  # noqa: E402
+from validator import get_parser, validate  # noqa: E402
+
+BASELINE_PATH = Path(__file__).resolve().parent / "grammar_perf_baseline.json"
+MAX_SCALING = 2.6  # parse time of 2n steps / n steps; linear is 2
+REPEATS = 5
+
+
+def best_of(fn: Callable[[], object], repeats: int = REPEATS) -> float:
+    samples = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+    return min(samples)
+
+
+def calibrate() -> float:
+    """Seconds for a fixed interpreter-bound loop, the unit of normalized costs."""
+    def loop() -> int:
+        total = 0
+        for i in range(300_000):
+            total += len(str(i)) & 3
+        return total
+
+    return statistics.median(best_of(loop, 1) for _ in range(REPEATS))
+
+
+def worst_case_flow(steps: int) -> str:
+    facts = grammar_facts()
+    lines = ['url: "%s"' % ("u" * facts["STRING"]), "---", "- launchApp"]
+    for i in range(steps):
+        if i % 2:
+            lines.append(f"- takeScreenshot: {'n' * facts['NAME']}")
+        else:
+            lines.append(f'- inputText: "{"x" * facts["STRING"]}"')
+    return "\n".join(lines) + "\n"
+
+
+def measure(flows: int, steps: int) -> Dict[str, float]:
+    fuzzer = FlowFuzzer(seed=0)
+    typical = [fuzzer.valid_flow()[0] for _ in range(flows)]
+    worst = worst_case_flow(steps)
+    rejected = worst + f'- tapOn: "{"x" * (grammar_facts()["STRING"] + 1)}"\n'
+    get_parser()  # load the parser outside the timing
+    assert validate(worst).ok and not validate(rejected).ok
+
+    typical_s = best_of(lambda: [validate(t) for t in typical])
+    worst_s = best_of(lambda: validate(worst))
+    half = worst_case_flow(steps // 2)
+    half_s = best_of(lambda: validate(half))
+    rejected_s = best_of(lambda: validate(rejected))
+    typical_bytes = sum(len(t) for t in typical)
+    unit = calibrate()
+    return {
+        "flows_per_sec": flows / typical_s,
+        "typical_us_per_kb": typical_s / typical_bytes * 1024 * 1e6,
+        "worst_case_bytes": len(worst),
+        "worst_case_ms": worst_s * 1000,
+        "worst_case_us_per_kb": worst_s / len(worst) * 1024 * 1e6,
+        "scaling": worst_s / half_s,
+        "rejected_ms": rejected_s * 1000,
+        "calibration_ms": unit * 1000,
+        # normalized costs: parse time in calibration units, per KB of input
+        "typical_cost": typical_s / typical_bytes * 1024 / unit,
+        "worst_case_cost": worst_s / len(worst) * 1024 / unit,
+        "rejected_cost": rejected_s / len(rejected) * 1024 / unit,
+    }
+
+
+NORMALIZED = ("typical_cost", "worst_case_cost", "rejected_cost")
+
+
+def regressions(result: Dict[str, float], baseline: Dict[str, float], tolerance: float) -> List[str]:
+    problems = []
+    for key in NORMALIZED:
+        if key in baseline and result[key] > baseline[key] * (1 + tolerance):
+            problems.append(
+                f"{key} {result[key]:.4f} exceeds baseline {baseline[key]:.4f} by more than {tolerance:.0%}"
+            )
+    if result["scaling"] > MAX_SCALING:
+        problems.append(
+            f"doubling the worst-case flow took {result['scaling']:.2f}x as long (limit {MAX_SCALING}x)"
+        )
+    return problems
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--flows", type=int, default=2000)
+    parser.add_argument("--steps", type=int, default=2000, help="steps in the worst-case flow")
+    parser.add_argument("--check", action="store_true", help="exit 1 on a regression against the baseline")
+    parser.add_argument("--tolerance", type=float, default=0.5, help="allowed slowdown for --check (0.5 = 50%%)")
+    parser.add_argument("--baseline", default=str(BASELINE_PATH))
+    parser.add_argument("--update-baseline", action="store_true")
+    args = parser.parse_args()
+
+    result = measure(args.flows, args.steps)
+    print(f"typical:     {result['flows_per_sec']:9.0f} flows/s  {result['typical_us_per_kb']:7.0f} us/KB")
+    print(
+        f"worst case:  {result['worst_case_bytes']:9d} bytes    {result['worst_case_ms']:7.1f} ms"
+        f"  ({result['worst_case_us_per_kb']:.0f} us/KB)"
+    )
+    print(f"scaling:     {result['scaling']:9.2f}x       (2n vs n steps)")
+    print(f"rejected:    {result['rejected_ms']:9.1f} ms")
+    print("normalized:  " + "  ".join(f"{key} {result[key]:.4f}" for key in NORMALIZED))
+
+    baseline_path = Path(args.baseline)
+    if args.update_baseline:
+        baseline = {key: round(result[key], 4) for key in NORMALIZED}
+        baseline_path.write_text(json.dumps(baseline, indent=2) + "\n")
+        print(f"baseline written to {baseline_path}")
+        return 0
+    if not args.check:
+        return 0
+    baseline = json.loads(baseline_path.read_text())
+    problems = regressions(result, baseline, args.tolerance)
+    for problem in problems:
+        print(f"REGRESSION: {problem}", file=sys.stderr)
+    return 1 if problems else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+"""
+Wall time of validate_flows.py over a directory of generated flows.
+
+  serial:  one process, one parser
+  pool:    process pool with --workers workers, one parser each
+  cached:  second run, every flow skipped by its content hash
+
+Usage:
+    python TestGen/benchmarks/bench_validate_flows.py [--flows 2000] [--workers N]
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+TESTGEN_DIR = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(TESTGEN_DIR))
+
+from bench_validator import make_flow  # noqa: E402
+import validator  # noqa: E402
+from validate_flows import PassCache, collect_flows, iter_results  # noqa: E402
+
+
+def timed(paths, workers, cache=None) -> float:
+    start = time.perf_counter()
+    results = list(iter_results(paths, workers=workers, cache=cache))
+    elapsed = time.perf_counter() - start
+    assert all(r.ok for r in results), "generated flows should be valid"
+    return elapsed
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--flows", type=int, default=2000)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        root = Path(tmp) / "flows"
+        root.mkdir()
+        for i in range(args.flows):
+            (root / f"flow-{i:05d}.yaml").write_text(make_flow(i))
+        paths = collect_flows([str(root)])
+
+        validator.get_parser()  # serial timing excludes parser start-up, like warm workers
+        serial = timed(paths, 1)
+        pool = timed(paths, max(2, args.workers))
+        cache = PassCache(Path(tmp) / "cache.json", "bench")
+        timed(paths, 1, cache)
+        cache.save()
+        cached = timed(paths, 1, PassCache(Path(tmp) / "cache.json", "bench"))
+
+    print(f"serial:               {serial:7.2f} s ({args.flows} flows)")
+    print(f"pool ({max(2, args.workers)} workers):     {pool:7.2f} s")
+    print(f"cached rerun:         {cached:7.2f} s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+"""
+Cold-start and per-flow cost of validating Maestro flows.
+
+Cold start is measured in fresh interpreters (median of --runs), so import
+time and grammar analysis are included. Bytecode is written to a temporary
+pycache prefix and warmed up first, as an installed deployment would be:
+
+  no cache:    Lark(grammar, parser="lalr") as the grammar tests used to build it
+  cache miss:  validator.get_parser(), runtime backend, empty cache file
+  cache hit:   validator.get_parser(), runtime backend, pickled LALR tables
+  standalone:  validator.get_parser() loading the generated maestro_parser.py
+
+Per-flow time is validator.validate() over --flows generated flows.
+
+Usage:
+    python TestGen/benchmarks/bench_validator.py [--runs 7] [--flows 2000]
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+TESTGEN_DIR = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(TESTGEN_DIR))
+
+from validator import validate_many  # noqa: E402
+
+NO_CACHE = (
+    "import time; t = time.perf_counter(); from lark import Lark; "
+    f"Lark(open({str(TESTGEN_DIR / 'maestro_grammar.lark')!r}).read(), start='start', parser='lalr'); "
+    "print(time.perf_counter() - t)"
+)
+VALIDATOR = (
+    "import sys, time; t = time.perf_counter(); "
+    f"sys.path.insert(0, {str(TESTGEN_DIR)!r}); import validator; validator.get_parser(); "
+    "print(time.perf_counter() - t)"
+)
+
+
+def cold(code: str, runs: int, env: dict, reset=None) -> float:
+    samples = []
+    for _ in range(runs):
+        if reset:
+            reset()
+        out = subprocess.run([sys.executable, "-c", code], env=env, capture_output=True, text=True, check=True)
+        samples.append(float(out.stdout))
+    return statistics.median(samples) * 1000
+
+
+def make_flow(i: int) -> str:
+    steps = [
+        '- tapOn: "Button %d"' % i,
+        '- inputText: "user%d@example.com"' % i,
+        "- scroll:\n  direction: down\n  times: %d" % (i % 5 + 1),
+        '- assertVisible: "Welcome %d"' % i,
+        "- takeScreenshot: shot-%d" % i,
+        "- pressKey:\n  key: enter",
+    ]
+    body = "\n".join(steps[j % len(steps)] for j in range(i % 12 + 3))
+    return f'url: "http://localhost:3000"\n---\n- launchApp\n{body}\n'
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--runs", type=int, default=7)
+    parser.add_argument("--flows", type=int, default=2000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        cache_file = Path(tmp) / "maestro.lark-cache"
+        env = {
+            **os.environ,
+            "MAESTRO_GRAMMAR_CACHE": str(cache_file),
+            "PYTHONPYCACHEPREFIX": str(Path(tmp) / "pyc"),
+        }
+        env.pop("PYTHONDONTWRITEBYTECODE", None)
+        runtime_env = {**env, "MAESTRO_STANDALONE_PARSER": "0"}
+
+        def drop_cache() -> None:
+            if cache_file.exists():
+                cache_file.unlink()
+
+        cold(VALIDATOR, 1, env)  # compile the generated module once
+        no_cache = cold(NO_CACHE, args.runs, env)
+        miss = cold(VALIDATOR, args.runs, runtime_env, reset=drop_cache)
+        hit = cold(VALIDATOR, args.runs, runtime_env)
+        standalone = cold(VALIDATOR, args.runs, env)
+
+    flows = [make_flow(i) for i in range(args.flows)]
+    validate_many(flows[:10])  # build the parser outside the timing
+    start = time.perf_counter()
+    results = validate_many(flows)
+    per_flow_us = (time.perf_counter() - start) / len(flows) * 1e6
+    assert all(r.ok for r in results), "generated flows should be valid"
+
+    print(f"cold start, no cache:    {no_cache:7.1f} ms")
+    print(f"cold start, cache miss:  {miss:7.1f} ms")
+    print(f"cold start, cache hit:   {hit:7.1f} ms")
+    print(f"cold start, standalone:  {standalone:7.1f} ms")
+    print(f"validate():              {per_flow_us:7.1f} us/flow ({len(flows)} flows)")
+
+
+if __name__ == "__main__":
+    main()
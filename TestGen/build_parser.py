@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""
+Generate TestGen/maestro_parser.py, a self-contained LALR parser for
+maestro_grammar.lark, with Lark's standalone generator.
+
+The generated module embeds the parse tables and Lark's runtime, so
+validator.py can load it without importing lark or analysing the grammar.
+Lark's output is not byte-for-byte reproducible (set ordering), so freshness
+is tracked by the grammar's sha256, stored in the module as GRAMMAR_SHA256.
+
+Usage:
+    python TestGen/build_parser.py           # regenerate
+    python TestGen/build_parser.py --check   # exit 1 if missing or stale
+"""
+
+from __future__ import annotations
+
+import argparse
+import hashlib
+import io
+import os
+import sys
+from pathlib import Path
+from typing import Optional
+
+TESTGEN_DIR = Path(__file__).resolve().parent
+GRAMMAR_PATH = TESTGEN_DIR / "maestro_grammar.lark"
+OUTPUT_PATH = TESTGEN_DIR / "maestro_parser.py"
+HASH_PREFIX = "GRAMMAR_SHA256 = "
+
+
+def grammar_sha256(path: Path = GRAMMAR_PATH) -> str:
+    return hashlib.sha256(path.read_bytes()).hexdigest()
+
+
+def built_sha256(path: Path = OUTPUT_PATH) -> Optional[str]:
+    """The grammar hash recorded in a generated module, or None."""
+    try:
+        with open(path, "r", encoding="utf-8") as fh:
+            for line in fh:
+                if line.startswith(HASH_PREFIX):
+                    return line[len(HASH_PREFIX):].strip().strip("\"'")
+    except OSError:
+        return None
+    return None
+
+
+def is_up_to_date(grammar: Path = GRAMMAR_PATH, output: Path = OUTPUT_PATH) -> bool:
+    return built_sha256(output) == grammar_sha256(grammar)
+
+
+def build(grammar: Path = GRAMMAR_PATH, output: Path = OUTPUT_PATH) -> str:
+    """Write the standalone parser module; returns the grammar hash."""
+    from lark import Lark
+    from lark.tools.standalone import gen_standalone
+
+    digest = grammar_sha256(grammar)
+    # Same options as validator.get_parser()'s runtime fallback
+    parser = Lark(grammar.read_text(), start="start", parser="lalr")
+    buf = io.StringIO()
+    gen_standalone(parser, out=buf)
+    header = (
+        f"# Generated from {grammar.name} by TestGen/build_parser.py; do not edit.\n"
+        f"# Regenerate with: python TestGen/build_parser.py\n"
+    )
+    footer = f"\n{HASH_PREFIX}{digest!r}\n"
+    tmp = output.with_suffix(".py.tmp")
+    tmp.write_text(header + buf.getvalue() + footer, encoding="utf-8")
+    os.replace(tmp, output)
+    return digest
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--check", action="store_true", help="only verify the module matches the grammar")
+    args = parser.parse_args()
+
+    if args.check:
+        if is_up_to_date():
+            print(f"{OUTPUT_PATH.name} is up to date")
+            return 0
+        print(
+            f"{OUTPUT_PATH.name} is missing or out of date with {GRAMMAR_PATH.name}; "
+            "run: python TestGen/build_parser.py",
+            file=sys.stderr,
+        )
+        return 1
+
+    digest = build()
+    print(f"wrote {OUTPUT_PATH} (grammar sha256 {digest[:12]})")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,197 @@
+#!/usr/bin/env python3
+"""
+Random valid and invalid Maestro flows generated from maestro_grammar.lark.
+
+`FlowFuzzer` mirrors the grammar's productions: every `command` alternative,
+each map rule with and without its optional key, both takeScreenshot forms,
+LF and CRLF newlines, with and without the final newline. Enum values
+(DIRECTION, KEY) and the length limits of STRING, NAME and INT are read
+from the grammar file, so the fuzzer follows grammar edits; lengths are
+biased towards 1 and the limit, where off-by-one bugs live.
+
+Valid flows come with the IR they must parse to. Invalid flows are made by
+mutations the grammar has to reject (a value one past its limit, a bad enum
+value, an unquoted or unterminated string, a lost separator, a wrong
+indent, ...), each tagged with the mutation's name.
+
+    fuzzer = FlowFuzzer(seed=1)
+    text, expected = fuzzer.valid_flow()      # parse_flow(text) == expected
+    text, mutation = fuzzer.invalid_flow()    # validate(text).ok is False
+"""
+
+from __future__ import annotations
+
+import random
+import re
+import string
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from flow_ir import Command, Flow
+
+GRAMMAR_PATH = Path(__file__).resolve().parent / "maestro_grammar.lark"
+
+BARE = ("back", "hideKeyboard", "waitForAnimationToEnd", "clearState", "clearKeychain", "launchApp")
+SCALAR = ("tapOn", "inputText", "assertVisible", "assertNotVisible", "openLink")
+# map command -> (required key, optional key or None)
+MAPS = {
+    "pressKey": ("key", None),
+    "eraseText": ("characters", None),
+    "scroll": ("direction", "times"),
+    "swipe": ("direction", "durationMs"),
+    "runFlow": ("file", None),
+    "runScript": ("file", None),
+}
+# Characters a STRING may hold (anything but '"' and newlines); a few multi-byte ones included
+STRING_ALPHABET = string.ascii_letters + string.digits + " _-./:@!?#%&()[]{}'*+,;<=>|~\\\t" + "éßø中🙂"
+NAME_ALPHABET = string.ascii_letters + string.digits + "_-"
+
+MUTATIONS = (
+    "string_too_long", "string_empty", "string_unterminated", "string_with_quote", "string_unquoted",
+    "name_too_long", "int_too_long", "bad_direction", "bad_key", "missing_separator", "wrong_header",
+    "missing_launch", "bad_indent", "unknown_command", "missing_space",
+)
+
+
+def grammar_facts(path: Path = GRAMMAR_PATH) -> Dict[str, object]:
+    """Enum values and length limits of the grammar's terminals."""
+    text = path.read_text()
+
+    def literals(name: str) -> List[str]:
+        line = re.search(rf"^{name}:(.*)$", text, re.M).group(1)
+        return re.findall(r'"([^"]+)"', line)
+
+    def limit(name: str) -> int:
+        line = re.search(rf"^{name}:(.*)$", text, re.M).group(1)
+        return int(re.search(r"\{1,(\d+)\}", line).group(1))
+
+    return {
+        "DIRECTION": literals("DIRECTION"),
+        "KEY": literals("KEY"),
+        "STRING": limit("STRING"),
+        "NAME": limit("NAME"),
+        "INT": limit("INT"),
+    }
+
+
+class FlowFuzzer:
+    def __init__(self, seed: Optional[int] = None, grammar_path: Path = GRAMMAR_PATH):
+        self.rng = random.Random(seed)
+        facts = grammar_facts(grammar_path)
+        self.directions: List[str] = facts["DIRECTION"]
+        self.keys: List[str] = facts["KEY"]
+        self.string_limit: int = facts["STRING"]
+        self.name_limit: int = facts["NAME"]
+        self.int_digits: int = facts["INT"]
+
+    # -- terminals --------------------------------------------------------
+
+    def _length(self, limit: int) -> int:
+        roll = self.rng.random()
+        if roll < 0.15:
+            return 1
+        if roll < 0.3:
+            return limit
+        if roll < 0.4:
+            return limit - 1
+        return self.rng.randint(1, min(limit, 24))
+
+    def string(self, length: Optional[int] = None) -> str:
+        """Contents of a STRING (without the quotes)."""
+        length = length or self._length(self.string_limit)
+        return "".join(self.rng.choice(STRING_ALPHABET) for _ in range(length))
+
+    def name(self, length: Optional[int] = None) -> str:
+        length = length or self._length(self.name_limit)
+        return "".join(self.rng.choice(NAME_ALPHABET) for _ in range(length))
+
+    def integer(self) -> int:
+        digits = self._length(self.int_digits)
+        return self.rng.randint(0, 10 ** digits - 1)
+
+    # -- productions ------------------------------------------------------
+
+    def command(self) -> Command:
+        roll = self.rng.random()
+        if roll < 0.2:
+            return Command(self.rng.choice(BARE))
+        if roll < 0.5:
+            return Command(self.rng.choice(SCALAR), self.string())
+        if roll < 0.6:
+            value = self.name() if self.rng.random() < 0.5 else self.string()
+            return Command("takeScreenshot", value)
+        kind = self.rng.choice(sorted(MAPS))
+        required, optional = MAPS[kind]
+        options = [(required, self._map_value(required))]
+        if optional and self.rng.random() < 0.5:
+            options.append((optional, self.integer()))
+        return Command(kind, None, tuple(options))
+
+    def _map_value(self, key: str):
+        if key == "direction":
+            return self.rng.choice(self.directions)
+        if key == "key":
+            return self.rng.choice(self.keys)
+        if key == "characters":
+            return self.integer()
+        return self.string()  # file
+
+    def flow(self, max_steps: int = 30) -> Flow:
+        steps = [self.command() for _ in range(self.rng.randint(0, max_steps))]
+        return Flow(self.string(), [Command("launchApp"), *steps])
+
+    # -- rendering --------------------------------------------------------
+
+    def render(self, flow: Flow) -> str:
+        """Flow text in a random but valid layout."""
+        newline = "\r\n" if self.rng.random() < 0.2 else "\n"
+        lines = [f'url: "{flow.url}"', "---"]
+        for cmd in flow.commands:
+            if cmd.kind == "takeScreenshot" and re.fullmatch(r"[A-Za-z0-9_\-]+", str(cmd.value)):
+                quoted = self.rng.random() < 0.5
+                lines.append(f'- takeScreenshot: "{cmd.value}"' if quoted else f"- takeScreenshot: {cmd.value}")
+            else:
+                lines.append(cmd.to_yaml().rstrip("\n"))
+        text = "\n".join(lines).replace("\n", newline)
+        return text + newline if self.rng.random() < 0.8 else text
+
+    def valid_flow(self, max_steps: int = 30) -> Tuple[str, Flow]:
+        flow = self.flow(max_steps)
+        return self.render(flow), flow
+
+    # -- invalid flows ----------------------------------------------------
+
+    def invalid_flow(self, mutation: Optional[str] = None) -> Tuple[str, str]:
+        """A flow the grammar must reject, and the name of the mutation applied."""
+        mutation = mutation or self.rng.choice(MUTATIONS)
+        before = self.render(self.flow(8)).replace("\r\n", "\n").rstrip("\n")
+        after = "\n".join(c.to_yaml().rstrip("\n") for c in self.flow(4).commands[1:])
+        text = self._mutate(mutation, before)
+        if after:
+            text = text + "\n" + after
+        return text + "\n", mutation
+
+    def _mutate(self, mutation: str, text: str) -> str:
+        header, _, body = text.partition("\n---\n")
+        if mutation == "missing_separator":
+            return header + "\n" + body
+        if mutation == "wrong_header":
+            return 'appId: "com.example.app"\n---\n' + body
+        if mutation == "missing_launch":
+            steps = body.split("\n", 1)
+            return header + "\n---\n- back" + ("\n" + steps[1] if len(steps) > 1 else "")
+        bad = {
+            "string_too_long": f'- tapOn: "{self.string(self.string_limit + 1)}"',
+            "string_empty": '- inputText: ""',
+            "string_unterminated": f'- assertVisible: "{self.string(5)}',
+            "string_with_quote": f'- tapOn: "{self.string(3)}"{self.string(3)}"',
+            "string_unquoted": f"- tapOn: {self.name(5)}",
+            "name_too_long": f"- takeScreenshot: {self.name(self.name_limit + 1)}",
+            "int_too_long": f"- eraseText:\n  characters: {'9' * (self.int_digits + 1)}",
+            "bad_direction": "- scroll:\n  direction: diagonal",
+            "bad_key": "- pressKey:\n  key: meta",
+            "bad_indent": f"- swipe:\n   direction: {self.rng.choice(self.directions)}",
+            "unknown_command": "- doubleTapOn: \"x\"",
+            "missing_space": f'- tapOn:"{self.string(4)}"',
+        }[mutation]
+        return text + "\n" + bad
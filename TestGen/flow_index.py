@@ -0,0 +1,233 @@
+#!/usr/bin/env python3
+"""
+Fingerprint index of generated Maestro flows and their latest results.
+
+The generator often produces the same flow again for near-identical
+requests. Flows are parsed into the IR (flow_ir.py), normalized and hashed,
+so flows that differ only in layout or in safe-to-ignore details share one
+fingerprint. `FlowIndex` stores each fingerprint in a local SQLite database
+along with its recent run results, so a duplicate can be recognized and its
+prior outcome reused instead of paying for another Maestro run.
+
+Normalization is limited to rewrites that cannot change what Maestro does:
+
+- layout (indentation, quoting, CRLF) is already gone in the IR;
+- the url, text selectors (tapOn, assertVisible, assertNotVisible), link,
+  screenshot name and runFlow/runScript paths are stripped, and selectors
+  have their inner whitespace collapsed; inputText is kept verbatim;
+- runs of back-to-back idempotent steps (waitForAnimationToEnd,
+  hideKeyboard) collapse to one;
+- runs of adjacent assertions are sorted, since they only read the screen.
+
+Flows that do not parse are fingerprinted from their text, with trailing
+whitespace and blank lines ignored, so they still deduplicate among
+themselves.
+
+    with FlowIndex(path) as index:
+        match = index.record(yaml_text, job_id="job-1", status="passed")
+        if match.previous:
+            print("seen before:", match.previous.status)
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import posixpath
+import re
+import sqlite3
+import threading
+import time
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Union
+
+from flow_ir import Command, Flow, try_parse_flow
+
+MAX_RUNS_PER_FLOW = 10
+
+SELECTOR_COMMANDS = frozenset({"tapOn", "assertVisible", "assertNotVisible"})
+STRIPPED_COMMANDS = frozenset({"openLink", "takeScreenshot"})
+IDEMPOTENT_COMMANDS = frozenset({"waitForAnimationToEnd", "hideKeyboard"})
+ASSERT_COMMANDS = frozenset({"assertVisible", "assertNotVisible"})
+
+_WHITESPACE = re.compile(r"\s+")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS flows (
+    fingerprint TEXT PRIMARY KEY,
+    canonical   TEXT NOT NULL,
+    first_seen  REAL NOT NULL,
+    last_seen   REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS runs (
+    fingerprint TEXT NOT NULL REFERENCES flows(fingerprint),
+    job_id      TEXT NOT NULL,
+    status      TEXT NOT NULL,
+    recorded_at REAL NOT NULL,
+    result      TEXT,
+    PRIMARY KEY (fingerprint, job_id)
+);
+CREATE INDEX IF NOT EXISTS runs_by_time ON runs (fingerprint, recorded_at);
+"""
+
+
+@dataclass
+class RunRecord:
+    job_id: str
+    status: str
+    recorded_at: float
+    result: Optional[Dict[str, Any]] = None
+
+
+@dataclass
+class FlowMatch:
+    """What the index knows about one flow's fingerprint."""
+
+    fingerprint: str
+    seen_before: bool
+    runs: int
+    previous: Optional[RunRecord] = None
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "fingerprint": self.fingerprint,
+            "seenBefore": self.seen_before,
+            "runs": self.runs,
+            "previous": asdict(self.previous) if self.previous else None,
+        }
+
+
+def _normalize_command(cmd: Command) -> Command:
+    value = cmd.value
+    if isinstance(value, str):
+        if cmd.kind in SELECTOR_COMMANDS:
+            value = _WHITESPACE.sub(" ", value).strip()
+        elif cmd.kind in STRIPPED_COMMANDS:
+            value = value.strip()
+    options = tuple(
+        (key, posixpath.normpath(val.strip()) if key == "file" and isinstance(val, str) else val)
+        for key, val in cmd.options
+    )
+    return Command(cmd.kind, value, options)
+
+
+def normalize(flow: Flow) -> Flow:
+    """A copy of `flow` in canonical form (spans dropped)."""
+    commands: List[Command] = []
+    assert_run = 0  # length of the run of assertions at the end of `commands`
+    for cmd in map(_normalize_command, flow.commands):
+        if cmd.kind in IDEMPOTENT_COMMANDS and commands and commands[-1].kind == cmd.kind:
+            continue
+        if cmd.kind in ASSERT_COMMANDS:
+            assert_run += 1
+        else:
+            assert_run = 0
+        commands.append(cmd)
+        if assert_run > 1:
+            commands[-assert_run:] = sorted(commands[-assert_run:], key=lambda c: (c.kind, str(c.value)))
+    return Flow(flow.url.strip(), commands)
+
+
+def canonical_text(flow: Union[str, Flow]) -> str:
+    """The normalized flow as YAML, or normalized raw text if it does not parse."""
+    if isinstance(flow, str):
+        parsed, _ = try_parse_flow(flow)
+        if parsed is None:
+            lines = (line.rstrip() for line in flow.replace("\r\n", "\n").split("\n"))
+            return "raw:\n" + "\n".join(line for line in lines if line)
+        flow = parsed
+    return normalize(flow).to_yaml()
+
+
+def fingerprint(flow: Union[str, Flow]) -> str:
+    """sha256 of canonical_text(flow)."""
+    return hashlib.sha256(canonical_text(flow).encode("utf-8")).hexdigest()
+
+
+class FlowIndex:
+    """SQLite-backed fingerprint -> recent runs index; safe to share across threads.
+
+    Recording is idempotent per (fingerprint, job_id), so re-polling a
+    finished job does not count it twice. Only the latest
+    MAX_RUNS_PER_FLOW runs of each flow are kept.
+    """
+
+    def __init__(self, path: Union[str, Path]):
+        self.path = Path(path)
+        if str(path) != ":memory:":
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(path), check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(SCHEMA)
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+    def __enter__(self) -> "FlowIndex":
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.close()
+
+    def _previous(self, digest: str, exclude_job: Optional[str]) -> Optional[RunRecord]:
+        row = self._conn.execute(
+            "SELECT job_id, status, recorded_at, result FROM runs"
+            " WHERE fingerprint = ? AND job_id != ? ORDER BY recorded_at DESC, rowid DESC LIMIT 1",
+            (digest, exclude_job or ""),
+        ).fetchone()
+        if row is None:
+            return None
+        return RunRecord(row[0], row[1], row[2], json.loads(row[3]) if row[3] else None)
+
+    def _runs(self, digest: str) -> int:
+        return self._conn.execute("SELECT COUNT(*) FROM runs WHERE fingerprint = ?", (digest,)).fetchone()[0]
+
+    def lookup(self, flow: Union[str, Flow]) -> FlowMatch:
+        """The fingerprint of `flow` and its latest recorded run, without recording anything."""
+        digest = fingerprint(flow)
+        with self._lock:
+            previous = self._previous(digest, None)
+            return FlowMatch(digest, previous is not None, self._runs(digest), previous)
+
+    def record(
+        self,
+        flow: Union[str, Flow],
+        job_id: str,
+        status: str,
+        result: Optional[Dict[str, Any]] = None,
+    ) -> FlowMatch:
+        """Store one run of `flow`; the match describes what was known before it."""
+        canonical = canonical_text(flow)
+        digest = hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+        now = time.time()
+        with self._lock:
+            previous = self._previous(digest, job_id)
+            with self._conn:
+                self._conn.execute("BEGIN IMMEDIATE")
+                self._conn.execute(
+                    "INSERT INTO flows (fingerprint, canonical, first_seen, last_seen) VALUES (?, ?, ?, ?)"
+                    " ON CONFLICT(fingerprint) DO UPDATE SET last_seen = excluded.last_seen",
+                    (digest, canonical, now, now),
+                )
+                self._conn.execute(
+                    "INSERT INTO runs (fingerprint, job_id, status, recorded_at, result) VALUES (?, ?, ?, ?, ?)"
+                    " ON CONFLICT(fingerprint, job_id) DO UPDATE SET status = excluded.status,"
+                    " result = COALESCE(excluded.result, runs.result)",
+                    (digest, job_id, status, now, json.dumps(result) if result is not None else None),
+                )
+                self._conn.execute(
+                    "DELETE FROM runs WHERE fingerprint = ? AND job_id NOT IN"
+                    " (SELECT job_id FROM runs WHERE fingerprint = ? ORDER BY recorded_at DESC, rowid DESC LIMIT ?)",
+                    (digest, digest, MAX_RUNS_PER_FLOW),
+                )
+            return FlowMatch(digest, previous is not None, self._runs(digest), previous)
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            flows = self._conn.execute("SELECT COUNT(*) FROM flows").fetchone()[0]
+            runs = self._conn.execute("SELECT COUNT(*) FROM runs").fetchone()[0]
+        return {"flows": flows, "runs": runs}
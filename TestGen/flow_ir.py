@@ -0,0 +1,261 @@
+#!/usr/bin/env python3
+"""
+Compact command IR for Maestro flows parsed with maestro_grammar.lark.
+
+A parse tree keeps every token (spaces, newlines, separators) as an object;
+for analysis we only need the commands. `parse_flow()` parses a flow with
+the validator's shared parser and a Transformer that folds the tree into:
+
+    Flow(url, commands)
+    Command(kind, value, options, line, column, end_line, end_column)
+
+- `kind` is the Maestro command name ("tapOn", "scroll", ...).
+- `value` is the scalar argument of one-line commands (`tapOn: "Login"` ->
+  "Login"), None for bare commands and map commands.
+- `options` holds a map command's keys in source order, e.g.
+  (("direction", "down"), ("times", 2)); integers are ints.
+- line/column are 1-based and point at the step's "-"; end_line/end_column
+  point just past the step's last character, like Lark tokens.
+
+Both classes use __slots__, and equality ignores spans, so a flow
+round-trips: `parse_flow(flow.to_yaml()) == flow`. `to_yaml()` writes the
+canonical layout (two-space maps, double-quoted strings, "\\n" newlines);
+generated flows already use it, so for them the text is identical.
+
+    from flow_ir import parse_flow, FlowSyntaxError
+
+    flow = parse_flow(text)
+    names = [c.value for c in flow.commands if c.kind == "takeScreenshot"]
+"""
+
+from __future__ import annotations
+
+import re
+import sys
+from typing import Any, Dict, Iterable, List, Optional, Tuple, Union
+
+import validator
+from validator import ValidationError
+
+Scalar = Union[str, int]
+
+BARE_COMMANDS = frozenset({
+    "launchApp", "back", "hideKeyboard", "waitForAnimationToEnd", "clearState", "clearKeychain",
+})
+SCALAR_COMMANDS = frozenset({
+    "tapOn", "inputText", "assertVisible", "assertNotVisible", "openLink", "takeScreenshot",
+})
+MAP_COMMANDS = frozenset({"pressKey", "eraseText", "scroll", "swipe", "runFlow", "runScript"})
+
+_KEYWORD = re.compile(r"[A-Za-z]+")
+_NAME = re.compile(r"[A-Za-z0-9_\-]{1,100}")
+_LAYOUT = frozenset({"SP", "SP2", "NL", "NL_SP2"})
+_QUOTED_OPTIONS = frozenset({"file"})  # PATH is a STRING; DIRECTION, KEY and INT are bare
+
+
+class FlowSyntaxError(ValueError):
+    """Raised by parse_flow(); `error` is the validator's ValidationError."""
+
+    def __init__(self, error: ValidationError):
+        super().__init__(f"{error.line}:{error.column}: {error.message}")
+        self.error = error
+
+
+class Command:
+    __slots__ = ("kind", "value", "options", "line", "column", "end_line", "end_column")
+
+    def __init__(
+        self,
+        kind: str,
+        value: Optional[Scalar] = None,
+        options: Tuple[Tuple[str, Scalar], ...] = (),
+        line: int = 0,
+        column: int = 0,
+        end_line: int = 0,
+        end_column: int = 0,
+    ):
+        self.kind = kind
+        self.value = value
+        self.options = options
+        self.line = line
+        self.column = column
+        self.end_line = end_line
+        self.end_column = end_column
+
+    def get(self, key: str, default: Any = None) -> Any:
+        """A map option by name."""
+        for name, value in self.options:
+            if name == key:
+                return value
+        return default
+
+    @property
+    def span(self) -> Tuple[int, int, int, int]:
+        return (self.line, self.column, self.end_line, self.end_column)
+
+    def _key(self) -> tuple:
+        return (self.kind, self.value, self.options)
+
+    def __eq__(self, other: object) -> bool:
+        return isinstance(other, Command) and self._key() == other._key()
+
+    def __hash__(self) -> int:
+        return hash(self._key())
+
+    def __repr__(self) -> str:
+        args = [repr(self.kind)]
+        if self.value is not None:
+            args.append(f"value={self.value!r}")
+        if self.options:
+            args.append(f"options={self.options!r}")
+        return f"Command({', '.join(args)}, line={self.line})"
+
+    def to_yaml(self) -> str:
+        """This command as one step, including the trailing newline."""
+        if self.options:
+            lines = [f"- {self.kind}:"]
+            lines.extend(
+                f'  {key}: "{value}"' if key in _QUOTED_OPTIONS else f"  {key}: {value}"
+                for key, value in self.options
+            )
+            return "\n".join(lines) + "\n"
+        if self.value is None:
+            return f"- {self.kind}\n"
+        if self.kind == "takeScreenshot" and _NAME.fullmatch(str(self.value)):
+            return f"- {self.kind}: {self.value}\n"
+        return f'- {self.kind}: "{self.value}"\n'
+
+
+class Flow:
+    __slots__ = ("url", "commands")
+
+    def __init__(self, url: str, commands: Iterable[Command] = ()):
+        self.url = url
+        self.commands = tuple(commands)
+
+    def __eq__(self, other: object) -> bool:
+        return isinstance(other, Flow) and (self.url, self.commands) == (other.url, other.commands)
+
+    def __hash__(self) -> int:
+        return hash((self.url, self.commands))
+
+    def __repr__(self) -> str:
+        return f"Flow(url={self.url!r}, commands={len(self.commands)})"
+
+    def to_yaml(self) -> str:
+        return f'url: "{self.url}"\n---\n' + "".join(c.to_yaml() for c in self.commands)
+
+
+def _unquote(token: str) -> str:
+    return str(token[1:-1])
+
+
+def _value(token: Any) -> Scalar:
+    if token.type == "INT":
+        return int(token)
+    if token.type in ("STRING", "PATH"):
+        return _unquote(token)
+    return sys.intern(str(token))  # DIRECTION, KEY: a handful of distinct values
+
+
+class _FlowRules:
+    """Transformer callbacks, mixed into the active backend's Transformer.
+
+    Anonymous keywords ("tapOn:", "back", ...) are filtered out of the tree,
+    so `step` reads its command's keyword from the source text, right after
+    the space that follows "-".
+    """
+
+    def __init__(self, text: str):
+        super().__init__(visit_tokens=False)
+        self._text = text
+
+    def start(self, children: List[Any]) -> Flow:
+        # SP STRING NL SEP NL steps
+        return Flow(_unquote(children[1]), children[-1])
+
+    def steps(self, children: List[Any]) -> List[Command]:
+        return [c for c in children if isinstance(c, Command)]
+
+    def first_step(self, children: List[Any]) -> Command:
+        return self._bare_step(children[0], "launchApp")
+
+    def step(self, children: List[Any]) -> Command:
+        sp, body = children[0], children[1]
+        if isinstance(body, Command):
+            cmd = body
+        else:
+            kind = sys.intern(_KEYWORD.match(self._text, sp.end_pos).group())
+            if not body:
+                return self._bare_step(sp, kind)
+            token = body[-1]
+            cmd = Command(kind, _value(token), end_line=token.end_line, end_column=token.end_column)
+        cmd.line, cmd.column = sp.line, sp.column - 1
+        return cmd
+
+    def command(self, children: List[Any]) -> Any:
+        # A sub-rule's Command, or the tokens of an inline alternative
+        if len(children) == 1 and isinstance(children[0], Command):
+            return children[0]
+        return children
+
+    def _bare_step(self, sp: Any, kind: str) -> Command:
+        return Command(
+            kind, line=sp.line, column=sp.column - 1, end_line=sp.end_line, end_column=sp.end_column + len(kind)
+        )
+
+    def _map(self, kind: str, keys: Tuple[str, ...], children: List[Any]) -> Command:
+        values = [t for t in children if t.type not in _LAYOUT]
+        last = values[-1]
+        options = tuple(zip(keys, (_value(t) for t in values)))
+        return Command(kind, None, options, end_line=last.end_line, end_column=last.end_column)
+
+    def take_screenshot_simple(self, children: List[Any]) -> Command:
+        token = children[-1]
+        return Command("takeScreenshot", _value(token), end_line=token.end_line, end_column=token.end_column)
+
+    def press_key_map(self, children: List[Any]) -> Command:
+        return self._map("pressKey", ("key",), children)
+
+    def erase_text_map(self, children: List[Any]) -> Command:
+        return self._map("eraseText", ("characters",), children)
+
+    def scroll_map(self, children: List[Any]) -> Command:
+        return self._map("scroll", ("direction", "times"), children)
+
+    def swipe_map(self, children: List[Any]) -> Command:
+        return self._map("swipe", ("direction", "durationMs"), children)
+
+    def run_flow_map(self, children: List[Any]) -> Command:
+        return self._map("runFlow", ("file",), children)
+
+    def run_script_map(self, children: List[Any]) -> Command:
+        return self._map("runScript", ("file",), children)
+
+
+_transformers: Dict[str, type] = {}
+
+
+def _transformer_class(backend: Any) -> type:
+    cls = _transformers.get(backend.name)
+    if cls is None:
+        cls = _transformers[backend.name] = type("FlowTransformer", (_FlowRules, backend.Transformer), {})
+    return cls
+
+
+def parse_flow(text: str) -> Flow:
+    """Parse one flow into the IR; raises FlowSyntaxError if it does not match the grammar."""
+    backend = validator.get_backend()
+    try:
+        tree = backend.parser.parse(text)
+    except backend.UnexpectedInput as exc:
+        raise FlowSyntaxError(validator.error_from(exc, text)) from None
+    return _transformer_class(backend)(text).transform(tree)
+
+
+def try_parse_flow(text: str) -> Tuple[Optional[Flow], Optional[ValidationError]]:
+    """parse_flow() that never raises: (flow, None) or (None, error)."""
+    try:
+        return parse_flow(text), None
+    except FlowSyntaxError as exc:
+        return None, exc.error
@@ -0,0 +1,249 @@
+#!/usr/bin/env python3
+"""
+Static pre-flight checks for Maestro flows, run on the IR in milliseconds.
+
+A Maestro run takes tens of seconds, and many failed runs come from
+problems visible in the flow itself. Each rule inspects a parsed Flow
+(flow_ir.py) and reports Diagnostics with the rule name, severity and
+source span:
+
+    missing-file          runFlow / runScript file does not exist (error)
+    duplicate-screenshot  takeScreenshot name reused, so the PNG in
+                          qa/generated/ is overwritten (error within a
+                          flow, warning across flows of one batch)
+    unintroduced-text     assertVisible text that no earlier inputText or
+                          tapOn in the flow and no known source file
+                          contains (warning; needs `known_text`)
+
+Rules register themselves with @rule; `lint()` runs all of them, or the
+names passed in `rules`. A flow that does not parse yields a single
+"syntax" diagnostic.
+
+    python TestGen/flow_lint.py flows/ --sources web/src   # JSON lines, exit 1 on errors
+
+    from flow_lint import LintContext, lint
+    diagnostics = lint(text, LintContext(base_dir=flow_dir, known_text=load_known_text(paths)))
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import sys
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple, Union
+
+from flow_ir import Command, Flow, try_parse_flow
+
+SEVERITIES = ("error", "warning")
+MAX_SOURCE_BYTES = 1024 * 1024  # per known-text file
+
+
+@dataclass
+class Diagnostic:
+    rule: str
+    severity: str
+    message: str
+    line: int
+    column: int
+    end_line: int
+    end_column: int
+    flow: str = ""
+
+    def to_dict(self) -> Dict[str, object]:
+        return asdict(self)
+
+
+@dataclass
+class LintContext:
+    """What rules may know beyond the flow text.
+
+    base_dir:    directory runFlow / runScript paths are relative to, which
+                 for Maestro is the flow file's own directory; None skips
+                 missing-file.
+    known_text:  lower-cased text of the app's sources; None skips
+                 unintroduced-text.
+    flow:        label put on diagnostics (usually the flow's path).
+    screenshots: name -> flow label, shared by lint_many() across a batch.
+    """
+
+    base_dir: Optional[Path] = None
+    known_text: Optional[str] = None
+    flow: str = ""
+    screenshots: Dict[str, str] = field(default_factory=dict)
+
+
+Finding = Tuple[Command, str]
+
+
+@dataclass(frozen=True)
+class Rule:
+    name: str
+    severity: str
+    description: str
+    check: Callable[[Flow, LintContext], Iterable[Union[Finding, Tuple[Command, str, str]]]]
+
+
+RULES: Dict[str, Rule] = {}
+
+
+def rule(name: str, severity: str, description: str):
+    """Register a check yielding (command, message) or (command, message, severity)."""
+    if severity not in SEVERITIES:
+        raise ValueError(f"severity must be one of {SEVERITIES}, got {severity!r}")
+
+    def register(check):
+        RULES[name] = Rule(name, severity, description, check)
+        return check
+
+    return register
+
+
+@rule("missing-file", "error", "runFlow / runScript file does not exist")
+def _missing_file(flow: Flow, ctx: LintContext) -> Iterator[Finding]:
+    if ctx.base_dir is None:
+        return
+    for cmd in flow.commands:
+        if cmd.kind in ("runFlow", "runScript"):
+            target = cmd.get("file")
+            if target and not (ctx.base_dir / target).is_file():
+                yield cmd, f"{cmd.kind} file not found: {target} (relative to {ctx.base_dir})"
+
+
+def _screenshot_name(value: object) -> str:
+    name = str(value).strip()
+    return name[:-4] if name.lower().endswith(".png") else name
+
+
+@rule("duplicate-screenshot", "error", "takeScreenshot name reused; the earlier PNG is overwritten")
+def _duplicate_screenshot(flow: Flow, ctx: LintContext) -> Iterator[Tuple[Command, str, str]]:
+    local: Dict[str, int] = {}
+    for cmd in flow.commands:
+        if cmd.kind != "takeScreenshot":
+            continue
+        name = _screenshot_name(cmd.value)
+        if name in local:
+            yield cmd, f"screenshot {name!r} already taken on line {local[name]}", "error"
+            continue
+        local[name] = cmd.line
+        other = ctx.screenshots.get(name)
+        if other is not None and other != ctx.flow:
+            yield cmd, f"screenshot {name!r} is also taken by {other}", "warning"
+        else:
+            ctx.screenshots[name] = ctx.flow
+
+
+@rule("unintroduced-text", "warning", "assertVisible text appears nowhere the flow or app could show it")
+def _unintroduced_text(flow: Flow, ctx: LintContext) -> Iterator[Finding]:
+    if ctx.known_text is None:
+        return
+    introduced: List[str] = []
+    for cmd in flow.commands:
+        if cmd.kind in ("inputText", "tapOn") and isinstance(cmd.value, str):
+            introduced.append(cmd.value.lower())
+        elif cmd.kind == "assertVisible" and isinstance(cmd.value, str):
+            text = cmd.value.strip().lower()
+            if text and text not in ctx.known_text and not any(text in seen for seen in introduced):
+                yield cmd, (
+                    f"asserted text {cmd.value!r} is not typed or tapped earlier and not found in app sources"
+                )
+
+
+def load_known_text(paths: Iterable[Union[str, Path]]) -> str:
+    """Lower-cased contents of files (or files under directories), for unintroduced-text."""
+    chunks: List[str] = []
+    for path in map(Path, paths):
+        files = sorted(p for p in path.rglob("*") if p.is_file()) if path.is_dir() else [path]
+        for file in files:
+            try:
+                with open(file, "rb") as fh:
+                    data = fh.read(MAX_SOURCE_BYTES)
+            except OSError:
+                continue
+            if b"\0" not in data[:8000]:
+                chunks.append(data.decode("utf-8", errors="replace").lower())
+    return "\n".join(chunks)
+
+
+def lint(
+    flow: Union[str, Flow],
+    ctx: Optional[LintContext] = None,
+    rules: Optional[Sequence[str]] = None,
+) -> List[Diagnostic]:
+    """Run the registered rules (or only `rules`) over one flow; never raises for bad input."""
+    unknown = set(rules or ()) - set(RULES)
+    if unknown:
+        raise ValueError(f"unknown lint rules: {sorted(unknown)}")
+    ctx = ctx or LintContext()
+    if isinstance(flow, str):
+        parsed, error = try_parse_flow(flow)
+        if parsed is None:
+            span = (error.line, error.column, error.line, error.column)
+            return [Diagnostic("syntax", "error", error.message, *span, ctx.flow)]
+        flow = parsed
+    diagnostics: List[Diagnostic] = []
+    for name in rules or RULES:
+        spec = RULES[name]
+        for finding in spec.check(flow, ctx):
+            cmd, message = finding[0], finding[1]
+            severity = finding[2] if len(finding) > 2 else spec.severity
+            diagnostics.append(Diagnostic(name, severity, message, *cmd.span, ctx.flow))
+    diagnostics.sort(key=lambda d: (d.line, d.column, d.rule))
+    return diagnostics
+
+
+def lint_many(
+    flows: Iterable[Tuple[str, Union[str, Flow]]],
+    base_dir: Optional[Path] = None,
+    known_text: Optional[str] = None,
+    rules: Optional[Sequence[str]] = None,
+) -> List[Diagnostic]:
+    """Lint (label, flow) pairs as one batch, so screenshot names are checked across flows.
+
+    When `base_dir` is None, each label that names a file resolves paths
+    from that file's directory.
+    """
+    screenshots: Dict[str, str] = {}
+    diagnostics: List[Diagnostic] = []
+    for label, flow in flows:
+        flow_dir = base_dir
+        if flow_dir is None and label and Path(label).is_file():
+            flow_dir = Path(label).resolve().parent
+        ctx = LintContext(base_dir=flow_dir, known_text=known_text, flow=label, screenshots=screenshots)
+        diagnostics.extend(lint(flow, ctx, rules))
+    return diagnostics
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    from validate_flows import collect_flows
+
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("paths", nargs="*", help="flow files, directories or glob patterns")
+    parser.add_argument("--sources", nargs="*", default=None, help="app sources for unintroduced-text")
+    parser.add_argument("--rule", action="append", dest="rules", choices=sorted(RULES), help="run only these rules")
+    parser.add_argument("--list-rules", action="store_true", help="print the rule registry and exit")
+    args = parser.parse_args(argv)
+
+    if args.list_rules:
+        for spec in RULES.values():
+            print(json.dumps({"rule": spec.name, "severity": spec.severity, "description": spec.description}))
+        return 0
+    if not args.paths:
+        parser.error("the following arguments are required: paths")
+    paths = collect_flows(args.paths)
+    if not paths:
+        print("no flow files matched", file=sys.stderr)
+        return 2
+    known_text = load_known_text(args.sources) if args.sources is not None else None
+    batch = ((str(p), p.read_text(encoding="utf-8", errors="replace")) for p in paths)
+    diagnostics = lint_many(batch, known_text=known_text, rules=args.rules)
+    for diagnostic in diagnostics:
+        print(json.dumps(diagnostic.to_dict()))
+    errors = sum(d.severity == "error" for d in diagnostics)
+    print(f"{len(paths)} flows: {errors} errors, {len(diagnostics) - errors} warnings", file=sys.stderr)
+    return 1 if errors else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
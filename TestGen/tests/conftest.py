@@ -0,0 +1,5 @@
+import pathlib
+import sys
+
+# validator.py and friends are flat modules next to the grammar, not an installed package
+sys.path.insert(0, str(pathlib.Path(__file__).parents[1]))
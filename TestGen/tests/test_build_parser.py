@@ -0,0 +1,57 @@
+import subprocess
+import sys
+
+import build_parser
+import validator
+
+FLOWS = [
+    'url: "http://localhost:3000"\n---\n- launchApp\n- tapOn: "Login"\n',
+    'url: "x"\n---\n- launchApp\n- scroll:\n  direction: middle\n',
+    'url: "x"\n---\n- launchApp\n- bogus\n',
+    'url: "x"\n---\n- launchApp\n- tapOn: "Lo\n',
+    'url: "x"\n---\n',
+]
+
+
+def test_generated_parser_is_up_to_date():
+    # Fails when maestro_grammar.lark changed without `python TestGen/build_parser.py`
+    assert build_parser.is_up_to_date()
+    check = subprocess.run([sys.executable, build_parser.__file__, "--check"], capture_output=True)
+    assert check.returncode == 0
+
+
+def test_stale_or_missing_module_is_detected(tmp_path):
+    grammar = tmp_path / "g.lark"
+    grammar.write_bytes(build_parser.GRAMMAR_PATH.read_bytes())
+    output = tmp_path / "maestro_parser.py"
+    assert not build_parser.is_up_to_date(grammar, output)
+    output.write_text(f"{build_parser.HASH_PREFIX}{build_parser.grammar_sha256(grammar)!r}\n")
+    assert build_parser.is_up_to_date(grammar, output)
+    grammar.write_text(grammar.read_text() + "\n// edited\n")
+    assert not build_parser.is_up_to_date(grammar, output)
+
+
+def test_standalone_backend_matches_runtime(monkeypatch):
+    standalone = validator._standalone_backend()
+    assert standalone is not None and standalone.name == "standalone"
+    monkeypatch.setenv("MAESTRO_GRAMMAR_CACHE", "0")
+    runtime = validator._runtime_backend()
+
+    def results(backend):
+        monkeypatch.setattr(validator, "_backend", backend)
+        return [r.to_dict() for r in validator.validate_many(FLOWS)]
+
+    assert results(standalone) == results(runtime)
+
+
+def test_env_forces_runtime_backend(monkeypatch):
+    monkeypatch.setenv("MAESTRO_STANDALONE_PARSER", "0")
+    assert validator._standalone_backend() is None
+
+
+def test_standalone_startup_skips_lark():
+    code = "import sys, validator; validator.validate('x'); print('lark' in sys.modules)"
+    out = subprocess.run(
+        [sys.executable, "-c", code], cwd=build_parser.TESTGEN_DIR, capture_output=True, text=True, check=True
+    )
+    assert out.stdout.strip() == "False"
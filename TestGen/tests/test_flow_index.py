@@ -0,0 +1,81 @@
+import threading
+
+import flow_index
+from flow_index import FlowIndex, canonical_text, fingerprint
+
+BASE = (
+    'url: "http://localhost:3000"\n---\n- launchApp\n'
+    '- tapOn: "Sign in"\n'
+    "- waitForAnimationToEnd\n"
+    '- assertVisible: "Welcome"\n'
+    '- assertNotVisible: "Error"\n'
+    "- takeScreenshot: home\n"
+)
+
+
+def test_layout_and_safe_rewrites_share_a_fingerprint():
+    variant = (
+        'url: "http://localhost:3000"\r\n---\r\n- launchApp\r\n'
+        '- tapOn: " Sign   in "\r\n'
+        "- waitForAnimationToEnd\r\n"
+        "- waitForAnimationToEnd\r\n"
+        '- assertNotVisible: "Error"\r\n'
+        '- assertVisible: "Welcome"\r\n'
+        '- takeScreenshot: "home"'
+    )
+    assert fingerprint(variant) == fingerprint(BASE)
+    assert canonical_text(variant) == canonical_text(BASE)
+
+
+def test_meaningful_changes_change_the_fingerprint():
+    assert fingerprint(BASE.replace("Sign in", "Sign up")) != fingerprint(BASE)
+    # Order matters once a step with side effects sits between two assertions
+    moved = BASE.replace('- tapOn: "Sign in"\n', "").replace("- takeScreenshot", '- tapOn: "Sign in"\n- takeScreenshot')
+    assert fingerprint(moved) != fingerprint(BASE)
+    typed = 'url: "u"\n---\n- launchApp\n- inputText: "a  b"\n'
+    assert fingerprint(typed) != fingerprint(typed.replace("a  b", "a b"))
+
+
+def test_run_flow_paths_are_normalized():
+    a = 'url: "u"\n---\n- launchApp\n- runFlow:\n  file: "./sub/login.yaml"\n'
+    assert fingerprint(a) == fingerprint(a.replace("./sub/login.yaml", "sub//login.yaml"))
+
+
+def test_unparsable_flows_fall_back_to_text():
+    raw = "appId: com.example\n---\n- tapOn:\n    id: x\n"
+    assert canonical_text(raw).startswith("raw:\n")
+    assert fingerprint(raw) == fingerprint(raw.replace("\n", "  \n\n"))
+
+
+def test_record_and_lookup(tmp_path):
+    with FlowIndex(tmp_path / "index.sqlite3") as index:
+        first = index.record(BASE, job_id="job-1", status="failed", result={"durationMs": 900})
+        assert not first.seen_before and first.runs == 1
+        again = index.record(BASE, job_id="job-1", status="failed")  # re-polled job
+        assert not again.seen_before and again.runs == 1
+
+        dup = index.record(BASE.replace("Sign in", "Sign  in"), job_id="job-2", status="passed")
+        assert dup.seen_before and dup.runs == 2
+        assert (dup.previous.job_id, dup.previous.status, dup.previous.result) == ("job-1", "failed", {"durationMs": 900})
+
+        latest = index.lookup(BASE)
+        assert latest.previous.job_id == "job-2"
+        assert not index.lookup(BASE.replace("home", "other")).seen_before
+        assert index.stats() == {"flows": 1, "runs": 2}
+
+    with FlowIndex(tmp_path / "index.sqlite3") as reopened:
+        assert reopened.lookup(BASE).runs == 2
+
+
+def test_runs_are_pruned_and_threads_share_the_index(tmp_path, monkeypatch):
+    monkeypatch.setattr(flow_index, "MAX_RUNS_PER_FLOW", 3)
+    index = FlowIndex(tmp_path / "index.sqlite3")
+    threads = [
+        threading.Thread(target=index.record, args=(BASE, f"job-{i}", "passed")) for i in range(8)
+    ]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert index.stats() == {"flows": 1, "runs": 3}
+    index.close()
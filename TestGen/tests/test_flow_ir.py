@@ -0,0 +1,91 @@
+import random
+
+import pytest
+
+import validator
+from flow_ir import Command, Flow, FlowSyntaxError, parse_flow, try_parse_flow
+
+FLOW = (
+    'url: "http://localhost:3000"\n'
+    "---\n"
+    "- launchApp\n"
+    '- tapOn: "Login"\n'
+    "- scroll:\n"
+    "  direction: down\n"
+    "  times: 2\n"
+    "- pressKey:\n"
+    "  key: enter\n"
+    "- takeScreenshot: home-1\n"
+    '- runFlow:\n'
+    '  file: "login.yaml"\n'
+    "- back\n"
+)
+
+STEPS = [
+    "- back", "- hideKeyboard", "- waitForAnimationToEnd", "- clearState", "- clearKeychain", "- launchApp",
+    '- tapOn: "Sign in"', '- inputText: "a@b.c"', '- assertVisible: "Hi"', '- assertNotVisible: "Err"',
+    '- openLink: "http://x/y"', '- takeScreenshot: "shot 1"', "- takeScreenshot: shot_2",
+    "- pressKey:\n  key: backspace", "- eraseText:\n  characters: 12",
+    "- scroll:\n  direction: up\n  times: 1", "- swipe:\n  direction: left\n  durationMs: 400",
+    '- runScript:\n  file: "setup.js"',
+]
+
+
+def test_commands_and_spans():
+    flow = parse_flow(FLOW)
+    assert flow.url == "http://localhost:3000"
+    assert [c.kind for c in flow.commands] == [
+        "launchApp", "tapOn", "scroll", "pressKey", "takeScreenshot", "runFlow", "back",
+    ]
+    launch, tap, scroll, key, shot, run, back = flow.commands
+    assert tap.value == "Login" and tap.options == ()
+    assert scroll.options == (("direction", "down"), ("times", 2)) and scroll.get("times") == 2
+    assert key.get("key") == "enter" and shot.value == "home-1" and run.get("file") == "login.yaml"
+    assert launch.span == (3, 1, 3, 12)
+    assert tap.span == (4, 1, 4, 17)
+    assert scroll.span == (5, 1, 7, 11)
+    assert back.span == (13, 1, 13, 7)
+
+
+def test_round_trip_is_exact_for_canonical_flows():
+    assert parse_flow(FLOW).to_yaml() == FLOW
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_round_trip_random_flows(seed):
+    rng = random.Random(seed)
+    text = 'url: "u"\n---\n- launchApp\n' + "\n".join(rng.choice(STEPS) for _ in range(rng.randint(0, 25))) + "\n"
+    flow = parse_flow(text)
+    assert flow.to_yaml() == text
+    assert parse_flow(flow.to_yaml()) == flow
+
+
+def test_equality_ignores_layout_and_spans():
+    a = parse_flow('url: "u"\n---\n- launchApp\n- takeScreenshot: "home"\n')
+    b = parse_flow('url: "u"\r\n---\r\n- launchApp\r\n- takeScreenshot: home')
+    assert a == b and hash(a) == hash(b)
+    assert b.to_yaml() == 'url: "u"\n---\n- launchApp\n- takeScreenshot: home\n'
+    assert Command("tapOn", "x", line=1) == Command("tapOn", "x", line=9)
+
+
+def test_compact_objects():
+    flow = parse_flow(FLOW)
+    assert not hasattr(flow, "__dict__") and not hasattr(flow.commands[0], "__dict__")
+    assert isinstance(flow, Flow)
+
+
+def test_syntax_errors():
+    with pytest.raises(FlowSyntaxError) as info:
+        parse_flow('url: "x"\n---\n- launchApp\n- bogus\n')
+    assert (info.value.error.line, info.value.error.column) == (4, 3)
+    flow, error = try_parse_flow('url: "x"\n---\n')
+    assert flow is None and error.kind == "unexpected_eof"
+
+
+def test_runtime_backend_builds_the_same_ir(monkeypatch):
+    expected = parse_flow(FLOW)
+    monkeypatch.setenv("MAESTRO_GRAMMAR_CACHE", "0")
+    monkeypatch.setattr(validator, "_backend", validator._runtime_backend())
+    flow = parse_flow(FLOW)
+    assert flow == expected
+    assert [c.span for c in flow.commands] == [c.span for c in expected.commands]
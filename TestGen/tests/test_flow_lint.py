@@ -0,0 +1,88 @@
+import json
+
+import pytest
+
+import flow_lint
+from flow_lint import RULES, LintContext, lint, lint_many, load_known_text, rule
+
+HEAD = 'url: "http://localhost:3000"\n---\n- launchApp\n'
+
+
+def rules_of(diagnostics):
+    return [(d.rule, d.severity, d.line) for d in diagnostics]
+
+
+def test_clean_flow_has_no_diagnostics(tmp_path):
+    (tmp_path / "login.yaml").write_text(HEAD)
+    text = HEAD + '- runFlow:\n  file: "login.yaml"\n- inputText: "Ada"\n- assertVisible: "ada"\n- takeScreenshot: a\n'
+    assert lint(text, LintContext(base_dir=tmp_path, known_text="")) == []
+
+
+def test_missing_run_flow_and_script_files(tmp_path):
+    text = HEAD + '- runFlow:\n  file: "nope.yaml"\n- runScript:\n  file: "setup.js"\n'
+    (tmp_path / "setup.js").write_text("")
+    (diag,) = lint(text, LintContext(base_dir=tmp_path))
+    assert (diag.rule, diag.severity, diag.line, diag.end_line) == ("missing-file", "error", 4, 5)
+    assert lint(text) == []  # no base_dir: the rule cannot know
+
+
+def test_duplicate_screenshots_within_and_across_flows():
+    a = HEAD + "- takeScreenshot: home\n- back\n- takeScreenshot: \"home\"\n"
+    b = HEAD + "- takeScreenshot: home\n- takeScreenshot: other\n"
+    diagnostics = lint_many([("a.yaml", a), ("b.yaml", b)])
+    assert [(d.flow, d.rule, d.severity, d.line) for d in diagnostics] == [
+        ("a.yaml", "duplicate-screenshot", "error", 6),
+        ("b.yaml", "duplicate-screenshot", "warning", 4),
+    ]
+    assert "a.yaml" in diagnostics[1].message
+
+
+def test_unintroduced_text_needs_known_sources(tmp_path):
+    src = tmp_path / "src"
+    src.mkdir()
+    (src / "App.tsx").write_text("<h1>Welcome back</h1>")
+    (src / "logo.png").write_bytes(b"\x89PNG\0\0")
+    known = load_known_text([src])
+    text = HEAD + '- tapOn: "Sign in"\n- assertVisible: "WELCOME BACK"\n- assertVisible: "sign"\n- assertVisible: "Bye"\n'
+    assert rules_of(lint(text, LintContext(known_text=known))) == [("unintroduced-text", "warning", 7)]
+    assert lint(text) == []
+
+
+def test_syntax_error_is_one_diagnostic():
+    (diag,) = lint('url: "x"\n---\n- bogus\n', LintContext(flow="f.yaml"))
+    assert (diag.rule, diag.severity, diag.line, diag.flow) == ("syntax", "error", 3, "f.yaml")
+
+
+def test_rule_registry(monkeypatch):
+    monkeypatch.setattr(flow_lint, "RULES", dict(RULES))
+
+    @rule("no-back", "warning", "back is flaky on web")
+    def _no_back(flow, ctx):
+        return ((c, "avoid back") for c in flow.commands if c.kind == "back")
+
+    text = HEAD + "- back\n- takeScreenshot: x\n- takeScreenshot: x\n"
+    assert rules_of(lint(text, rules=["no-back"])) == [("no-back", "warning", 4)]
+    assert {d.rule for d in lint(text)} == {"no-back", "duplicate-screenshot"}
+    with pytest.raises(ValueError):
+        lint(text, rules=["nope"])
+    with pytest.raises(ValueError):
+        rule("x", "fatal", "")
+
+
+def test_cli_json_lines_and_exit_code(tmp_path, capsys):
+    (tmp_path / "a.yaml").write_text(HEAD + "- takeScreenshot: x\n- takeScreenshot: x\n")
+    assert flow_lint.main([str(tmp_path)]) == 1
+    (record,) = [json.loads(line) for line in capsys.readouterr().out.splitlines()]
+    assert record["rule"] == "duplicate-screenshot" and record["flow"].endswith("a.yaml")
+    (tmp_path / "a.yaml").write_text(HEAD)
+    assert flow_lint.main([str(tmp_path)]) == 0
+
+
+def test_cli_list_rules_needs_no_paths(capsys):
+    assert flow_lint.main(["--list-rules"]) == 0
+    listed = {json.loads(line)["rule"] for line in capsys.readouterr().out.splitlines()}
+    assert {"duplicate-screenshot", "unintroduced-text"} <= listed
+    with pytest.raises(SystemExit) as exc:
+        flow_lint.main([])
+    assert exc.value.code == 2
+    assert "paths" in capsys.readouterr().err
@@ -0,0 +1,115 @@
+import random
+
+import pytest
+
+import validator
+from flow_fuzz import MUTATIONS, FlowFuzzer, grammar_facts
+from flow_ir import parse_flow
+
+SEEDS = range(8)
+FACTS = grammar_facts()
+
+
+def flow_with(step: str) -> str:
+    return f'url: "http://localhost:3000"\n---\n- launchApp\n{step}\n- back\n'
+
+
+def accepted(text: str) -> bool:
+    return validator.validate(text).ok
+
+
+@pytest.mark.parametrize("seed", SEEDS)
+def test_valid_flows_parse_to_their_ir(seed):
+    fuzzer = FlowFuzzer(seed)
+    for _ in range(150):
+        text, expected = fuzzer.valid_flow()
+        flow = parse_flow(text)
+        assert flow == expected, text
+        assert parse_flow(flow.to_yaml()) == flow
+
+
+@pytest.mark.parametrize("mutation", MUTATIONS)
+def test_mutations_are_rejected(mutation):
+    fuzzer = FlowFuzzer(MUTATIONS.index(mutation))
+    for _ in range(40):
+        text, _ = fuzzer.invalid_flow(mutation)
+        assert not accepted(text), text
+
+
+def test_generated_flows_cover_every_rule():
+    parser = validator.get_parser()
+    names = {getattr(r.origin.name, "value", r.origin.name) for r in parser.rules}
+    rules = {name for name in names if not name.startswith("_")}  # "_" rules are inlined by Lark
+    seen = set()
+    fuzzer = FlowFuzzer(0)
+    for _ in range(200):
+        tree = parser.parse(fuzzer.valid_flow()[0])
+        seen.update(sub.data for sub in tree.iter_subtrees())
+    seen = {getattr(name, "value", name) for name in seen}
+    assert rules - seen == set()
+
+
+def test_standalone_and_runtime_backends_agree():
+    standalone = validator._standalone_backend()
+    if standalone is None:
+        pytest.skip("standalone parser is stale or disabled")
+    runtime = validator._runtime_backend()
+    rng = random.Random(7)
+    fuzzer = FlowFuzzer(7)
+    for _ in range(300):
+        text = bytearray(fuzzer.valid_flow(10)[0].encode("utf-8"))
+        for _ in range(rng.randint(0, 3)):
+            text[rng.randrange(len(text))] = rng.choice(b' \n"-:abxyz019')
+        text = text.decode("utf-8", errors="replace")
+        outcomes = []
+        for backend in (standalone, runtime):
+            try:
+                backend.parser.parse(text)
+                outcomes.append(True)
+            except backend.UnexpectedInput:
+                outcomes.append(False)
+        assert outcomes[0] == outcomes[1], text
+
+
+def test_string_length_limit():
+    limit = FACTS["STRING"]
+    assert limit == 200
+    assert accepted(flow_with(f'- tapOn: "{"x" * limit}"'))
+    assert not accepted(flow_with(f'- tapOn: "{"x" * (limit + 1)}"'))
+    assert accepted(f'url: "{"u" * limit}"\n---\n- launchApp\n')
+    assert not accepted(f'url: "{"u" * (limit + 1)}"\n---\n- launchApp\n')
+
+
+def test_string_limit_counts_characters_not_bytes():
+    assert accepted(flow_with(f'- inputText: "{"🙂" * FACTS["STRING"]}"'))
+
+
+def test_name_length_limit():
+    limit = FACTS["NAME"]
+    assert limit == 100
+    assert accepted(flow_with(f"- takeScreenshot: {'n' * limit}"))
+    assert not accepted(flow_with(f"- takeScreenshot: {'n' * (limit + 1)}"))
+    # A quoted screenshot name is a STRING, so it may be longer
+    assert accepted(flow_with(f'- takeScreenshot: "{"n" * (limit + 1)}"'))
+
+
+def test_int_digit_limit():
+    digits = FACTS["INT"]
+    assert accepted(flow_with(f"- eraseText:\n  characters: {'9' * digits}"))
+    assert not accepted(flow_with(f"- eraseText:\n  characters: {'9' * (digits + 1)}"))
+    assert not accepted(flow_with(f"- scroll:\n  direction: up\n  times: {'1' * (digits + 1)}"))
+
+
+def test_every_enum_value_is_accepted():
+    for direction in FACTS["DIRECTION"]:
+        assert accepted(flow_with(f"- swipe:\n  direction: {direction}"))
+    for key in FACTS["KEY"]:
+        assert accepted(flow_with(f"- pressKey:\n  key: {key}"))
+
+
+def test_pathological_flow_at_every_limit_parses():
+    steps = "\n".join(
+        [f'- tapOn: "{"x" * FACTS["STRING"]}"', f"- takeScreenshot: {'n' * FACTS['NAME']}"] * 500
+    )
+    flow = parse_flow(flow_with(steps))
+    assert len(flow.commands) == 1002
@@ -1,18 +1,17 @@
-import pathlib
 import pytest
-from lark import Lark, UnexpectedInput
 
-GRAMMAR_PATH = pathlib.Path(__file__).parents[1] / "maestro_grammar.lark"
-GRAMMAR = GRAMMAR_PATH.read_text()
-parser = Lark(GRAMMAR, start="start", parser="lalr")
+from validator import get_backend
+
+backend = get_backend()
+parser = backend.parser
 
 
 def parse_fail(yaml_text: str):
-    with pytest.raises(UnexpectedInput):
+    with pytest.raises(backend.UnexpectedInput):
         parser.parse(yaml_text)
 
 
-def test_missing_app_id():
+def test_missing_url():
     s = (
         '---\n'
         '- tapOn: "Login"\n'
@@ -22,7 +21,8 @@ def test_missing_app_id():
 
 def test_missing_separator():
     s = (
-        'appId: "com.example.app"\n'
+        'url: "http://localhost:3000"\n'
+        '- launchApp\n'
         '- tapOn: "Login"\n'
     )
     parse_fail(s)
@@ -30,8 +30,9 @@ def test_missing_separator():
 
 def test_invalid_direction():
     s = (
-        'appId: "com.example.app"\n'
+        'url: "http://localhost:3000"\n'
         '---\n'
+        '- launchApp\n'
         '- scroll:\n'
         '  direction: middle\n'
     )
@@ -40,18 +41,20 @@ def test_invalid_direction():
 
 def test_press_key_invalid_key():
     s = (
-        'appId: "com.example.app"\n'
+        'url: "http://localhost:3000"\n'
         '---\n'
+        '- launchApp\n'
         '- pressKey:\n'
         '  key: meta\n'
     )
     parse_fail(s)
 
 
-def test_tap_map_requires_id_or_text():
+def test_tap_on_map_is_not_accepted():
     s = (
-        'appId: "com.example.app"\n'
+        'url: "http://localhost:3000"\n'
         '---\n'
+        '- launchApp\n'
         '- tapOn:\n'
         '  index: 0\n'
     )
@@ -60,8 +63,61 @@ def test_tap_map_requires_id_or_text():
 
 def test_string_must_be_quoted():
     s = (
-        'appId: com.example.app\n'
+        'url: "http://localhost:3000"\n'
         '---\n'
+        '- launchApp\n'
         '- tapOn: Login\n'
     )
     parse_fail(s)
+
+
+def test_app_id_header_is_not_accepted():
+    s = (
+        'appId: "com.example.app"\n'
+        '---\n'
+        '- launchApp\n'
+    )
+    parse_fail(s)
+
+
+def test_flow_must_start_with_launch_app():
+    s = (
+        'url: "http://localhost:3000"\n'
+        '---\n'
+        '- tapOn: "Login"\n'
+    )
+    parse_fail(s)
+
+
+def test_run_flow_when_is_not_accepted():
+    s = (
+        'url: "http://localhost:3000"\n'
+        '---\n'
+        '- launchApp\n'
+        '- runFlow:\n'
+        '  when:\n'
+        '    visible: "Update Available"\n'
+        '  file: "flows/update.yaml"\n'
+    )
+    parse_fail(s)
+
+
+def test_take_screenshot_needs_a_name():
+    s = (
+        'url: "http://localhost:3000"\n'
+        '---\n'
+        '- launchApp\n'
+        '- takeScreenshot\n'
+    )
+    parse_fail(s)
+
+
+def test_take_screenshot_map_is_not_accepted():
+    s = (
+        'url: "http://localhost:3000"\n'
+        '---\n'
+        '- launchApp\n'
+        '- takeScreenshot:\n'
+        '  name: "after_login"\n'
+    )
+    parse_fail(s)
@@ -1,9 +1,6 @@
-import pathlib
-from lark import Lark
+from validator import get_parser
 
-GRAMMAR_PATH = pathlib.Path(__file__).parents[1] / "maestro_grammar.lark"
-GRAMMAR = GRAMMAR_PATH.read_text()
-parser = Lark(GRAMMAR, start="start", parser="lalr")
+parser = get_parser()
 
 
 def parse_ok(yaml_text: str):
@@ -12,7 +9,7 @@ def parse_ok(yaml_text: str):
 
 def test_minimal_tap_and_assert():
     s = (
-        'appId: "com.example.app"\n'
+        'url: "http://localhost:3000"\n'
         '---\n'
         '- launchApp\n'
         '- tapOn: "Login"\n'
@@ -21,23 +18,21 @@ def test_minimal_tap_and_assert():
     parse_ok(s)
 
 
-def test_mapping_tap_by_id_with_extras():
+def test_text_commands():
     s = (
-        'appId: "com.example.app"\n'
+        'url: "http://localhost:3000"\n'
         '---\n'
         '- launchApp\n'
-        '- tapOn:\n'
-        '  id: "login_button"\n'
-        '  index: 0\n'
-        '  optional: true\n'
-        '  timeoutMs: 5000\n'
+        '- inputText: "user@example.com"\n'
+        '- assertNotVisible: "Error"\n'
+        '- openLink: "http://localhost:3000/settings"\n'
     )
     parse_ok(s)
 
 
 def test_press_key_and_scroll_swipe():
     s = (
-        'appId: "com.example.app"\n'
+        'url: "http://localhost:3000"\n'
         '---\n'
         '- launchApp\n'
         '- pressKey:\n'
@@ -52,26 +47,38 @@ def test_press_key_and_scroll_swipe():
     parse_ok(s)
 
 
-def test_run_flow_and_script_with_when():
+def test_scroll_and_swipe_without_optional_key_mid_flow():
     s = (
-        'appId: "com.example.app"\n'
+        'url: "http://localhost:3000"\n'
+        '---\n'
+        '- launchApp\n'
+        '- scroll:\n'
+        '  direction: down\n'
+        '- swipe:\n'
+        '  direction: up\n'
+        '- tapOn: "Next"\n'
+    )
+    parse_ok(s)
+
+
+def test_run_flow_and_script():
+    s = (
+        'url: "http://localhost:3000"\n'
         '---\n'
         '- launchApp\n'
         '- runFlow:\n'
-        '  when:\n'
-        '    visible: "Update Available"\n'
         '  file: "flows/update.yaml"\n'
         '- runScript:\n'
-        '  when:\n'
-        '    platform: iOS\n'
         '  file: "scripts/setup.js"\n'
+        '- eraseText:\n'
+        '  characters: 10\n'
     )
     parse_ok(s)
 
 
 def test_simple_commands_inline():
     s = (
-        'appId: "com.example.app"\n'
+        'url: "http://localhost:3000"\n'
         '---\n'
         '- launchApp\n'
         '- back\n'
@@ -79,17 +86,20 @@ def test_simple_commands_inline():
         '- waitForAnimationToEnd\n'
         '- clearState\n'
         '- clearKeychain\n'
-        '- takeScreenshot\n'
     )
     parse_ok(s)
 
 
 def test_take_screenshot_named():
     s = (
-        'appId: "com.example.app"\n'
+        'url: "http://localhost:3000"\n'
         '---\n'
         '- launchApp\n'
-        '- takeScreenshot:\n'
-        '  name: "after_login"\n'
+        '- takeScreenshot: after_login\n'
+        '- takeScreenshot: "after login"\n'
     )
     parse_ok(s)
+
+
+def test_crlf_and_no_final_newline():
+    parse_ok('url: "http://localhost:3000"\r\n---\r\n- launchApp\r\n- back')
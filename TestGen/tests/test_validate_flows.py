@@ -0,0 +1,86 @@
+import json
+import xml.etree.ElementTree as ET
+
+import pytest
+
+import validate_flows
+from validate_flows import PassCache, collect_flows, iter_results, main
+
+GOOD = 'url: "http://localhost:3000"\n---\n- launchApp\n- tapOn: "Login %d"\n'
+BAD = 'url: "x"\n---\n- launchApp\n- bogus\n'
+
+
+@pytest.fixture
+def flows(tmp_path):
+    root = tmp_path / "flows"
+    (root / "nested").mkdir(parents=True)
+    (root / "a.yaml").write_text(GOOD % 1)
+    (root / "nested" / "b.yml").write_text(BAD)
+    (root / "nested" / "c.yaml").write_text(GOOD % 2)
+    (root / "notes.txt").write_text("not a flow")
+    return root
+
+
+def run(capsys, *argv):
+    code = main([*argv])
+    return code, capsys.readouterr().out
+
+
+def test_collect_dirs_files_and_globs(flows):
+    assert [p.name for p in collect_flows([str(flows)])] == ["a.yaml", "b.yml", "c.yaml"]
+    assert [p.name for p in collect_flows([str(flows / "**" / "*.yaml"), str(flows / "a.yaml")])] == [
+        "a.yaml", "c.yaml",
+    ]
+
+
+def test_jsonl_results_and_exit_code(flows, tmp_path, capsys):
+    code, out = run(capsys, str(flows), "--cache", str(tmp_path / "cache.json"))
+    records = [json.loads(line) for line in out.splitlines()]
+    assert code == 1
+    assert [(r["ok"], r["cached"]) for r in records] == [(True, False), (False, False), (True, False)]
+    assert records[1]["errors"][0]["line"] == 4
+
+    (flows / "nested" / "b.yml").write_text(GOOD % 3)
+    code, out = run(capsys, str(flows), "--cache", str(tmp_path / "cache.json"))
+    assert code == 0
+    assert [json.loads(line)["cached"] for line in out.splitlines()] == [True, False, True]
+
+
+def test_junit_output(flows, tmp_path, capsys):
+    report = tmp_path / "report.xml"
+    code, _ = run(capsys, str(flows), "--no-cache", "--format", "junit", "-o", str(report))
+    suite = ET.parse(report).getroot().find("testsuite")
+    assert code == 1
+    assert (suite.get("tests"), suite.get("failures")) == ("3", "1")
+    failure = suite.findall("testcase")[1].find("failure")
+    assert failure.get("type") == "unexpected_token" and failure.get("message").startswith("4:3:")
+
+
+def test_nothing_matched(tmp_path):
+    assert main([str(tmp_path / "*.yaml"), "--no-cache"]) == 2
+
+
+def test_cache_is_tied_to_grammar(tmp_path):
+    path = tmp_path / "cache.json"
+    cache = PassCache(path, "grammar-1")
+    cache.add("abc")
+    cache.save()
+    assert "abc" in PassCache(path, "grammar-1")
+    assert "abc" not in PassCache(path, "grammar-2")
+    path.write_text("{corrupt")
+    assert len(PassCache(path, "grammar-1")) == 0
+
+
+def test_unreadable_flow_fails(tmp_path):
+    bad = tmp_path / "latin1.yaml"
+    bad.write_bytes(b"url: \"caf\xe9\"\n")
+    (result,) = iter_results([bad], workers=1)
+    assert not result.ok and result.errors[0]["kind"] == "read_error"
+
+
+def test_process_pool_matches_serial(flows, monkeypatch):
+    paths = collect_flows([str(flows)]) * 4
+    serial = [r.to_dict() for r in iter_results(paths, workers=1)]
+    monkeypatch.setattr(validate_flows, "PARALLEL_THRESHOLD", 0)
+    pooled = [r.to_dict() for r in iter_results(paths, workers=2)]
+    assert pooled == serial
@@ -0,0 +1,48 @@
+import validator
+from validator import validate, validate_many
+
+VALID = (
+    'url: "http://localhost:3000"\n'
+    '---\n'
+    '- launchApp\n'
+    '- tapOn: "Login"\n'
+    '- scroll:\n'
+    '  direction: down\n'
+    '  times: 2\n'
+)
+
+
+def test_valid_flow():
+    result = validate(VALID)
+    assert result.ok and result.errors == []
+    assert result.to_dict() == {"ok": True, "errors": []}
+
+
+def test_unexpected_token_position_and_expected():
+    result = validate(VALID.replace("direction: down", "direction: middle"))
+    assert not result.ok
+    (err,) = result.errors
+    assert (err.line, err.column, err.kind, err.token) == (6, 14, "unexpected_token", "middle")
+    assert err.expected == ["DIRECTION"]
+    assert err.context.startswith("  direction: middle\n")
+
+
+def test_literal_terminals_are_readable():
+    err = validate('url: "x"\n---\n- launchApp\n- bogus\n').errors[0]
+    assert (err.line, err.column) == (4, 3)
+    assert '"tapOn:"' in err.expected and '"launchApp"' in err.expected
+
+
+def test_unexpected_character_and_eof():
+    err = validate('url: "x"\n---\n- launchApp\n- tapOn: "Lo\n').errors[0]
+    assert err.kind == "unexpected_character" and err.line == 4
+    err = validate('url: "x"\n---\n').errors[0]
+    assert err.kind == "unexpected_eof"
+    assert err.expected == ['"-"']
+
+
+def test_validate_many_shares_one_parser():
+    parser = validator.get_parser()
+    results = validate_many([VALID, "nope", VALID])
+    assert [r.ok for r in results] == [True, False, True]
+    assert validator.get_parser() is parser
@@ -0,0 +1,274 @@
+#!/usr/bin/env python3
+"""
+Validate directories of generated Maestro flows against maestro_grammar.lark.
+
+    python TestGen/validate_flows.py flows/                 # JSON lines on stdout
+    python TestGen/validate_flows.py 'flows/**/*.yaml' --format junit -o report.xml
+
+Arguments are files, directories (searched recursively for *.yaml / *.yml)
+or glob patterns. Flows are parsed on a process pool whose workers each hold
+one parser (validator.get_parser()); small batches are validated in-process,
+where pool start-up would cost more than it saves.
+
+A flow that passed before is skipped when its content hash is found in an
+on-disk cache of passing results. Cache entries are tied to the grammar's
+sha256, so editing the grammar revalidates everything. Failures are never
+cached.
+
+JSON lines are streamed, one object per flow in argument order. JUnit XML is
+written once the run finishes, since the suite element carries the totals.
+Exit status is 0 when every flow passes, 1 when any fails, 2 when nothing
+matched.
+
+Configuration (environment variables):
+    MAESTRO_VALIDATE_CACHE   cache file (default $XDG_CACHE_HOME/maestro-testgen/validated.json)
+"""
+
+from __future__ import annotations
+
+import argparse
+import glob
+import hashlib
+import json
+import os
+import sys
+import tempfile
+import time
+import xml.etree.ElementTree as ET
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, IO, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+import validator
+from build_parser import grammar_sha256
+
+FLOW_SUFFIXES = (".yaml", ".yml")
+PARALLEL_THRESHOLD = 64  # fewer flows than this are validated in-process
+MAX_CACHE_ENTRIES = 100_000
+CACHE_VERSION = 1
+
+
+def _default_cache_path() -> Path:
+    cache_home = os.getenv("XDG_CACHE_HOME") or str(Path.home() / ".cache")
+    return Path(cache_home) / "maestro-testgen" / "validated.json"
+
+
+CACHE_PATH = Path(os.getenv("MAESTRO_VALIDATE_CACHE") or _default_cache_path())
+
+
+@dataclass
+class FlowResult:
+    path: str
+    ok: bool
+    cached: bool = False
+    seconds: float = 0.0
+    errors: List[Dict[str, Any]] = field(default_factory=list)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"path": self.path, "ok": self.ok, "cached": self.cached, "errors": self.errors}
+
+
+class PassCache:
+    """Content hashes of flows that passed, for one grammar version.
+
+    Kept in insertion order and trimmed to the most recent MAX_CACHE_ENTRIES.
+    An unreadable or foreign cache file is treated as empty; a failed save is
+    ignored, since the cache only saves time.
+    """
+
+    def __init__(self, path: Path, grammar: str):
+        self.path = path
+        self.grammar = grammar
+        self._hashes: "OrderedDict[str, None]" = OrderedDict()
+        self._dirty = False
+        try:
+            data = json.loads(path.read_text())
+        except (OSError, ValueError):
+            return
+        if isinstance(data, dict) and data.get("version") == CACHE_VERSION and data.get("grammar") == grammar:
+            self._hashes.update((h, None) for h in data.get("passed", []) if isinstance(h, str))
+
+    def __contains__(self, digest: str) -> bool:
+        return digest in self._hashes
+
+    def __len__(self) -> int:
+        return len(self._hashes)
+
+    def add(self, digest: str) -> None:
+        if digest in self._hashes:
+            return
+        self._hashes[digest] = None
+        while len(self._hashes) > MAX_CACHE_ENTRIES:
+            self._hashes.popitem(last=False)
+        self._dirty = True
+
+    def save(self) -> None:
+        if not self._dirty:
+            return
+        data = {"version": CACHE_VERSION, "grammar": self.grammar, "passed": list(self._hashes)}
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            fd, tmp = tempfile.mkstemp(dir=str(self.path.parent), suffix=".json.tmp")
+            with os.fdopen(fd, "w") as fh:
+                json.dump(data, fh, separators=(",", ":"))
+            os.replace(tmp, self.path)
+        except OSError:
+            return
+        self._dirty = False
+
+
+def collect_flows(patterns: Iterable[str]) -> List[Path]:
+    """Expand files, directories and globs into flow files, de-duplicated, in order."""
+    found: "OrderedDict[Path, None]" = OrderedDict()
+    for pattern in patterns:
+        path = Path(pattern)
+        if path.is_dir():
+            matches = sorted(p for p in path.rglob("*") if p.suffix in FLOW_SUFFIXES and p.is_file())
+        elif path.is_file():
+            matches = [path]
+        else:
+            matches = sorted(Path(p) for p in glob.glob(pattern, recursive=True) if os.path.isfile(p))
+        found.update((p, None) for p in matches)
+    return list(found)
+
+
+def _display(path: Path) -> str:
+    try:
+        return str(path.resolve().relative_to(Path.cwd()))
+    except ValueError:
+        return str(path)
+
+
+def _init_worker() -> None:
+    validator.get_parser()
+
+
+def _check(text: str) -> Tuple[bool, List[Dict[str, Any]], float]:
+    start = time.perf_counter()
+    result = validator.validate(text)
+    return result.ok, result.to_dict()["errors"], time.perf_counter() - start
+
+
+def _read_error(exc: Exception) -> Dict[str, Any]:
+    return {
+        "line": 0, "column": 0, "message": f"Cannot read flow: {exc}", "kind": "read_error",
+        "token": None, "expected": [], "context": "",
+    }
+
+
+def iter_results(
+    paths: Sequence[Path],
+    workers: Optional[int] = None,
+    cache: Optional[PassCache] = None,
+) -> Iterator[FlowResult]:
+    """Validate `paths`, yielding one FlowResult per path in order.
+
+    Passing results are added to `cache`; the caller saves it.
+    """
+    workers = workers or os.cpu_count() or 1
+    # Read and hash in the parent so cached flows never reach a worker
+    pending: List[str] = []
+    # (display path, content hash, cached, read error) per path
+    plan: List[Tuple[str, Optional[str], bool, Optional[Exception]]] = []
+    for path in paths:
+        try:
+            data = path.read_bytes()
+            digest = hashlib.sha256(data).hexdigest()
+            cached = cache is not None and digest in cache
+            if not cached:
+                pending.append(data.decode("utf-8"))
+            plan.append((_display(path), digest, cached, None))
+        except (OSError, UnicodeDecodeError) as exc:
+            plan.append((_display(path), None, False, exc))
+
+    if workers <= 1 or len(pending) < PARALLEL_THRESHOLD:
+        executor = None
+        outcomes: Iterator[Tuple[bool, List[Dict[str, Any]], float]] = map(_check, pending)
+    else:
+        executor = ProcessPoolExecutor(max_workers=workers, initializer=_init_worker)
+        chunksize = max(1, len(pending) // (workers * 8))
+        outcomes = executor.map(_check, pending, chunksize=chunksize)
+    try:
+        for display, digest, cached, error in plan:
+            if error is not None:
+                yield FlowResult(display, False, errors=[_read_error(error)])
+            elif cached:
+                yield FlowResult(display, True, cached=True)
+            else:
+                ok, errors, seconds = next(outcomes)
+                if ok and cache is not None:
+                    cache.add(digest)
+                yield FlowResult(display, ok, seconds=seconds, errors=errors)
+    finally:
+        if executor is not None:
+            executor.shutdown(cancel_futures=True)
+
+
+def write_junit(results: Sequence[FlowResult], out: IO[str]) -> None:
+    failures = sum(not r.ok for r in results)
+    total_time = sum(r.seconds for r in results)
+    suites = ET.Element("testsuites", tests=str(len(results)), failures=str(failures))
+    suite = ET.SubElement(
+        suites, "testsuite", name="maestro-flows", tests=str(len(results)),
+        failures=str(failures), errors="0", skipped="0", time=f"{total_time:.3f}",
+    )
+    for r in results:
+        case = ET.SubElement(suite, "testcase", classname="maestro_grammar", name=r.path, time=f"{r.seconds:.3f}")
+        if not r.ok:
+            err = r.errors[0]
+            message = f"{err['line']}:{err['column']}: {err['message']}"
+            failure = ET.SubElement(case, "failure", message=message, type=err["kind"])
+            failure.text = err["context"]
+        elif r.cached:
+            ET.SubElement(case, "system-out").text = "passed previously (content hash cached)"
+    ET.indent(suites)
+    out.write('<?xml version="1.0" encoding="utf-8"?>\n')
+    out.write(ET.tostring(suites, encoding="unicode"))
+    out.write("\n")
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("paths", nargs="+", help="flow files, directories or glob patterns")
+    parser.add_argument("--format", choices=("jsonl", "junit"), default="jsonl")
+    parser.add_argument("-o", "--output", help="write results here instead of stdout")
+    parser.add_argument("-j", "--workers", type=int, default=None, help="worker processes (default: CPU count)")
+    parser.add_argument("--cache", default=str(CACHE_PATH), help="passing-result cache file")
+    parser.add_argument("--no-cache", action="store_true", help="revalidate every flow and leave the cache alone")
+    args = parser.parse_args(argv)
+
+    paths = collect_flows(args.paths)
+    if not paths:
+        print("no flow files matched", file=sys.stderr)
+        return 2
+    cache = None if args.no_cache else PassCache(Path(args.cache), grammar_sha256(validator.GRAMMAR_PATH))
+
+    out = open(args.output, "w", encoding="utf-8") if args.output else sys.stdout
+    results: List[FlowResult] = []
+    try:
+        for result in iter_results(paths, workers=args.workers, cache=cache):
+            results.append(result)
+            if args.format == "jsonl":
+                out.write(json.dumps(result.to_dict()) + "\n")
+                out.flush()
+        if args.format == "junit":
+            write_junit(results, out)
+    finally:
+        if cache is not None:
+            cache.save()
+        if out is not sys.stdout:
+            out.close()
+
+    failed = sum(not r.ok for r in results)
+    cached = sum(r.cached for r in results)
+    print(
+        f"{len(results)} flows: {len(results) - failed} passed ({cached} cached), {failed} failed",
+        file=sys.stderr,
+    )
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,203 @@
+#!/usr/bin/env python3
+"""
+Validate generated Maestro flows against TestGen/maestro_grammar.lark.
+
+Building an LALR parser from the grammar costs tens of milliseconds. The
+parser is created once per process, lazily, from one of two backends:
+
+- standalone: maestro_parser.py, generated by build_parser.py, which embeds
+  the parse tables and Lark's runtime. Used when its recorded grammar hash
+  matches maestro_grammar.lark; lark itself is never imported.
+- runtime: Lark(grammar) with `cache=True`, so the analysed tables are
+  pickled to a cache file keyed by the grammar's hash and reloaded on later
+  cold starts. Used when the generated module is missing or stale.
+
+    from validator import validate, validate_many
+
+    result = validate(flow_text)
+    if not result.ok:
+        for err in result.errors:
+            print(err.line, err.column, err.message)
+
+Configuration (environment variables):
+    MAESTRO_STANDALONE_PARSER  "0" to always use the runtime backend
+    MAESTRO_GRAMMAR_CACHE      runtime backend cache file path, or "0" to disable
+                               (default: Lark's temp-dir cache)
+"""
+
+from __future__ import annotations
+
+import hashlib
+import os
+import threading
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, NamedTuple, Optional, Union
+
+GRAMMAR_PATH = Path(__file__).resolve().parent / "maestro_grammar.lark"
+
+
+class _Backend(NamedTuple):
+    """A parser plus the classes that go with it (each backend has its own)."""
+
+    name: str  # "standalone" | "runtime"
+    parser: Any
+    UnexpectedInput: type
+    UnexpectedToken: type
+    UnexpectedCharacters: type
+    UnexpectedEOF: type
+    Transformer: type
+
+
+_backend: Optional[_Backend] = None
+_backend_lock = threading.Lock()
+
+
+@dataclass
+class ValidationError:
+    """One syntax error, 1-based line/column like editors show."""
+
+    line: int
+    column: int
+    message: str
+    kind: str  # "unexpected_token" | "unexpected_character" | "unexpected_eof"
+    token: Optional[str] = None
+    expected: List[str] = field(default_factory=list)
+    context: str = ""
+
+
+@dataclass
+class ValidationResult:
+    ok: bool
+    errors: List[ValidationError] = field(default_factory=list)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"ok": self.ok, "errors": [asdict(e) for e in self.errors]}
+
+
+def _cache_option() -> Union[bool, str]:
+    value = os.getenv("MAESTRO_GRAMMAR_CACHE", "")
+    if value == "0":
+        return False
+    return value or True
+
+
+def _standalone_backend() -> Optional[_Backend]:
+    """The generated parser module, if present and built from the current grammar."""
+    if os.getenv("MAESTRO_STANDALONE_PARSER", "") == "0":
+        return None
+    try:
+        import maestro_parser
+    except ImportError:
+        return None
+    digest = hashlib.sha256(GRAMMAR_PATH.read_bytes()).hexdigest()
+    if getattr(maestro_parser, "GRAMMAR_SHA256", None) != digest:
+        return None
+    return _Backend(
+        "standalone",
+        maestro_parser.Lark_StandAlone(),
+        maestro_parser.UnexpectedInput,
+        maestro_parser.UnexpectedToken,
+        maestro_parser.UnexpectedCharacters,
+        maestro_parser.UnexpectedEOF,
+        maestro_parser.Transformer,
+    )
+
+
+def _runtime_backend() -> _Backend:
+    import lark
+
+    parser = lark.Lark(
+        GRAMMAR_PATH.read_text(),
+        start="start",
+        parser="lalr",
+        cache=_cache_option(),
+    )
+    return _Backend(
+        "runtime",
+        parser,
+        lark.UnexpectedInput,
+        lark.UnexpectedToken,
+        lark.UnexpectedCharacters,
+        lark.UnexpectedEOF,
+        lark.Transformer,
+    )
+
+
+def get_backend() -> _Backend:
+    """The process-wide parser backend, chosen and loaded on first use."""
+    global _backend
+    if _backend is None:
+        with _backend_lock:
+            if _backend is None:
+                _backend = _standalone_backend() or _runtime_backend()
+    return _backend
+
+
+def get_parser() -> Any:
+    """The process-wide LALR parser (a `lark.Lark` or its standalone twin)."""
+    return get_backend().parser
+
+
+def _describe_terminal(name: str) -> str:
+    """Show literal terminals ("MINUS", "__ANON_3") as their text, e.g. '"-"'."""
+    try:
+        pattern = get_parser().get_terminal(name).pattern
+    except KeyError:
+        return name
+    return f'"{pattern.value}"' if pattern.type == "str" else name
+
+
+def error_from(exc: Exception, text: str) -> ValidationError:
+    """Describe a backend parse exception raised on `text` as a ValidationError."""
+    backend = get_backend()
+    expected: List[str] = []
+    token: Optional[str] = None
+    if isinstance(exc, backend.UnexpectedToken):
+        kind = "unexpected_eof" if exc.token.type == "$END" else "unexpected_token"
+        token = None if kind == "unexpected_eof" else str(exc.token)
+        expected = sorted(_describe_terminal(t) for t in (exc.accepts or exc.expected))
+    elif isinstance(exc, backend.UnexpectedCharacters):
+        kind = "unexpected_character"
+        token = exc.char
+        expected = sorted(_describe_terminal(t) for t in (exc.allowed or ()))
+    elif isinstance(exc, backend.UnexpectedEOF):
+        kind = "unexpected_eof"
+        expected = sorted(_describe_terminal(t) for t in exc.expected)
+    else:
+        kind = "unexpected_input"
+
+    line = getattr(exc, "line", -1)
+    column = getattr(exc, "column", -1)
+    if line in (None, -1):
+        # Lark reports EOF without a position; point just past the last character
+        line = text.count("\n") + 1
+        column = len(text) - text.rfind("\n")
+    if kind == "unexpected_eof":
+        message = "Unexpected end of flow"
+    elif kind == "unexpected_character":
+        message = f"Unexpected character {token!r}"
+    else:
+        message = f"Unexpected token {token!r}"
+    if expected:
+        message += f"; expected one of: {', '.join(expected)}"
+    try:
+        context = exc.get_context(text)
+    except Exception:
+        context = ""
+    return ValidationError(line, column, message, kind, token, expected, context)
+
+
+def validate(text: str) -> ValidationResult:
+    """Parse one flow; never raises for invalid input."""
+    backend = get_backend()
+    try:
+        backend.parser.parse(text)
+    except backend.UnexpectedInput as exc:
+        return ValidationResult(False, [error_from(exc, text)])
+    return ValidationResult(True)
+
+
+def validate_many(texts: Iterable[str]) -> List[ValidationResult]:
+    """Validate several flows with the shared parser, in input order."""
+    return [validate(text) for text in texts]
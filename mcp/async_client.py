@@ -0,0 +1,240 @@
+#!/usr/bin/env python3
+"""
+Shared keep-alive HTTP client for MCP -> Node server calls.
+
+FastMCP runs `async def` tools on its event loop, so a tool waiting on a job
+holds a socket rather than a worker thread. `AsyncApiClient` wraps pooled
+`httpx.AsyncClient`s with per-endpoint timeouts and bounded retry with
+exponential backoff, and reports how often connections were actually reused.
+
+Configuration (environment variables):
+    MCP_HTTP_ASYNC_POOL_SIZE  max concurrent connections (default 512; long-polls
+                              each hold one, so this bounds concurrent waits)
+    MCP_HTTP_RETRIES          retry budget for connect errors / 502-504 (default 2)
+    MCP_HTTP_BACKOFF_SECONDS  backoff factor between retries (default 0.2)
+    MCP_HTTP_CONNECT_TIMEOUT  TCP connect timeout in seconds (default 3)
+"""
+
+from __future__ import annotations
+
+import asyncio
+import os
+from typing import Dict, List, Optional, Tuple
+
+import httpx
+
+# Read timeouts (seconds) per endpoint kind; callers cap these further with
+# MCP_API_TIMEOUT_SECONDS. "generate" stays short so test_modification returns
+# under Cursor's 20s tool cap.
+DEFAULT_ENDPOINT_TIMEOUTS: Dict[str, float] = {
+    "generate": 10,
+    "job": 8,
+    "default": 8,
+}
+
+RETRY_STATUSES = (502, 503, 504)
+
+# httpcore scans every pooled connection on each request/release, which turns
+# quadratic with hundreds of open long-polls. The pool is therefore split into
+# independent httpx clients of at most this many connections. Each request goes
+# to the shard with the fewest requests in flight (the first such shard on a
+# tie), so calls to one endpoint can use the whole pool while a lone caller
+# keeps reusing the first shard's idle connections.
+SHARD_CONNECTIONS = 16
+
+
+def _env_int(name: str, default: int) -> int:
+    try:
+        return int(os.getenv(name, str(default)))
+    except ValueError:
+        return default
+
+
+def _env_float(name: str, default: float) -> float:
+    try:
+        return float(os.getenv(name, str(default)))
+    except ValueError:
+        return default
+
+
+class AsyncApiClient:
+    """Pooled keep-alive httpx client bound lazily to the running event loop."""
+
+    def __init__(
+        self,
+        pool_size: Optional[int] = None,
+        retries: Optional[int] = None,
+        backoff_factor: Optional[float] = None,
+        connect_timeout: Optional[float] = None,
+        max_timeout: Optional[float] = None,
+        endpoint_timeouts: Optional[Dict[str, float]] = None,
+    ) -> None:
+        self.pool_size = max(1, pool_size if pool_size is not None else _env_int("MCP_HTTP_ASYNC_POOL_SIZE", 512))
+        self.retries = max(0, retries if retries is not None else _env_int("MCP_HTTP_RETRIES", 2))
+        self.backoff_factor = (
+            backoff_factor if backoff_factor is not None else _env_float("MCP_HTTP_BACKOFF_SECONDS", 0.2)
+        )
+        self.connect_timeout = (
+            connect_timeout if connect_timeout is not None else _env_float("MCP_HTTP_CONNECT_TIMEOUT", 3)
+        )
+        self.max_timeout = max_timeout
+        self.endpoint_timeouts = dict(DEFAULT_ENDPOINT_TIMEOUTS)
+        if endpoint_timeouts:
+            self.endpoint_timeouts.update(endpoint_timeouts)
+
+        self._clients: List[Optional[httpx.AsyncClient]] = []
+        self._in_flight: List[int] = []
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._calls = 0
+        self._errors = 0
+        self._requests_sent = 0
+        self._connections_opened = 0
+
+    def _get_client(self) -> Tuple[int, httpx.AsyncClient]:
+        """The least-loaded shard's index and client; the caller counts its request in _in_flight."""
+        # httpx connections belong to the loop that opened them; a new loop
+        # (e.g. successive asyncio.run calls in scripts) gets a fresh pool; the
+        # old one cannot be closed from here and is left to the GC.
+        loop = asyncio.get_running_loop()
+        if not self._clients or self._loop is not loop:
+            self._clients = [None] * -(-self.pool_size // SHARD_CONNECTIONS)
+            self._in_flight = [0] * len(self._clients)
+            self._loop = loop
+        index = min(range(len(self._clients)), key=self._in_flight.__getitem__)
+        client = self._clients[index]
+        if client is None:
+            # Shards are created on first use; building one loads a TLS context
+            per_shard = -(-self.pool_size // len(self._clients))
+            client = httpx.AsyncClient(
+                transport=httpx.AsyncHTTPTransport(
+                    retries=self.retries,
+                    limits=httpx.Limits(max_connections=per_shard, max_keepalive_connections=per_shard),
+                ),
+            )
+            self._clients[index] = client
+        return index, client
+
+    def timeout_for(self, endpoint: str) -> float:
+        read = self.endpoint_timeouts.get(endpoint, self.endpoint_timeouts["default"])
+        if self.max_timeout is not None:
+            read = min(read, self.max_timeout)
+        return read
+
+    async def _trace(self, event_name: str, info: dict) -> None:
+        if event_name == "connection.connect_tcp.complete":
+            self._connections_opened += 1
+        elif event_name == "http11.send_request_headers.started":
+            self._requests_sent += 1
+
+    async def request(
+        self,
+        method: str,
+        url: str,
+        endpoint: str = "default",
+        timeout: Optional[float] = None,
+        deadline: Optional[float] = None,
+        **kwargs,
+    ) -> httpx.Response:
+        """Send a request with bounded retries.
+
+        Connect failures are retried by the transport for every method; read
+        errors and 502-504 responses only for GET, so a POST that reached the
+        server is never repeated.
+
+        `deadline` (event loop time) bounds the whole call: each attempt's
+        timeouts are capped to the time left, retries stop at the deadline,
+        and a read timeout is never retried, since the server is holding the
+        request rather than failing it.
+        """
+        self._calls += 1
+        read = self.timeout_for(endpoint) if timeout is None else timeout
+        index, client = self._get_client()
+        in_flight = self._in_flight
+        in_flight[index] += 1
+        try:
+            return await self._send(client, method, url, read, deadline, **kwargs)
+        finally:
+            in_flight[index] -= 1  # the list of the pool the request used, even if the loop changed since
+
+    async def _send(
+        self,
+        client: httpx.AsyncClient,
+        method: str,
+        url: str,
+        read: float,
+        deadline: Optional[float],
+        **kwargs,
+    ) -> httpx.Response:
+        loop = asyncio.get_running_loop()
+        retryable = method.upper() in ("GET", "HEAD")
+        attempt = 0
+        last: Optional[httpx.Response] = None
+        while True:
+            limit = read
+            if deadline is not None:
+                left = deadline - loop.time()
+                if attempt and left <= 0:
+                    return last  # only reached after a retryable status; errors re-raise below
+                limit = max(0.001, min(read, left))
+            # Queueing for a pooled connection counts against the same budget
+            effective = httpx.Timeout(limit, connect=min(self.connect_timeout, limit), pool=limit)
+            try:
+                last = await client.request(
+                    method, url, timeout=effective, extensions={"trace": self._trace}, **kwargs
+                )
+                if not (retryable and last.status_code in RETRY_STATUSES and attempt < self.retries):
+                    return last
+            except httpx.ReadTimeout:
+                if not (retryable and attempt < self.retries and deadline is None):
+                    self._errors += 1
+                    raise
+            except (httpx.ReadError, httpx.RemoteProtocolError):
+                out_of_time = deadline is not None and deadline - loop.time() <= 0
+                if not (retryable and attempt < self.retries) or out_of_time:
+                    self._errors += 1
+                    raise
+            except Exception:
+                self._errors += 1
+                raise
+            attempt += 1
+            delay = self.backoff_factor * (2 ** (attempt - 1))
+            if deadline is not None:
+                delay = min(delay, max(0.0, deadline - loop.time()))
+            await asyncio.sleep(delay)
+
+    async def get(self, url: str, endpoint: str = "default", **kwargs) -> httpx.Response:
+        return await self.request("GET", url, endpoint=endpoint, **kwargs)
+
+    async def post(self, url: str, endpoint: str = "default", **kwargs) -> httpx.Response:
+        return await self.request("POST", url, endpoint=endpoint, **kwargs)
+
+    def stats(self) -> dict:
+        """Connection reuse counters."""
+        sent, opened = self._requests_sent, self._connections_opened
+        return {
+            "poolSize": self.pool_size,
+            "retries": self.retries,
+            "calls": self._calls,
+            "errors": self._errors,
+            "connectionsOpened": opened,
+            "requestsSent": sent,
+            "connectionsReused": max(0, sent - opened),
+            "reuseRatio": round(1 - opened / sent, 4) if sent else 0.0,
+        }
+
+    async def aclose(self) -> None:
+        clients, self._clients, self._in_flight, self._loop = self._clients, [], [], None
+        for client in clients:
+            if client is not None:
+                await client.aclose()
+
+
+_default_client: Optional[AsyncApiClient] = None
+
+
+def get_async_client(max_timeout: Optional[float] = None) -> AsyncApiClient:
+    """Return the process-wide AsyncApiClient, creating it on first use."""
+    global _default_client
+    if _default_client is None:
+        _default_client = AsyncApiClient(max_timeout=max_timeout)
+    return _default_client
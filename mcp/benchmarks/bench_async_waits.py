@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""
+Load benchmark: many concurrent check_status-style waits in one MCP process.
+
+Starts the in-process stub server, puts N jobs in "running", launches N
+concurrent `wait_job_step` calls on a single event loop, then finishes every
+job after --finish-after seconds. Reports how long the waits took to observe
+completion and how many HTTP requests/connections were used. All waits run
+as coroutines on one event loop thread.
+
+Usage:
+    python mcp/benchmarks/bench_async_waits.py [--waits 500] [--finish-after 3.0]
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import sys
+import threading
+import time
+from pathlib import Path
+
+MCP_DIR = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(MCP_DIR))
+sys.path.insert(0, str(MCP_DIR / "tests"))
+
+import server  # noqa: E402
+from async_client import AsyncApiClient  # noqa: E402
+from job_wait import AsyncJobWaiter  # noqa: E402
+from stub_server import start_stub, stop_stub  # noqa: E402
+
+
+async def run(waits: int, finish_after: float, api) -> dict:
+    ids = [f"job-{i}" for i in range(waits)]
+    for job_id in ids:
+        api.set_status(job_id, "running")
+
+    finished_at = {}
+
+    def finish_all() -> None:
+        time.sleep(finish_after)
+        finished_at["t"] = time.monotonic()
+        for job_id in ids:
+            api.set_status(job_id, "generated")
+
+    threading.Thread(target=finish_all, daemon=True).start()
+    start = time.monotonic()
+    results = await asyncio.gather(*(server.wait_job_step(job_id, 8) for job_id in ids))
+    end = time.monotonic()
+
+    done = sum(json.loads(r).get("job", {}).get("status") == "generated" for r in results)
+    return {
+        "waits": waits,
+        "completed": done,
+        "wall_seconds": round(end - start, 3),
+        "latency_after_finish_ms": round((end - finished_at["t"]) * 1000, 1),
+        "http": server.api_client.stats(),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--waits", type=int, default=500)
+    parser.add_argument("--finish-after", type=float, default=3.0)
+    args = parser.parse_args()
+
+    api = start_stub()
+    try:
+        client = AsyncApiClient(retries=0)
+        server.settings_store.load = lambda: {"apiBaseUrl": api.base_url}
+        server.api_client = client
+        server.job_waiter = AsyncJobWaiter(client, server.build_api_url, server.TERMINAL_JOB_STATES)
+        report = asyncio.run(run(args.waits, args.finish_after, api))
+    finally:
+        stop_stub(api)
+
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""
+give_feedback response size and latency: inline base64 vs file references.
+
+Writes --count full-resolution PNG screenshots (noisy content so they do not
+compress to nothing), then measures:
+
+  legacy:     the previous behaviour, base64 + data URL per image, indent=2
+  reference:  give_feedback default (path + sha256)
+  thumbnail:  give_feedback(screenshot_mode="thumbnail"), cold and warm cache
+  embed:      give_feedback(screenshot_mode="embed"), one data URL per image
+
+Usage:
+    python mcp/benchmarks/bench_feedback_screenshots.py [--count 10] [--width 1080] [--height 2400]
+"""
+
+from __future__ import annotations
+
+import argparse
+import base64
+import json
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+import screenshots  # noqa: E402
+import server  # noqa: E402
+from PIL import Image  # noqa: E402
+
+
+def legacy_feedback(paths: list) -> str:
+    processed = []
+    for path in paths:
+        data = Path(path).read_bytes()
+        b64 = base64.b64encode(data).decode("utf-8")
+        processed.append({
+            "path": path, "filename": Path(path).name, "base64": b64,
+            "data": f"data:image/png;base64,{b64}", "size": len(data), "exists": True,
+        })
+    return json.dumps({"status": "passed", "screenshots": processed}, indent=2)
+
+
+def timed(fn, *args, **kw) -> tuple:
+    start = time.perf_counter()
+    out = fn(*args, **kw)
+    return (time.perf_counter() - start) * 1000, len(out.encode("utf-8"))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--count", type=int, default=10)
+    parser.add_argument("--width", type=int, default=1080)
+    parser.add_argument("--height", type=int, default=2400)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        paths = []
+        for i in range(args.count):
+            path = Path(tmp) / f"shot-{i}.png"
+            noise = Image.frombytes("L", (args.width, args.height // 4), os.urandom(args.width * args.height // 4))
+            img = Image.new("RGB", (args.width, args.height), (240, 240, 240))
+            img.paste(noise, (0, i * 7))
+            img.save(path)
+            paths.append(str(path))
+        screenshots.THUMBNAIL_DIR = Path(tmp) / "thumbs"
+        total = sum(Path(p).stat().st_size for p in paths)
+
+        rows = [("legacy (base64 x2, indent=2)", *timed(legacy_feedback, paths))]
+        rows.append(("reference (cold hash)", *timed(server.give_feedback, "Flow Passed", paths, "req")))
+        rows.append(("reference (warm)", *timed(server.give_feedback, "Flow Passed", paths, "req")))
+        for label in ("thumbnail (cold)", "thumbnail (warm)"):
+            rows.append((label, *timed(server.give_feedback, "Flow Passed", paths, "req", screenshot_mode="thumbnail")))
+        rows.append(("embed (single data URL)", *timed(
+            server.give_feedback, "Flow Passed", paths, "req", screenshot_mode="embed")))
+
+    print(f"{args.count} screenshots, {total / 2**20:.1f} MiB on disk")
+    print(f"{'mode':<30} {'ms':>9} {'response bytes':>16}")
+    for label, ms, size in rows:
+        print(f"{label:<30} {ms:>9.1f} {size:>16,}")
+
+
+if __name__ == "__main__":
+    main()
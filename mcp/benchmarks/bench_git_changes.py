@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""
+Per-file git fan-out vs single-pass change collection on a synthetic repo.
+
+Creates a temporary repository with --files committed files, modifies every
+one of them (plus --untracked new files), then times:
+
+  legacy:  git diff --name-only HEAD + git ls-files --others, then
+           git ls-files --error-unmatch + git diff HEAD -- <file> per file
+  current: server.per_file_diffs() (git status + one git diff HEAD)
+  cached:  server.per_file_diffs() again on the unchanged tree (diff cache hits)
+
+Usage:
+    python mcp/benchmarks/bench_git_changes.py [--files 2000] [--untracked 200]
+"""
+
+from __future__ import annotations
+
+import argparse
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+import server  # noqa: E402
+from git_changes import collect_changes  # noqa: E402
+
+
+def git(repo: Path, *args: str) -> None:
+    subprocess.run(
+        ["git", "-C", str(repo), "-c", "user.email=bench@example.com", "-c", "user.name=bench", *args],
+        check=True,
+        capture_output=True,
+    )
+
+
+def build_repo(root: Path, files: int, untracked: int) -> None:
+    git(root, "init", "-q")
+    for i in range(files):
+        d = root / f"pkg{i % 50}"
+        d.mkdir(exist_ok=True)
+        (d / f"mod{i}.py").write_text("".join(f"line {j}\n" for j in range(40)))
+    git(root, "add", ".")
+    git(root, "commit", "-qm", "init")
+    for i in range(files):
+        path = root / f"pkg{i % 50}" / f"mod{i}.py"
+        path.write_text(path.read_text().replace("line 20\n", "changed 20\n"))
+    for i in range(untracked):
+        (root / f"new{i}.py").write_text("print('new')\n" * 20)
+
+
+def legacy_per_file_diffs(repo: Path) -> dict:
+    names = server.run_git_command(repo, ["diff", "--name-only", "HEAD"]).splitlines()
+    paths = {repo / n for n in names if n} | set(server.list_untracked_files(repo))
+    out = {}
+    for path in sorted(paths):
+        rel = path.relative_to(repo)
+        tracked = server.run_git_command(repo, ["ls-files", "--error-unmatch", str(rel)]) != ""
+        if not tracked:
+            out[path] = server.unified_diff_for_new_file(repo, path)
+        else:
+            out[path] = server.run_git_command(repo, ["diff", "--no-ext-diff", "HEAD", "--", str(rel)])
+    return out
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--files", type=int, default=2000)
+    parser.add_argument("--untracked", type=int, default=200)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        repo = Path(tmp)
+        build_repo(repo, args.files, args.untracked)
+
+        start = time.perf_counter()
+        legacy = legacy_per_file_diffs(repo)
+        legacy_s = time.perf_counter() - start
+
+        start = time.perf_counter()
+        current = server.per_file_diffs(repo)
+        current_s = time.perf_counter() - start
+
+        start = time.perf_counter()
+        cached = server.per_file_diffs(repo)
+        cached_s = time.perf_counter() - start
+
+        invocations = collect_changes(repo).git_invocations
+        assert legacy == current == cached, "single-pass diffs differ from per-file git diffs"
+
+    print(f"changed files:  {len(current)} ({args.files} modified, {args.untracked} untracked)")
+    print(f"legacy:         {legacy_s:8.2f} s  (~{2 * len(current) + 2} git processes)")
+    print(f"single-pass:    {current_s:8.2f} s  ({invocations} git processes)")
+    print(f"speedup:        {legacy_s / current_s:8.1f}x")
+    print(f"cached repeat:  {cached_s:8.2f} s  (1 git process; {server.diff_cache.stats()})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+"""
+give_feedback log handling: split-based scan + raw_logs echo vs streaming analyzer.
+
+Generates a Maestro-style debug log of --mb MiB and compares time, peak
+traced memory and the size of the `logs_analysis` section of the reply.
+
+Usage:
+    python mcp/benchmarks/bench_log_analysis.py [--mb 20]
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from log_analysis import analyze_logs  # noqa: E402
+
+
+def legacy(logs: str) -> str:
+    failed = "Flow Failed" in logs or "[Failed]" in logs or "Error" in logs
+    details = []
+    if failed:
+        details = [l for l in logs.split("\n") if "error" in l.lower() or "failed" in l.lower()][:3]
+    return json.dumps({
+        "total_lines": len(logs.split("\n")),
+        "contains_errors": bool(details),
+        "error_details": details,
+        "raw_logs": logs,
+    })
+
+
+def measure(fn, *args, **kw) -> tuple:
+    tracemalloc.start()
+    start = time.perf_counter()
+    out = fn(*args, **kw)
+    elapsed = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return elapsed, peak, len(out)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--mb", type=int, default=20)
+    args = parser.parse_args()
+
+    block = "".join(
+        f"[DEBUG] 12:00:{i % 60:02d} dadb: shell,v2,raw:dumpsys window | grep mCurrentFocus ({i})\n"
+        for i in range(200)
+    ) + 'Assert that "Welcome" is visible... FAILED\n'
+    logs = block * max(1, args.mb * 2**20 // len(block)) + "[Failed] login\n"
+
+    rows = [
+        ("legacy (string)", *measure(legacy, logs)),
+        ("streaming (string)", *measure(lambda s: json.dumps(analyze_logs(s).result()), logs)),
+    ]
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "maestro.log"
+        path.write_text(logs)
+        del logs
+        rows.append(("streaming (file)", *measure(
+            lambda p: json.dumps(analyze_logs(p, from_file=True).result()), path)))
+
+    print(f"{'mode':<20} {'seconds':>8} {'peak MiB':>10} {'reply bytes':>13}")
+    for label, secs, peak, size in rows:
+        print(f"{label:<20} {secs:>8.2f} {peak / 2**20:>10.1f} {size:>13,}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+"""
+Per-call overhead of reading MCP settings: uncached read+parse vs SettingsStore.
+
+Usage:
+    python mcp/benchmarks/bench_settings.py [--calls 20000]
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from settings_store import SettingsStore  # noqa: E402
+
+
+def uncached_load(path: Path) -> dict:
+    """The pre-cache implementation of load_settings()."""
+    try:
+        if path.exists():
+            return json.loads(path.read_text(encoding="utf-8"))
+    except Exception:
+        pass
+    return {"copperEnabled": False, "apiBaseUrl": "http://localhost:5055"}
+
+
+def time_per_call(fn, calls: int) -> float:
+    start = time.perf_counter()
+    for _ in range(calls):
+        fn()
+    return (time.perf_counter() - start) / calls
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--calls", type=int, default=20000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "config.json"
+        path.write_text(
+            json.dumps({"copperEnabled": True, "apiBaseUrl": "http://localhost:5055"}, indent=2),
+            encoding="utf-8",
+        )
+        store = SettingsStore(path)
+
+        before = time_per_call(lambda: uncached_load(path), args.calls)
+        after = time_per_call(store.load, args.calls)
+
+    print(f"calls:             {args.calls}")
+    print(f"uncached load:     {before * 1e6:8.2f} us/call")
+    print(f"SettingsStore.load:{after * 1e6:8.2f} us/call")
+    print(f"speedup:           {before / after:8.1f}x  (reloads: {store.reloads})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+"""
+Peak memory and time of untracked-file diffs as the file grows.
+
+For each --sizes (MiB) a text file is written and diffed two ways:
+
+  legacy:    read_text() + difflib.unified_diff over the whole file
+  streaming: untracked_diff.iter_new_file_diff with the default per-file budget
+
+Peak memory is measured with tracemalloc; the streaming column should stay
+flat while the legacy one grows with the file.
+
+Usage:
+    python mcp/benchmarks/bench_untracked_diff.py [--sizes 1 8 32]
+"""
+
+from __future__ import annotations
+
+import argparse
+import difflib
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from untracked_diff import MAX_FILE_BYTES, iter_new_file_diff  # noqa: E402
+
+
+def legacy_diff(repo: Path, path: Path) -> str:
+    new_lines = path.read_text(encoding="utf-8", errors="ignore").splitlines(keepends=True)
+    rel = path.relative_to(repo)
+    header = f"diff --git a/{rel} b/{rel}\nnew file mode 100644\nindex 0000000..0000000\n"
+    body = difflib.unified_diff([], new_lines, fromfile="/dev/null", tofile=f"b/{rel}", lineterm="")
+    return header + "\n".join(body) + ("\n" if new_lines else "")
+
+
+def streaming_diff(repo: Path, path: Path) -> int:
+    return sum(len(chunk) for chunk in iter_new_file_diff(repo, path))
+
+
+def measure(fn, *args) -> tuple:
+    tracemalloc.start()
+    start = time.perf_counter()
+    fn(*args)
+    elapsed = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return elapsed, peak
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1, 8, 32])
+    args = parser.parse_args()
+
+    print(f"per-file budget: {MAX_FILE_BYTES} bytes")
+    print(f"{'size':>8} {'legacy s':>10} {'legacy peak':>13} {'stream s':>10} {'stream peak':>13}")
+    with tempfile.TemporaryDirectory() as tmp:
+        repo = Path(tmp)
+        line = "2024-01-01T00:00:00 INFO worker heartbeat ok " + "x" * 50 + "\n"
+        for size_mb in args.sizes:
+            path = repo / f"app-{size_mb}.log"
+            with open(path, "w") as fh:
+                for _ in range(size_mb * 1024 * 1024 // len(line)):
+                    fh.write(line)
+            legacy_s, legacy_peak = measure(legacy_diff, repo, path)
+            stream_s, stream_peak = measure(streaming_diff, repo, path)
+            print(
+                f"{size_mb:>6}MB {legacy_s:>10.3f} {legacy_peak / 2**20:>10.1f} MB"
+                f" {stream_s:>10.3f} {stream_peak / 2**20:>10.2f} MB"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""
+Byte-bounded LRU cache for per-file diffs.
+
+Agents call the diff helpers repeatedly on a working tree that has barely
+changed. Entries are keyed by what a file's diff actually depends on:
+
+    (HEAD sha, path, mtime_ns, size, blob hash)
+
+where the blob hash is the index blob `git status --porcelain=v2` reports for
+tracked files (so staging invalidates) and mtime_ns/size detect worktree
+edits. A repeated call recomputes only the files whose key changed. As with
+git's own stat cache, an edit that keeps both size and nanosecond mtime
+unchanged goes unnoticed.
+
+Configuration (environment variables):
+    MCP_DIFF_CACHE_BYTES   total size of cached diffs before LRU eviction (default 32 MiB)
+"""
+
+from __future__ import annotations
+
+import os
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, Hashable, Optional, Tuple
+
+DiffKey = Tuple[str, str, Optional[int], Optional[int], str]
+
+
+def _env_bytes(name: str, default: int) -> int:
+    try:
+        return max(0, int(os.getenv(name, str(default))))
+    except ValueError:
+        return default
+
+
+DEFAULT_MAX_BYTES = _env_bytes("MCP_DIFF_CACHE_BYTES", 32 * 1024 * 1024)
+
+
+def file_key(repo_root: Path, rel_path: str, head: str = "", blob: str = "") -> DiffKey:
+    """Cache key for `rel_path`; mtime/size are None when the file is gone from the worktree."""
+    try:
+        st = os.lstat(repo_root / rel_path)
+    except OSError:
+        return (head, rel_path, None, None, blob)
+    return (head, rel_path, st.st_mtime_ns, st.st_size, blob)
+
+
+class DiffCache:
+    """Thread-safe LRU mapping of hashable keys to values with caller-supplied sizes."""
+
+    def __init__(self, max_bytes: Optional[int] = None) -> None:
+        self.max_bytes = DEFAULT_MAX_BYTES if max_bytes is None else max(0, max_bytes)
+        self._entries: "OrderedDict[Hashable, Tuple[Any, int]]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def put(self, key: Hashable, value: Any, size: int) -> None:
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._bytes -= old[1]
+            self._entries[key] = (value, size)
+            self._bytes += size
+            while self._bytes > self.max_bytes:
+                _, (_, evicted) = self._entries.popitem(last=False)
+                self._bytes -= evicted
+                self.evictions += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "maxBytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hitRatio": round(self.hits / lookups, 3) if lookups else 0.0,
+            }
@@ -0,0 +1,277 @@
+#!/usr/bin/env python3
+"""
+Collect a working tree's change set from a fixed number of git invocations.
+
+The per-file helpers in server.py ask git one question per process:
+`per_file_diff` runs `git ls-files --error-unmatch` plus `git diff` for every
+file, so 300 changed files cost ~600 process launches. `collect_changes`
+instead runs exactly two commands regardless of change count:
+
+    git status --porcelain=v2 -z --branch --untracked-files=all   # names, HEAD sha
+    git diff --no-ext-diff HEAD                                   # one patch for everything
+
+and splits the patch into per-file sections in Python. Given a DiffCache,
+only files whose key changed since the last call are passed to `git diff`.
+"""
+
+from __future__ import annotations
+
+import codecs
+import subprocess
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from diff_cache import DiffCache, DiffKey, file_key
+
+# `git hash-object -t tree /dev/null`; diff base for repositories without commits
+EMPTY_TREE_SHA = "4b825dc642cb6eb9a060e54bf8d69288fbee4904"
+
+STATUS_ARGS = ["status", "--porcelain=v2", "-z", "--branch", "--untracked-files=all"]
+# No quoting of non-ASCII names, no colour, rename detection like `git diff` defaults
+DIFF_CONFIG = ["-c", "core.quotepath=off", "-c", "color.diff=false", "-c", "diff.renames=true"]
+# Above this many cache misses, diff the whole tree rather than pass a long pathspec
+MAX_PATHSPEC = 500
+
+
+@dataclass
+class FileChange:
+    """One entry of `git status --porcelain=v2` (paths are repository-relative, '/'-separated)."""
+
+    path: str
+    status: str  # XY code, e.g. ".M", "A.", "R." ; "??" for untracked
+    tracked: bool
+    orig_path: Optional[str] = None  # rename/copy source
+    blob: str = ""  # index blob sha(s) from the status record; "" for untracked
+
+
+@dataclass
+class ChangeSet:
+    """Changed files and their patches relative to HEAD."""
+
+    repo_root: Path
+    changes: Dict[str, FileChange] = field(default_factory=dict)
+    # Tracked-file patch sections keyed by repository-relative path
+    patches: Dict[str, str] = field(default_factory=dict)
+    git_invocations: int = 0
+    # HEAD commit sha; None on an unborn branch
+    head: Optional[str] = None
+
+    @property
+    def tracked(self) -> List[str]:
+        return sorted(p for p, c in self.changes.items() if c.tracked)
+
+    @property
+    def untracked(self) -> List[str]:
+        return sorted(p for p, c in self.changes.items() if not c.tracked)
+
+    def paths(self) -> List[Path]:
+        """Absolute paths of every changed file (tracked and untracked), sorted."""
+        return sorted(self.repo_root / p for p in self.changes)
+
+    def is_tracked(self, rel_path: str) -> bool:
+        change = self.changes.get(rel_path)
+        return change is not None and change.tracked
+
+    def patch_for(self, rel_path: str) -> str:
+        """`git diff HEAD -- <path>` equivalent for a tracked file ('' if unchanged)."""
+        return self.patches.get(rel_path, "")
+
+
+def parse_status_v2(raw: str) -> Dict[str, FileChange]:
+    """Parse NUL-separated `git status --porcelain=v2 -z` output."""
+    changes: Dict[str, FileChange] = {}
+    records = raw.split("\0")
+    i = 0
+    while i < len(records):
+        record = records[i]
+        i += 1
+        if not record:
+            continue
+        kind = record[0]
+        if kind == "1":
+            # 1 XY sub mH mI mW hH hI path
+            parts = record.split(" ", 8)
+            changes[parts[8]] = FileChange(parts[8], parts[1], True, blob=parts[7])
+        elif kind == "2":
+            # 2 XY sub mH mI mW hH hI Xscore path \0 origPath
+            parts = record.split(" ", 9)
+            orig = records[i] if i < len(records) else None
+            i += 1
+            changes[parts[9]] = FileChange(parts[9], parts[1], True, orig_path=orig, blob=parts[7])
+        elif kind == "u":
+            # u XY sub m1 m2 m3 mW h1 h2 h3 path
+            parts = record.split(" ", 10)
+            changes[parts[10]] = FileChange(parts[10], parts[1], True, blob=" ".join(parts[7:10]))
+        elif kind == "?":
+            path = record[2:]
+            changes[path] = FileChange(path, "??", False)
+        # "!" (ignored) and "#" (headers) are not requested / not relevant
+    return changes
+
+
+def parse_branch_oid(raw: str) -> Optional[str]:
+    """HEAD sha from the `# branch.oid` header of `git status --branch` (None if unborn)."""
+    for record in raw.split("\0"):
+        if record.startswith("# branch.oid "):
+            oid = record[len("# branch.oid "):]
+            return None if oid == "(initial)" else oid
+        if record and record[0] != "#":
+            break
+    return None
+
+
+def _unquote(token: str) -> str:
+    """Undo git's C-style path quoting ("a/t\\tx.txt" -> a/t<TAB>x.txt)."""
+    if len(token) >= 2 and token[0] == token[-1] == '"':
+        raw = codecs.escape_decode(token[1:-1].encode("utf-8"))[0]
+        return raw.decode("utf-8", errors="surrogateescape")
+    return token
+
+
+def _header_path(header: str) -> Optional[str]:
+    """Best-effort b/ path from a `diff --git` line whose names were not predicted."""
+    rest = header[len("diff --git "):].rstrip("\n")
+    if rest.endswith('"'):
+        start = rest.rfind(' "b/')
+        if start != -1:
+            return _unquote(rest[start + 1:])[2:]
+    idx = rest.rfind(" b/")
+    return rest[idx + 3:] if idx != -1 else None
+
+
+def split_patch(patch: str, changes: Dict[str, FileChange]) -> Dict[str, str]:
+    """Split a multi-file `git diff` into sections keyed by (new) path.
+
+    Header lines are matched against the names `git status` reported, which
+    sidesteps the ambiguity of unquoted paths containing spaces.
+    """
+    expected: Dict[str, str] = {}
+    for change in changes.values():
+        if not change.tracked:
+            continue
+        src = change.orig_path or change.path
+        expected[f"diff --git a/{src} b/{change.path}"] = change.path
+        expected[f"diff --git a/{change.path} b/{change.path}"] = change.path
+
+    sections: Dict[str, str] = {}
+    current: Optional[str] = None
+    buf: List[str] = []
+
+    def flush() -> None:
+        if current is not None:
+            sections[current] = sections.get(current, "") + "".join(buf)
+
+    for line in patch.splitlines(keepends=True):
+        if line.startswith("diff --git "):
+            flush()
+            buf = []
+            header = line.rstrip("\n")
+            current = expected.get(header) or _header_path(header)
+        buf.append(line)
+    flush()
+    return sections
+
+
+def _run(repo_root: Path, args: List[str]) -> Tuple[int, str]:
+    try:
+        result = subprocess.run(
+            ["git", "-C", str(repo_root), *args],
+            check=False,
+            capture_output=True,
+        )
+    except Exception:
+        return 1, ""
+    return result.returncode, result.stdout.decode("utf-8", errors="surrogateescape")
+
+
+def _diff_args(base: str, paths: Optional[List[str]] = None) -> List[str]:
+    if paths is None:
+        return [*DIFF_CONFIG, "diff", "--no-ext-diff", base]
+    return ["--literal-pathspecs", *DIFF_CONFIG, "diff", "--no-ext-diff", base, "--", *paths]
+
+
+def _patch_key(changes: ChangeSet, change: FileChange) -> Tuple[DiffKey, Optional[str]]:
+    # A rename's patch also depends on its source path
+    return file_key(changes.repo_root, change.path, changes.head or "", change.blob), change.orig_path
+
+
+def _cached_patches(changes: ChangeSet, cache: DiffCache) -> Dict[str, Tuple[DiffKey, Optional[str]]]:
+    """Fill patches from the cache; return the keys of tracked files that missed.
+
+    Keys are taken before git runs so that an edit racing the diff is stored
+    under the older stat and recomputed on the next call.
+    """
+    misses: Dict[str, Tuple[DiffKey, Optional[str]]] = {}
+    for change in changes.changes.values():
+        if not change.tracked:
+            continue
+        key = _patch_key(changes, change)
+        patch = cache.get(key)
+        if patch is None:
+            misses[change.path] = key
+        else:
+            changes.patches[change.path] = patch
+    return misses
+
+
+def _miss_pathspec(changes: ChangeSet, misses: Dict[str, Tuple[DiffKey, Optional[str]]]) -> Optional[List[str]]:
+    paths: List[str] = []
+    for path in misses:
+        paths.append(path)
+        orig = changes.changes[path].orig_path
+        if orig:
+            paths.append(orig)
+    return None if len(paths) > MAX_PATHSPEC else paths
+
+
+def _store_patches(
+    changes: ChangeSet,
+    cache: DiffCache,
+    misses: Dict[str, Tuple[DiffKey, Optional[str]]],
+    patch: str,
+) -> None:
+    sections = split_patch(patch, changes.changes)
+    for path, key in misses.items():
+        section = sections.get(path, "")
+        changes.patches[path] = section
+        cache.put(key, section, len(section))
+
+
+def collect_changes(repo_root: Path, cache: Optional[DiffCache] = None) -> ChangeSet:
+    """Gather status and per-file patches with two git processes (three on an unborn HEAD).
+
+    With a `cache`, only files whose (HEAD, path, mtime, size, blob) key missed are
+    diffed; when every file hits, `git status` is the only process started.
+    """
+    changes = ChangeSet(repo_root)
+    code, status_raw = _run(repo_root, STATUS_ARGS)
+    changes.git_invocations += 1
+    if code != 0:
+        return changes
+    changes.changes = parse_status_v2(status_raw)
+    changes.head = parse_branch_oid(status_raw)
+    if not any(c.tracked for c in changes.changes.values()):
+        return changes
+
+    if cache is not None and changes.head:
+        misses = _cached_patches(changes, cache)
+        if not misses:
+            return changes
+        pathspec = _miss_pathspec(changes, misses)
+        code, patch = _run(repo_root, _diff_args(changes.head, pathspec))
+        changes.git_invocations += 1
+        if code == 0:
+            _store_patches(changes, cache, misses, patch)
+        return changes
+
+    code, patch = _run(repo_root, _diff_args("HEAD"))
+    changes.git_invocations += 1
+    if code != 0:
+        # No commits yet: everything staged is new relative to the empty tree
+        code, patch = _run(repo_root, _diff_args(EMPTY_TREE_SHA))
+        changes.git_invocations += 1
+    if code == 0:
+        changes.patches = split_patch(patch, changes.changes)
+    return changes
+
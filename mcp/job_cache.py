@@ -0,0 +1,213 @@
+#!/usr/bin/env python3
+"""
+TTL + LRU cache of test_modification jobs, keyed by what the job depends on.
+
+Agents and retries often submit the same modification again a minute later,
+and every submission costs a full generation and Maestro run. The key is a
+sha256 over the normalized payload:
+
+    API base URL, user message,
+    sorted (path, sha256 of diff bytes) of the modified files,
+    sorted (path, sha256 of file content) of the related files
+
+so the order files are listed in does not matter, while an edit to a related
+file does. A repeated submission within the TTL gets the earlier job id back
+without a POST, together with the job's result once it has finished. Job
+results are picked up from the status tools (get_job_status, check_status,
+...) as they pass through. Failed jobs and jobs the server no longer knows
+are dropped, so a retry after a flaky run starts a new job.
+
+With the cache turned off, finished jobs are dropped rather than kept, but
+jobs still running are: an identical submission attaches to the running
+job instead of starting a second one.
+
+Configuration (environment variables):
+    MCP_JOB_CACHE               set to 0 to reuse only jobs still running
+    MCP_JOB_CACHE_TTL_SECONDS   how long a submission is reused (default 900)
+    MCP_JOB_CACHE_ENTRIES       jobs kept before LRU eviction (default 256)
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, Optional
+
+from diff_cache import DiffCache, file_key
+
+FINGERPRINT_VERSION = 1
+# Terminal states whose result is reused; "failed" is left out so a retry reruns
+REUSABLE_STATES = frozenset({"generated", "passed"})
+
+
+def _env_number(name: str, default: float) -> float:
+    try:
+        return max(0.0, float(os.getenv(name, str(default))))
+    except ValueError:
+        return default
+
+
+ENABLED = os.getenv("MCP_JOB_CACHE", "1") != "0"
+DEFAULT_TTL_SECONDS = _env_number("MCP_JOB_CACHE_TTL_SECONDS", 900)
+DEFAULT_MAX_ENTRIES = int(_env_number("MCP_JOB_CACHE_ENTRIES", 256))
+
+
+def _sha256(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
+def content_hash(path: Path, cache: Optional[DiffCache] = None) -> Optional[str]:
+    """sha256 of a file's content, or None if it cannot be read.
+
+    With `cache`, digests are memoized under the file's (path, mtime_ns,
+    size) key, so unchanged related files are not re-read on every call.
+    """
+    key = file_key(Path("/"), str(path), head="content-sha256")
+    if cache is not None and key[2] is not None:
+        digest = cache.get(key)
+        if digest is not None:
+            return digest
+    try:
+        h = hashlib.sha256()
+        with open(path, "rb") as fh:
+            for chunk in iter(lambda: fh.read(1 << 20), b""):
+                h.update(chunk)
+    except OSError:
+        return None
+    digest = h.hexdigest()
+    if cache is not None and key[2] is not None:
+        cache.put(key, digest, len(digest) + len(key[1]))
+    return digest
+
+
+def payload_fingerprint(
+    user_message: str,
+    modified_files: Iterable[Dict[str, Any]],
+    related_files: Iterable[str],
+    base_url: str = "",
+    cache: Optional[DiffCache] = None,
+) -> str:
+    """Stable key for a test_modification payload (absolute paths, as sent to the server)."""
+    modified = []
+    for entry in modified_files:
+        diff = entry.get("diff", "")
+        if isinstance(diff, str):
+            raw = diff.encode("utf-8", "surrogatepass")
+        else:
+            raw = json.dumps(diff, sort_keys=True).encode()
+        modified.append([entry["path"], _sha256(raw)])
+    related = [[path, content_hash(Path(path), cache)] for path in related_files]
+    normalized = {
+        "version": FINGERPRINT_VERSION,
+        "api": base_url,
+        "message": user_message,
+        "modified": sorted(modified),
+        "related": sorted(related, key=lambda r: (r[0], r[1] or "")),
+    }
+    return _sha256(json.dumps(normalized, sort_keys=True, separators=(",", ":")).encode())
+
+
+@dataclass
+class CachedJob:
+    job_id: str
+    submitted_at: float
+    job: Optional[Dict[str, Any]] = None  # the finished job, once a status tool has seen it
+
+    def to_dict(self, now: float) -> Dict[str, Any]:
+        return {
+            "jobId": self.job_id,
+            "ageSeconds": round(now - self.submitted_at, 1),
+            "finished": self.job is not None,
+        }
+
+
+class JobCache:
+    """Thread-safe fingerprint -> CachedJob map with a TTL and an entry bound."""
+
+    def __init__(
+        self,
+        ttl_seconds: Optional[float] = None,
+        max_entries: Optional[int] = None,
+        enabled: Optional[bool] = None,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.ttl_seconds = DEFAULT_TTL_SECONDS if ttl_seconds is None else max(0.0, ttl_seconds)
+        self.max_entries = DEFAULT_MAX_ENTRIES if max_entries is None else max(0, max_entries)
+        self.enabled = ENABLED if enabled is None else enabled
+        self.clock = clock
+        self._entries: "OrderedDict[str, CachedJob]" = OrderedDict()
+        self._keys_by_job: Dict[str, str] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def _drop(self, key: str) -> None:
+        entry = self._entries.pop(key, None)
+        if entry is not None and self._keys_by_job.get(entry.job_id) == key:
+            del self._keys_by_job[entry.job_id]
+
+    def get(self, key: str) -> Optional[CachedJob]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and self.clock() - entry.submitted_at > self.ttl_seconds:
+                self._drop(key)
+                self.evictions += 1
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry
+
+    def put(self, key: str, job_id: str) -> None:
+        if not self.max_entries or not job_id:
+            return
+        with self._lock:
+            self._drop(key)
+            self._entries[key] = CachedJob(job_id, self.clock())
+            self._keys_by_job[job_id] = key
+            while len(self._entries) > self.max_entries:
+                self._drop(next(iter(self._entries)))
+                self.evictions += 1
+
+    def record(self, response: Optional[dict]) -> None:
+        """Note a status response: keep a reusable result, forget failed or unknown jobs. Never raises."""
+        job = (response or {}).get("job")
+        if not isinstance(job, dict) or not job.get("id"):
+            return
+        with self._lock:
+            key = self._keys_by_job.get(str(job["id"]))
+            if key is None:
+                return
+            status = job.get("status")
+            if response.get("status") == 404 or status == "failed" or (status in REUSABLE_STATES and not self.enabled):
+                self._drop(key)
+            elif status in REUSABLE_STATES:
+                self._entries[key].job = job
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._keys_by_job.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "enabled": self.enabled,
+                "entries": len(self._entries),
+                "maxEntries": self.max_entries,
+                "ttlSeconds": self.ttl_seconds,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hitRatio": round(self.hits / lookups, 3) if lookups else 0.0,
+            }
@@ -0,0 +1,209 @@
+#!/usr/bin/env python3
+"""
+Wait for job state changes with one long-poll request instead of 1s polling.
+
+The Node server exposes `GET /api/job/:id/wait?status=<seen>&timeoutMs=<n>`,
+which holds the request until the job leaves `<seen>` or the timeout passes.
+`AsyncJobWaiter.wait` uses it when available and returns within milliseconds of a
+state change. Servers without the route (an Express "Cannot GET" 404) are
+remembered per base URL and handled with adaptive exponential polling instead.
+"""
+
+from __future__ import annotations
+
+import asyncio
+from typing import Callable, Dict, Iterable, List, Optional
+
+# Longest single hold the server grants (MAX_WAIT_MS in server/src/index.ts)
+MAX_LONG_POLL_SECONDS = 25.0
+# Extra read-timeout slack on top of the requested hold time
+LONG_POLL_GRACE_SECONDS = 2.0
+
+WAIT_MODES = ("any", "all")
+
+
+class PollBackoff:
+    """Exponential polling intervals for servers without the long-poll route.
+
+    Starts short so a job that finishes quickly is seen quickly, and grows
+    towards `maximum` while nothing changes. `reset()` after a state change.
+    """
+
+    def __init__(self, initial: float = 0.1, factor: float = 2.0, maximum: float = 2.0) -> None:
+        self.initial = initial
+        self.factor = factor
+        self.maximum = maximum
+        self.current = initial
+
+    def next_delay(self) -> float:
+        delay = self.current
+        self.current = min(self.maximum, self.current * self.factor)
+        return delay
+
+    def reset(self) -> None:
+        self.current = self.initial
+
+
+def job_state(response: Optional[dict]) -> Optional[str]:
+    job = (response or {}).get("job")
+    return job.get("status") if isinstance(job, dict) else None
+
+
+def describe_error(exc: BaseException) -> str:
+    """An exception's message, or its type when the message is empty (httpx timeouts)."""
+    return str(exc) or type(exc).__name__
+
+
+def wrap_response(resp) -> dict:
+    """Shape a job HTTP response as the {ok, status, job} dict the tools return."""
+    try:
+        data = resp.json()
+    except Exception:
+        data = {"text": resp.text[:500]}
+    return {
+        "ok": resp.status_code < 400,
+        "status": resp.status_code,
+        "job": data,
+    }
+
+
+def is_missing_route(status_code: int, data) -> bool:
+    """True if a 404 came from a server without the wait route, not an unknown job."""
+    return status_code == 404 and not (isinstance(data, dict) and "id" in data)
+
+
+class AsyncJobWaiter:
+    """Blocks until a job changes state, preferring server long-poll, over an AsyncApiClient.
+
+    Waiting costs one pending coroutine and one held socket per job, so a
+    single process can serve hundreds of concurrent waits.
+    """
+
+    def __init__(
+        self,
+        client,
+        build_url: Callable[[str], str],
+        terminal_states: Iterable[str],
+        backoff_factory: Callable[[], PollBackoff] = PollBackoff,
+    ) -> None:
+        self.client = client
+        self.build_url = build_url
+        self.terminal_states = frozenset(terminal_states)
+        self.backoff_factory = backoff_factory
+        # base URL -> whether /api/job/:id/wait exists there
+        self._long_poll_support: Dict[str, bool] = {}
+
+    async def fetch(self, job_id: str, deadline: Optional[float] = None) -> dict:
+        """GET /api/job/{job_id}, finishing by `deadline` (loop time) if given; never raises."""
+        try:
+            resp = await self.client.get(self.build_url(f"/api/job/{job_id}"), endpoint="job", deadline=deadline)
+            return wrap_response(resp)
+        except Exception as exc:
+            return {"ok": False, "error": f"failed to get status: {describe_error(exc)}"}
+
+    def long_poll_supported(self) -> Optional[bool]:
+        return self._long_poll_support.get(self.build_url("/"))
+
+    async def _long_poll(
+        self, job_id: str, seen: Optional[str], hold_seconds: float, deadline: float
+    ) -> Optional[dict]:
+        params = {"timeoutMs": str(int(hold_seconds * 1000))}
+        if seen:
+            params["status"] = seen
+        resp = await self.client.get(
+            self.build_url(f"/api/job/{job_id}/wait"),
+            params=params,
+            timeout=hold_seconds + LONG_POLL_GRACE_SECONDS,
+            deadline=deadline,
+        )
+        result = wrap_response(resp)
+        supported = not is_missing_route(resp.status_code, result["job"])
+        self._long_poll_support[self.build_url("/")] = supported
+        return result if supported else None
+
+    async def wait(self, job_id: str, timeout_seconds: float, seen: Optional[str] = None) -> dict:
+        """Wait up to timeout_seconds for the job to reach a terminal state.
+
+        Returns the latest {ok, status, job} response (or an error dict).
+        `seen` is the caller's last known status; a first response is
+        returned immediately if the job has already moved past it. Cancel
+        the task to stop early.
+        """
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + max(0.0, timeout_seconds)
+        # Requests may run past the wait's deadline only by the long-poll grace
+        request_deadline = deadline + LONG_POLL_GRACE_SECONDS
+        last: Optional[dict] = None
+        backoff = self.backoff_factory()
+
+        while True:
+            remaining = deadline - loop.time()
+            if self.long_poll_supported() is not False and remaining > 0:
+                try:
+                    result = await self._long_poll(
+                        job_id, seen, min(remaining, MAX_LONG_POLL_SECONDS), request_deadline
+                    )
+                except Exception as exc:
+                    result = {"ok": False, "error": f"failed to get status: {describe_error(exc)}"}
+                    await asyncio.sleep(min(backoff.next_delay(), max(0.0, deadline - loop.time())))
+                if result is not None:
+                    last = result
+                    if not result.get("ok", False) and "job" in result:
+                        return result
+                    state = job_state(result)
+                    if state in self.terminal_states:
+                        return result
+                    if state is not None:
+                        seen = state
+                    if loop.time() >= deadline:
+                        return last
+                    continue
+
+            last = await self.fetch(job_id, request_deadline)
+            state = job_state(last)
+            if state in self.terminal_states:
+                return last
+            if state is not None and state != seen:
+                seen = state
+                backoff.reset()
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                return last
+            await asyncio.sleep(min(backoff.next_delay(), remaining))
+
+    async def fetch_many(self, job_ids: List[str]) -> Dict[str, dict]:
+        """GET the status of every job concurrently; keys keep the input order."""
+        ids = list(dict.fromkeys(job_ids))
+        return dict(zip(ids, await asyncio.gather(*(self.fetch(j) for j in ids))))
+
+    async def wait_many(self, job_ids: List[str], timeout_seconds: float, mode: str = "all") -> Dict[str, dict]:
+        """Wait on several jobs at once.
+
+        mode="all" returns when every job is terminal, mode="any" as soon as
+        one is (the other waits are cancelled); either way at most
+        timeout_seconds. Returns the latest response per job, keyed in input
+        order.
+        """
+        if mode not in WAIT_MODES:
+            raise ValueError(f"mode must be one of {WAIT_MODES}, got {mode!r}")
+        ids = list(dict.fromkeys(job_ids))
+        if not ids:
+            return {}
+        tasks = {job_id: asyncio.ensure_future(self.wait(job_id, timeout_seconds)) for job_id in ids}
+        if mode == "all":
+            return dict(zip(ids, await asyncio.gather(*tasks.values())))
+
+        pending = set(tasks.values())
+        try:
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                if any(job_state(t.result()) in self.terminal_states for t in done):
+                    break
+        finally:
+            for task in pending:
+                task.cancel()
+            await asyncio.gather(*pending, return_exceptions=True)
+        # Cancelled waits report their job's current state instead
+        unfinished = [job_id for job_id, task in tasks.items() if task.cancelled() or not task.done()]
+        current = await self.fetch_many(unfinished)
+        return {job_id: current.get(job_id) or tasks[job_id].result() for job_id in ids}
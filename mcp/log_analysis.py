@@ -0,0 +1,255 @@
+#!/usr/bin/env python3
+"""
+Single-pass, bounded-memory analysis of Maestro test logs for give_feedback.
+
+give_feedback used to run substring checks over the whole log, split it into
+lines twice and echo it back verbatim as `raw_logs`. With multi-megabyte
+Maestro debug logs that doubled memory and bloated every reply.
+`LogAnalyzer` makes one pass over a string or a file (read in 1 MiB blocks)
+and keeps:
+
+- counters per precompiled pattern (flow pass/fail, failed steps, timeouts,
+  error lines);
+- the first few error lines, as before (`error_details`);
+- a ring buffer of the most recent error lines with surrounding context;
+- a ring buffer of the last lines, returned as a tail excerpt instead of
+  the full log.
+
+Only lines hit by a combined pre-filter regex are visited one by one; runs
+of ordinary lines are counted in C and only their edges are kept. Stored
+lines are clipped to MAX_LINE_CHARS, so memory does not depend on log size.
+"""
+
+from __future__ import annotations
+
+import re
+from collections import deque
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Deque, Dict, List, Union
+
+MAX_LINE_CHARS = 500
+ERROR_DETAIL_LINES = 3  # historical cap of error_details
+READ_BLOCK_CHARS = 1024 * 1024
+
+FLOW_PASSED = re.compile(r"Flow Passed|\[Passed\]")
+FLOW_FAILED = re.compile(r"Flow Failed|\[Failed\]")
+# Maestro prints "Tap on "Login"... FAILED" / "Assert that ... FAILED" per step
+STEP_FAILED = re.compile(r"\.\.\.\s*FAILED\b|\bFAILED\s*$")
+TIMEOUT = re.compile(r"\btim(?:ed?[ _-]?out|eout)\b", re.IGNORECASE)
+# give_feedback's historical failure signal was a case-sensitive "Error" anywhere
+ERROR_SIGNAL = re.compile(r"Error")
+ERROR_LINE = re.compile(r"error|failed", re.IGNORECASE)
+# Cheap pre-filter: a line that misses this cannot match any pattern above.
+# Blocks are lower-cased first: a literal alternation is far faster in `re`
+# than the same pattern with IGNORECASE.
+INTERESTING_LOWER = re.compile(r"passed\]|flow passed|error|fail|tim")
+INTERESTING = re.compile(INTERESTING_LOWER.pattern, re.IGNORECASE)
+
+
+def _clip(line: str) -> str:
+    if len(line) > MAX_LINE_CHARS:
+        return line[:MAX_LINE_CHARS] + "…"
+    return line[:-1] if line.endswith("\r") else line
+
+
+@dataclass
+class LogAnalyzer:
+    """Consume log text incrementally; `result()` summarizes what was seen.
+
+    Lines are split on "\\n" exactly like `str.split("\\n")`, so an empty log
+    or a trailing newline counts one empty final line.
+    """
+
+    context_lines: int = 2
+    max_error_contexts: int = 10
+    tail_lines: int = 40
+
+    total_lines: int = field(default=0, init=False)
+    counters: Dict[str, int] = field(init=False, default_factory=lambda: {
+        "flowPassed": 0, "flowFailed": 0, "stepFailures": 0, "timeouts": 0, "errorLines": 0,
+    })
+    error_signal: bool = field(default=False, init=False)
+    error_details: List[str] = field(init=False, default_factory=list)
+    _before: Deque[str] = field(init=False)
+    _tail: Deque[str] = field(init=False)
+    _contexts: Deque[Dict[str, Any]] = field(init=False)
+    _open: List[Dict[str, Any]] = field(init=False, default_factory=list)
+    _carry: str = field(default="", init=False)
+
+    def __post_init__(self) -> None:
+        self._before = deque(maxlen=self.context_lines)
+        self._tail = deque(maxlen=self.tail_lines)
+        self._contexts = deque(maxlen=self.max_error_contexts)
+
+    # -- per-line path ----------------------------------------------------
+
+    def feed(self, line: str) -> None:
+        """Consume one line (without its newline)."""
+        self._consume(line, INTERESTING.search(line) is not None)
+        self._tail.append(_clip(line))
+
+    def _consume(self, line: str, interesting: bool) -> None:
+        # Everything but the tail, which the block path fills once per block
+        clipped = _clip(line)
+        self.total_lines += 1
+        if self._open:
+            self._extend_open(clipped)
+        if interesting:
+            self._classify(line, clipped)
+        self._before.append(clipped)
+
+    def _extend_open(self, clipped: str) -> None:
+        # Error contexts still collecting their trailing lines
+        for ctx in self._open:
+            ctx["lines"].append(clipped)
+            ctx["_after"] -= 1
+        self._open = [c for c in self._open if c["_after"] > 0]
+
+    def _classify(self, line: str, clipped: str) -> None:
+        counters = self.counters
+        if FLOW_PASSED.search(line):
+            counters["flowPassed"] += 1
+        if FLOW_FAILED.search(line):
+            counters["flowFailed"] += 1
+        if STEP_FAILED.search(line):
+            counters["stepFailures"] += 1
+        if TIMEOUT.search(line):
+            counters["timeouts"] += 1
+        if not self.error_signal and ERROR_SIGNAL.search(line):
+            self.error_signal = True
+        if ERROR_LINE.search(line):
+            counters["errorLines"] += 1
+            if len(self.error_details) < ERROR_DETAIL_LINES:
+                self.error_details.append(clipped)
+            ctx = {"line": self.total_lines, "lines": [*self._before, clipped], "_after": self.context_lines}
+            self._contexts.append(ctx)
+            if self.context_lines:
+                self._open.append(ctx)
+
+    # -- block path -------------------------------------------------------
+
+    def _skip_run(self, text: str, start: int, end: int) -> None:
+        """Consume the plain lines of text[start:end] (one or more) without classifying.
+
+        Only the first `context_lines` (for open error contexts) and the last
+        `context_lines` (the next error's leading context) are materialized.
+        """
+        count = text.count("\n", start, end) + 1
+        keep = self.context_lines
+        head = keep if self._open else 0
+        if count <= head + keep:
+            for line in text[start:end].split("\n"):
+                self._consume(line, False)
+            return
+        pos = start
+        for _ in range(head):
+            nl = text.find("\n", pos, end)
+            self._consume(text[pos:nl], False)
+            pos = nl + 1
+        self.total_lines += count - head - keep
+        if not keep:
+            return
+        # Newline before the last `keep` lines
+        cut = end
+        for _ in range(keep):
+            cut = text.rfind("\n", pos, cut)
+        for line in text[cut + 1:end].split("\n"):
+            self._consume(line, False)
+
+    def _extend_tail(self, text: str) -> None:
+        """Push the last `tail_lines` lines of `text` into the tail buffer."""
+        lines: List[str] = []
+        end = len(text)
+        for _ in range(self.tail_lines):
+            nl = text.rfind("\n", 0, end)
+            lines.append(_clip(text[nl + 1:end]))
+            if nl == -1:
+                break
+            end = nl
+        self._tail.extend(reversed(lines))
+
+    def _feed_lines(self, text: str) -> None:
+        """Consume `text` as complete lines joined by "\\n"."""
+        pos = 0
+        lowered = text.lower()
+        # lower() keeps offsets unless some character expands (e.g. "İ")
+        matches = INTERESTING_LOWER.finditer(lowered) if len(lowered) == len(text) else INTERESTING.finditer(text)
+        for m in matches:
+            if m.start() < pos:
+                continue  # line already handled
+            line_start = text.rfind("\n", 0, m.start()) + 1
+            line_end = text.find("\n", m.start())
+            if line_end == -1:
+                line_end = len(text)
+            if line_start > pos:
+                self._skip_run(text, pos, line_start - 1)
+            self._consume(text[line_start:line_end], True)
+            pos = line_end + 1
+        if pos <= len(text):
+            self._skip_run(text, pos, len(text))
+        self._extend_tail(text)
+
+    def feed_text(self, chunk: str) -> None:
+        """Consume an arbitrary chunk of log text; call `close()` after the last one."""
+        text = self._carry + chunk if self._carry else chunk
+        cut = text.rfind("\n")
+        if cut == -1:
+            self._carry = text
+            return
+        self._carry = text[cut + 1:]
+        self._feed_lines(text[:cut])
+
+    def close(self) -> "LogAnalyzer":
+        """Consume the final (possibly empty) line."""
+        carry, self._carry = self._carry, ""
+        self._feed_lines(carry)
+        return self
+
+    # -- results ----------------------------------------------------------
+
+    @property
+    def passed(self) -> bool:
+        return self.counters["flowPassed"] > 0
+
+    @property
+    def failed(self) -> bool:
+        return self.counters["flowFailed"] > 0 or self.error_signal
+
+    def result(self) -> Dict[str, Any]:
+        details = self.error_details if self.failed else []
+        return {
+            "total_lines": self.total_lines,
+            "contains_errors": bool(details),
+            "error_details": details,
+            "counters": dict(self.counters),
+            "error_context": [
+                {"line": c["line"], "lines": list(c["lines"])} for c in self._contexts
+            ],
+            "tail": "\n".join(self._tail),
+            "tail_lines": len(self._tail),
+        }
+
+
+def analyze_logs(
+    logs: Union[str, Path],
+    from_file: bool = False,
+    tail_lines: int = 40,
+    context_lines: int = 2,
+    max_error_contexts: int = 10,
+) -> LogAnalyzer:
+    """Analyze a log string, or the file at `logs` when `from_file` is set."""
+    analyzer = LogAnalyzer(
+        context_lines=context_lines,
+        max_error_contexts=max_error_contexts,
+        tail_lines=tail_lines,
+    )
+    if not from_file:
+        text = str(logs)
+        for start in range(0, len(text), READ_BLOCK_CHARS):
+            analyzer.feed_text(text[start:start + READ_BLOCK_CHARS])
+        return analyzer.close()
+    with open(Path(logs), "r", encoding="utf-8", errors="replace", newline="") as fh:
+        for chunk in iter(lambda: fh.read(READ_BLOCK_CHARS), ""):
+            analyzer.feed_text(chunk)
+    return analyzer.close()
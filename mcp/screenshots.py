@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+"""
+Screenshot descriptors for give_feedback: file references first, bytes on request.
+
+give_feedback used to read every screenshot, base64-encode it and put it in
+the response twice (`base64` and a `data:` URL), pretty-printed. Ten
+full-resolution PNGs made tens of megabytes of JSON per call. A screenshot
+is now described in one of three modes:
+
+    reference  (default) path, size, mime type and sha256; hashing streams
+               the file and is cached per (path, mtime_ns, size) in a
+               bounded LRU
+    thumbnail  reference plus a downscaled PNG, generated once per content
+               hash into the thumbnail cache directory and embedded as a
+               small `data:` URL (needs Pillow)
+    embed      reference plus the full image as a single `data:` URL
+
+Configuration (environment variables):
+    MCP_THUMBNAIL_DIR   thumbnail cache (default $XDG_CACHE_HOME/fastmcp/thumbnails)
+    MCP_THUMBNAIL_PX    longest thumbnail edge in pixels (default 320)
+"""
+
+from __future__ import annotations
+
+import base64
+import hashlib
+import mimetypes
+import os
+import tempfile
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+from diff_cache import DiffCache
+
+try:
+    from PIL import Image
+except ImportError:  # thumbnails are optional
+    Image = None
+
+SCREENSHOT_MODES = ("reference", "thumbnail", "embed")
+HASH_CHUNK_BYTES = 1024 * 1024
+# Memoized digests, LRU-evicted past this many bytes of paths and digests (some 8k screenshots)
+HASH_CACHE_BYTES = 1024 * 1024
+
+
+def _default_thumbnail_dir() -> Path:
+    cache_home = os.getenv("XDG_CACHE_HOME") or str(Path.home() / ".cache")
+    return Path(cache_home) / "fastmcp" / "thumbnails"
+
+
+THUMBNAIL_DIR = Path(os.getenv("MCP_THUMBNAIL_DIR") or _default_thumbnail_dir())
+try:
+    THUMBNAIL_PX = max(16, int(os.getenv("MCP_THUMBNAIL_PX", "320")))
+except ValueError:
+    THUMBNAIL_PX = 320
+
+# (path, mtime_ns, size) -> sha256 hex; screenshots are re-sent across calls
+_hash_cache = DiffCache(max_bytes=HASH_CACHE_BYTES)
+
+
+def file_sha256(path: Path, st: Optional[os.stat_result] = None) -> str:
+    """Streaming sha256 of `path`, memoized until its mtime or size changes."""
+    st = st or path.stat()
+    key = (str(path), st.st_mtime_ns, st.st_size)
+    digest = _hash_cache.get(key)
+    if digest is not None:
+        return digest
+    h = hashlib.sha256()
+    with open(path, "rb") as fh:
+        for chunk in iter(lambda: fh.read(HASH_CHUNK_BYTES), b""):
+            h.update(chunk)
+    digest = h.hexdigest()
+    _hash_cache.put(key, digest, len(digest) + len(key[0]))
+    return digest
+
+
+def _data_url(mime: str, data: bytes) -> str:
+    return f"data:{mime};base64,{base64.b64encode(data).decode('ascii')}"
+
+
+def thumbnail_for(path: Path, digest: str, max_px: int = THUMBNAIL_PX, cache_dir: Optional[Path] = None) -> Path:
+    """Return the cached thumbnail for content `digest`, generating it on first use.
+
+    The file is written atomically, so concurrent callers at worst render the
+    same thumbnail twice.
+    """
+    if Image is None:
+        raise RuntimeError("thumbnails require Pillow (pip install pillow)")
+    cache_dir = cache_dir or THUMBNAIL_DIR
+    target = cache_dir / f"{digest}-{max_px}.png"
+    if target.exists():
+        return target
+    cache_dir.mkdir(parents=True, exist_ok=True)
+    with Image.open(path) as img:
+        img.thumbnail((max_px, max_px))
+        if img.mode not in ("RGB", "RGBA", "L", "LA", "P"):
+            img = img.convert("RGBA")
+        fd, tmp = tempfile.mkstemp(dir=str(cache_dir), suffix=".png.tmp")
+        try:
+            with os.fdopen(fd, "wb") as fh:
+                img.save(fh, format="PNG", optimize=True)
+            os.replace(tmp, target)
+        except BaseException:
+            if os.path.exists(tmp):
+                os.unlink(tmp)
+            raise
+    return target
+
+
+def describe_screenshot(
+    path: Path,
+    mode: str = "reference",
+    max_px: int = THUMBNAIL_PX,
+    cache_dir: Optional[Path] = None,
+) -> Dict[str, Any]:
+    """Describe one screenshot for a tool response; never raises."""
+    entry: Dict[str, Any] = {"path": str(path), "filename": path.name}
+    try:
+        st = path.stat()
+    except OSError:
+        entry.update({"exists": False, "error": "Screenshot file not found"})
+        return entry
+
+    mime = mimetypes.guess_type(path.name)[0] or "application/octet-stream"
+    try:
+        entry.update({
+            "exists": True,
+            "size": st.st_size,
+            "mimeType": mime,
+            "sha256": file_sha256(path, st),
+        })
+        if mode == "embed":
+            entry["data"] = _data_url(mime, path.read_bytes())
+        elif mode == "thumbnail":
+            thumb = thumbnail_for(path, entry["sha256"], max_px, cache_dir)
+            data = thumb.read_bytes()
+            entry["thumbnail"] = {
+                "path": str(thumb),
+                "size": len(data),
+                "data": _data_url("image/png", data),
+            }
+    except Exception as e:
+        entry.setdefault("exists", True)
+        entry["error"] = f"Failed to process screenshot: {e}"
+    return entry
@@ -12,40 +12,71 @@ Usage (via Cursor MCP): configure this script as an MCP server using stdio.
 
 from __future__ import annotations
 
+import asyncio
 import os
 import sys
 import subprocess
+import threading
 from pathlib import Path
-from typing import List, Optional
-import difflib
+from typing import Dict, List, Optional
 from fastmcp import FastMCP
 import json
-import requests
+
+from async_client import get_async_client
+from diff_cache import DiffCache
+from git_changes import ChangeSet, collect_changes
+from job_cache import JobCache, payload_fingerprint
+from job_wait import WAIT_MODES, AsyncJobWaiter, job_state
+from log_analysis import analyze_logs
+from screenshots import SCREENSHOT_MODES, describe_screenshot
+from settings_store import SettingsStore
+from single_flight import SingleFlight
+from untracked_diff import iter_new_file_diffs
+
+# TestGen's flow tooling sits next to mcp/ in this repo; without it the flow
+# fingerprint index is simply off
+TESTGEN_DIR = Path(__file__).resolve().parents[1] / "TestGen"
+if TESTGEN_DIR.is_dir() and str(TESTGEN_DIR) not in sys.path:
+    sys.path.append(str(TESTGEN_DIR))
+try:
+    from flow_index import FlowIndex
+    from flow_lint import lint_many, load_known_text
+except ImportError:
+    FlowIndex = None
+    lint_many = load_known_text = None
 
 mcp = FastMCP("fastMCP")
 
 CONFIG_PATH = (Path(__file__).parent / "config.json").resolve()
+DEFAULT_SETTINGS = {"copperEnabled": False, "apiBaseUrl": "http://localhost:5055"}
+
+# Shared by every tool; re-reads config.json only when it changes on disk
+settings_store = SettingsStore(CONFIG_PATH, defaults=DEFAULT_SETTINGS)
 
 # HTTP timeout (seconds) for requests to the local AI tester API
 # Can be overridden with environment variable MCP_API_TIMEOUT_SECONDS
 API_TIMEOUT_SECONDS = int(os.getenv("MCP_API_TIMEOUT_SECONDS", "600"))
 
+# Keep-alive connection pool shared by every tool (see async_client.py); tools
+# are async so a job wait holds a socket on the event loop, not a worker thread
+api_client = get_async_client(max_timeout=API_TIMEOUT_SECONDS)
+
+# Job states after which the server will not update the job any further
+TERMINAL_JOB_STATES = {"generated", "passed", "failed"}
+
+# Total time check_status may block before asking the agent to call again
+CHECK_STATUS_WAIT_SECONDS = 20
+
 
 def load_settings() -> dict:
-    """Load persistent server settings from mcp/config.json."""
-    try:
-        if CONFIG_PATH.exists():
-            return json.loads(CONFIG_PATH.read_text(encoding="utf-8"))
-    except Exception:
-        pass
-    return {"copperEnabled": False, "apiBaseUrl": "http://localhost:5055"}
+    """Load persistent server settings from mcp/config.json (cached until the file changes)."""
+    return settings_store.load()
 
 
 def save_settings(settings: dict) -> None:
-    """Persist server settings to mcp/config.json."""
+    """Persist server settings to mcp/config.json (atomic write-then-rename)."""
     try:
-        CONFIG_PATH.parent.mkdir(parents=True, exist_ok=True)
-        CONFIG_PATH.write_text(json.dumps(settings, indent=2), encoding="utf-8")
+        settings_store.save(settings)
     except Exception:
         # Best-effort; swallow IO errors to avoid crashing the server
         return
@@ -60,6 +91,97 @@ def build_api_url(path: str) -> str:
         path = '/' + path
     return base + path
 
+
+# Long-polls /api/job/:id/wait, falling back to adaptive polling on older servers
+job_waiter = AsyncJobWaiter(api_client, build_api_url, TERMINAL_JOB_STATES)
+
+
+async def fetch_job(job_id: str) -> dict:
+    """GET /api/job/{job_id} over the pooled client; never raises."""
+    return await job_waiter.fetch(job_id)
+
+
+# Per-file diffs keyed by (HEAD, path, mtime_ns, size, blob); repeated calls on an
+# unchanged tree skip `git diff` and re-reading untracked files
+diff_cache = DiffCache()
+
+
+# Recent test_modification jobs by payload fingerprint (MCP_JOB_CACHE=0 turns it off);
+# an identical resubmission gets the earlier job id and result instead of a new job
+job_cache = JobCache()
+
+
+# Concurrent identical submissions share one POST, and concurrent waits on a job share one long-poll
+submit_flights = SingleFlight()
+status_flights = SingleFlight()
+
+
+def record_job(response: dict) -> dict:
+    """Post-process a job status response: index its flows, then keep its result in job_cache.
+
+    Writes to SQLite; async tools call it through asyncio.to_thread.
+    """
+    index_job_flows(response)
+    job_cache.record(response)
+    return response
+
+
+def _default_flow_index_path() -> str:
+    cache_home = os.getenv("XDG_CACHE_HOME") or str(Path.home() / ".cache")
+    return str(Path(cache_home) / "fastmcp" / "flow-index.sqlite3")
+
+
+# Fingerprints of generated flows with their latest results (TestGen/flow_index.py);
+# MCP_FLOW_INDEX=0 turns it off
+FLOW_INDEX_PATH = os.getenv("MCP_FLOW_INDEX") or _default_flow_index_path()
+_flow_index = None
+_flow_index_lock = threading.Lock()
+
+
+def get_flow_index():
+    """The shared FlowIndex, opened on first use; None when disabled or unavailable."""
+    global _flow_index
+    with _flow_index_lock:
+        if _flow_index is None and FlowIndex is not None and FLOW_INDEX_PATH != "0":
+            try:
+                _flow_index = FlowIndex(FLOW_INDEX_PATH)
+            except Exception:
+                return None
+        return _flow_index
+
+
+def index_job_flows(response: dict) -> dict:
+    """Record a finished job's flows in the fingerprint index.
+
+    Adds result.flowIndex: one {fingerprint, seenBefore, runs, previous} per
+    generated flow, where `previous` is the latest earlier run of an
+    equivalent flow. Never raises; the response is returned as-is on error.
+    """
+    if job_state(response) not in TERMINAL_JOB_STATES:
+        return response
+    job = response["job"]
+    result = job.get("result")
+    tests = result.get("tests") if isinstance(result, dict) else None
+    index = get_flow_index() if isinstance(tests, list) else None
+    if index is None:
+        return response
+    summary = result.get("summary") if isinstance(result.get("summary"), list) else []
+    job_id = str(job.get("id") or result.get("jobId") or "")
+    entries = []
+    try:
+        for i, text in enumerate(tests):
+            if not isinstance(text, str):
+                continue
+            outcome = summary[i] if i < len(summary) and isinstance(summary[i], dict) else {}
+            status = ("passed" if outcome.get("success") else "failed") if outcome else job_state(response)
+            kept = {k: outcome[k] for k in ("file", "durationMs", "screenshots") if k in outcome}
+            entries.append(index.record(text, job_id=job_id, status=status, result=kept or None).to_dict())
+    except Exception:
+        return response
+    result["flowIndex"] = entries
+    return response
+
+
 def find_git_root(start_directory: Path) -> Optional[Path]:
     """Walk upward from start_directory to find a directory containing a .git folder.
 
@@ -91,10 +213,7 @@ def run_git_command(repo_root: Path, args: List[str]) -> str:
         return ""
 
 
-def get_staged_and_unstaged_diff(repo_root: Path) -> str:
-    """Return unified diff for staged and unstaged changes."""
-    unstaged = run_git_command(repo_root, ["diff", "--no-ext-diff"])
-    staged = run_git_command(repo_root, ["diff", "--no-ext-diff", "--cached"])
+def _combine_diffs(unstaged: str, staged: str) -> str:
     combined = []
     if unstaged.strip():
         combined.append(unstaged)
@@ -103,6 +222,13 @@ def get_staged_and_unstaged_diff(repo_root: Path) -> str:
     return "\n".join(combined)
 
 
+def get_staged_and_unstaged_diff(repo_root: Path) -> str:
+    """Return unified diff for staged and unstaged changes."""
+    unstaged = run_git_command(repo_root, ["diff", "--no-ext-diff"])
+    staged = run_git_command(repo_root, ["diff", "--no-ext-diff", "--cached"])
+    return _combine_diffs(unstaged, staged)
+
+
 def list_untracked_files(repo_root: Path) -> List[Path]:
     """List untracked files (respecting .gitignore)."""
     stdout = run_git_command(
@@ -123,70 +249,48 @@ def unified_diff_for_new_file(repo_root: Path, file_path: Path) -> str:
 
     This does not shell out to git; it generates a unified diff from empty
     to the file's current contents, which makes it suitable to concatenate
-    with `git diff` output.
+    with `git diff` output. Binary files become a "Binary files ... differ"
+    stub and content past MCP_DIFF_MAX_FILE_BYTES is truncated.
     """
-    try:
-        # Read file as text using UTF-8; fall back to ignoring errors to avoid binary crashes.
-        content = file_path.read_text(encoding="utf-8", errors="ignore")
-    except Exception:
-        content = ""
-    new_lines = content.splitlines(keepends=True)
-    rel = file_path.relative_to(repo_root)
-
-    # Produce a diff similar to git's new-file patch headers
-    header = [
-        f"diff --git a/{rel} b/{rel}\n",
-        f"new file mode 100644\n",
-        f"index 0000000..0000000\n",
-    ]
-    body = difflib.unified_diff(
-        [],
-        new_lines,
-        fromfile="/dev/null",
-        tofile=f"b/{rel}",
-        lineterm="",
-    )
-    return "".join(header) + "\n".join(body) + ("\n" if new_lines else "")
+    return "".join(iter_new_file_diffs(repo_root, [file_path], cache=diff_cache))
 
 
 def get_untracked_diffs(repo_root: Path) -> str:
-    """Return unified diffs for all untracked files."""
-    diffs: List[str] = []
-    for path in list_untracked_files(repo_root):
-        diffs.append(unified_diff_for_new_file(repo_root, path))
-    return "\n".join(filter(None, diffs)).strip()
+    """Return unified diffs for all untracked files, bounded by the diff byte budgets."""
+    return "".join(iter_new_file_diffs(repo_root, list_untracked_files(repo_root), cache=diff_cache))
 
 
 def list_changed_files(repo_root: Path) -> List[Path]:
     """List files changed relative to HEAD (staged + unstaged), repository-relative paths.
 
-    Includes untracked files.
+    Includes untracked files. Uses a single `git status` call.
     """
-    names_stdout = run_git_command(repo_root, ["diff", "--name-only", "HEAD"])
-    changed: set[Path] = set()
-    for line in names_stdout.splitlines():
-        line = line.strip()
-        if not line:
-            continue
-        changed.add(Path(line))
-    for untracked in list_untracked_files(repo_root):
-        try:
-            changed.add(untracked.relative_to(repo_root))
-        except Exception:
-            # Should not happen, but ignore if relative_to fails
-            pass
-    return sorted(repo_root / p for p in changed)
+    return collect_changes(repo_root, cache=diff_cache).paths()
 
 
-def per_file_diff(repo_root: Path, file_path: Path) -> str:
-    """Return unified diff for a single file relative to HEAD. Handles untracked files."""
-    # Determine if file is tracked by checking git ls-files --error-unmatch
-    rel = file_path.relative_to(repo_root)
-    tracked = run_git_command(repo_root, ["ls-files", "--error-unmatch", str(rel)]) != ""
-    if not tracked:
+def per_file_diff(repo_root: Path, file_path: Path, changes: Optional[ChangeSet] = None) -> str:
+    """Return unified diff for a single file relative to HEAD. Handles untracked files.
+
+    When diffing many files, pass the ChangeSet from `collect_changes(repo_root)`
+    so git runs a fixed number of times instead of twice per file.
+    """
+    if changes is None:
+        changes = collect_changes(repo_root, cache=diff_cache)
+    rel = file_path.relative_to(repo_root).as_posix()
+    change = changes.changes.get(rel)
+    if change is not None:
+        if change.tracked:
+            return changes.patch_for(rel)
         return unified_diff_for_new_file(repo_root, file_path)
-    # Diff against HEAD to include both staged and unstaged changes
-    return run_git_command(repo_root, ["diff", "--no-ext-diff", "HEAD", "--", str(rel)])
+    # Not in the change set: either tracked and unchanged, or ignored (diffed as new)
+    tracked = run_git_command(repo_root, ["ls-files", "--error-unmatch", rel]) != ""
+    return "" if tracked else unified_diff_for_new_file(repo_root, file_path)
+
+
+def per_file_diffs(repo_root: Path) -> Dict[Path, str]:
+    """Return {absolute path: diff} for every changed file using one change-set collection."""
+    changes = collect_changes(repo_root, cache=diff_cache)
+    return {path: per_file_diff(repo_root, path, changes) for path in changes.paths()}
 
 
 @mcp.tool(
@@ -211,20 +315,120 @@ def get_settings() -> str:
     return json.dumps(load_settings())
 
 
+@mcp.tool(
+    name="get_http_stats",
+    description="Return connection pool stats for MCP -> server HTTP calls (connections opened vs reused).",
+)
+def get_http_stats() -> str:
+    return json.dumps(api_client.stats())
+
+
+@mcp.tool(
+    name="get_diff_cache_stats",
+    description="Return hit/miss/eviction counters and size of the per-file diff cache.",
+)
+def get_diff_cache_stats() -> str:
+    return json.dumps(diff_cache.stats())
+
+
+@mcp.tool(
+    name="get_job_cache_stats",
+    description=(
+        "Return hit/miss/eviction counters, TTL and size of the test_modification job cache, and how many "
+        "submissions and status requests were coalesced with identical ones in flight."
+    ),
+)
+def get_job_cache_stats() -> str:
+    return json.dumps({
+        **job_cache.stats(),
+        "submissions": submit_flights.stats(),
+        "statusRequests": status_flights.stats(),
+    })
+
+
+@mcp.tool(
+    name="lookup_flow",
+    description=(
+        "Fingerprint a Maestro flow (YAML text) and return the latest recorded result of any equivalent "
+        "flow from earlier jobs, so a duplicate need not be run again. Returns {ok, fingerprint, seenBefore, "
+        "runs, previous}."
+    ),
+)
+def lookup_flow(flow_yaml: str) -> str:
+    if not isinstance(flow_yaml, str):
+        return json.dumps({"ok": False, "error": "flow_yaml must be a string"})
+    index = get_flow_index()
+    if index is None:
+        return json.dumps({"ok": False, "error": "flow index is disabled or TestGen is not available"})
+    try:
+        match = index.lookup(flow_yaml)
+    except Exception as exc:
+        return json.dumps({"ok": False, "error": f"flow index lookup failed: {exc}"})
+    return json.dumps({"ok": True, **match.to_dict(), "index": index.stats()})
+
+
+@mcp.tool(
+    name="lint_flows",
+    description=(
+        "Statically check Maestro flows (YAML texts) before running them: syntax, missing runFlow/runScript "
+        "files (when base_dir is given), reused screenshot names, and assertVisible text found neither earlier "
+        "in the flow nor in source_files. Takes milliseconds; a Maestro run takes tens of seconds. "
+        "Returns {ok, errors, warnings, diagnostics}; ok is false when any error is found."
+    ),
+)
+def lint_flows(flows: list[str], source_files: Optional[list[str]] = None, base_dir: str = "") -> str:
+    if not isinstance(flows, list) or not all(isinstance(f, str) for f in flows):
+        return json.dumps({"ok": False, "error": "flows must be a list of strings"})
+    repo_root = find_git_root(Path.cwd()) or Path.cwd()
+
+    def resolve(p: str) -> Path:
+        path = Path(p)
+        return path if path.is_absolute() else repo_root / path
+
+    sources = [resolve(p) for p in (source_files or []) if isinstance(p, str)]
+    return json.dumps(lint_report(flows, sources, resolve(base_dir) if base_dir else None))
+
+
+def lint_report(flows: list[str], sources: List[Path], base_dir: Optional[Path] = None) -> dict:
+    """Run TestGen/flow_lint.py over flows as one batch; never raises."""
+    if lint_many is None:
+        return {"ok": False, "error": "flow linting requires the TestGen directory"}
+    try:
+        diagnostics = lint_many(
+            ((f"flows[{i}]", text) for i, text in enumerate(flows)),
+            base_dir=base_dir,
+            known_text=load_known_text(sources) if sources else None,
+        )
+    except Exception as exc:
+        return {"ok": False, "error": f"lint failed: {exc}"}
+    errors = sum(d.severity == "error" for d in diagnostics)
+    return {
+        "ok": errors == 0,
+        "errors": errors,
+        "warnings": len(diagnostics) - errors,
+        "diagnostics": [d.to_dict() for d in diagnostics],
+    }
+
+
 @mcp.tool(
     name="test_modification",
     description=(
-        "Submit modification context to start async test generation/execution. Returns a job id immediately."
+        "Submit modification context to start async test generation/execution. Returns a job id immediately. "
+        "The server lints the flows it generates before running them (result.lint). An identical submission "
+        "(same message, diffs and related file contents) within the cache TTL returns the earlier jobId, and its "
+        "result once finished, with cached=true; pass use_cache=false to always start a new job."
     ),
 )
-def test_modification(
+async def test_modification(
     user_message: str,
     modified_files: list[dict],
     related_files: list[str],
+    use_cache: bool = True,
 ) -> str:
     """Start asynchronous test generation and execution on the local server.
 
-    Returns a JSON string with { ok, status, jobId }.
+    Returns a JSON string with { ok, status, jobId }. A cache hit (see
+    job_cache.py) returns { ok, cached, jobId, job? } without contacting the server.
     """
     if not isinstance(user_message, str):
         return json.dumps({"ok": False, "error": "user_message must be a string"})
@@ -259,118 +463,161 @@ def test_modification(
         "relatedFiles": abs_related,
         "async": True,
     }
+    if not use_cache:
+        return json.dumps(await submit_job(payload))
+    # Hashes the content of every related file; also kept off the event loop
+    key = await asyncio.to_thread(
+        payload_fingerprint, user_message, abs_modified, abs_related, build_api_url("/"), cache=diff_cache
+    )
+    hit = job_cache.get(key)
+    if hit is not None:
+        return json.dumps({
+            "ok": True,
+            "cached": True,
+            **hit.to_dict(job_cache.clock()),
+            **({"job": hit.job} if hit.job is not None else {}),
+            "message": (
+                "identical modification already tested; this is the earlier job's result"
+                if hit.job is not None
+                else "identical modification already submitted. DON'T FORGET TO CALL check_status WITH THIS jobId"
+            ),
+        })
+    # Identical submissions racing this one wait for its POST instead of starting jobs of their own
+    started, shared = await submit_flights.do(key, lambda: submit_job(payload, key))
+    return json.dumps({**started, **({"coalesced": True} if shared else {})})
+
 
+async def submit_job(payload: dict, key: Optional[str] = None) -> dict:
+    """POST /api/generate-tests; with a fingerprint `key`, the new job is noted in job_cache. Never raises."""
     url = build_api_url("/api/generate-tests?async=1")
     try:
-        # Short timeout so the tool returns under Cursor's 20s cap
-        resp = requests.post(url, json=payload, timeout=min(API_TIMEOUT_SECONDS, 10))
+        # "generate" endpoint timeout is short so the tool returns under Cursor's 20s cap
+        resp = await api_client.post(url, endpoint="generate", json=payload)
         data = {}
         try:
             data = resp.json()
         except Exception:
             data = {"text": resp.text[:500]}
-        return json.dumps({
+        if key is not None and resp.status_code < 400 and data.get("jobId"):
+            job_cache.put(key, str(data["jobId"]))
+        return {
             "ok": resp.status_code < 400,
             "status": resp.status_code,
             "jobId": data.get("jobId"),
             "server": data,
-            "message": "success. DON'T FORGET TO CALL check_status TO GET THE STATUS OF THE JOB NOW"
-        })
+            "message": "success. DON'T FORGET TO CALL check_status TO GET THE STATUS OF THE JOB NOW",
+        }
     except Exception as exc:
-        return json.dumps({"ok": False, "error": f"failed to start job: {exc}"})
+        return {"ok": False, "error": f"failed to start job: {exc}"}
+
+
+async def _status(job_id: str, wait_seconds: Optional[int]) -> dict:
+    if wait_seconds is None:
+        return await asyncio.to_thread(record_job, await fetch_job(job_id))
+    last = await job_waiter.wait(job_id, wait_seconds)
+    return await asyncio.to_thread(record_job, last) if last else {"ok": False, "error": "no status"}
+
+
+async def _shared_status(job_id: str, wait_seconds: Optional[int]) -> dict:
+    """A job's status, fetched (wait_seconds=None) or waited on; concurrent identical calls share one request.
+
+    Agents whose submissions were coalesced all poll the same job id, so they
+    ride one long-poll instead of holding one each. The response is shared:
+    callers only serialize it.
+    """
+    key = ("status", build_api_url("/"), job_id, wait_seconds)
+    response, _ = await status_flights.do(key, lambda: _status(job_id, wait_seconds))
+    return response
 
 
 @mcp.tool(
     name="get_job_status",
     description="Poll job status from the local server. Returns {id, status, result?, error?, progress?}."
 )
-def get_job_status(job_id: str) -> str:
-    url = build_api_url(f"/api/job/{job_id}")
-    try:
-        resp = requests.get(url, timeout=min(API_TIMEOUT_SECONDS, 8))
-        try:
-            data = resp.json()
-        except Exception:
-            data = {"text": resp.text[:500]}
-        return json.dumps({
-            "ok": resp.status_code < 400,
-            "status": resp.status_code,
-            "job": data,
-        })
-    except Exception as exc:
-        return json.dumps({"ok": False, "error": f"failed to get status: {exc}"})
+async def get_job_status(job_id: str) -> str:
+    return json.dumps(await _shared_status(job_id, None))
 
 
 @mcp.tool(
     name="wait_job_step",
     description=(
-        "Poll a job for up to step_seconds (<= 8s) to stay under tool time limits. "
-        "Returns the latest status. Call repeatedly until status is 'generated'/'passed'/'failed'."
+        "Wait on a job for up to step_seconds (<= 8s) to stay under tool time limits; returns as soon as "
+        "it finishes. Returns the latest status. Call repeatedly until status is 'generated'/'passed'/'failed'."
     ),
 )
-def wait_job_step(job_id: str, step_seconds: int = 8) -> str:
-    import time
+async def wait_job_step(job_id: str, step_seconds: int = 8) -> str:
     step_seconds = max(1, min(8, int(step_seconds)))
-    deadline = time.time() + step_seconds
-    last = None
-    while time.time() < deadline:
-        last = json.loads(get_job_status(job_id))
-        job = (last or {}).get("job", {})
-        status = job.get("status")
-        if status in {"generated", "passed", "failed"}:
-            break
-        time.sleep(1)
-    return json.dumps(last or {"ok": False, "error": "no status"})
+    return json.dumps(await _shared_status(job_id, step_seconds))
 
 
 @mcp.tool(
     name="check_status",
     description=(
-        "Convenience tool: poll a job up to 20s and return status, progress, and a brief summary. "
+        "Convenience tool: wait on a job up to 20s and return status, progress, and a brief summary. "
         "If not finished, call again later."
     ),
 )
-def check_status(job_id: str) -> str:
-    import time
-    # Poll in 8s + 8s + 4s chunks to stay under tool caps
-    chunks = [8, 8, 4]
-    last_response = None
-    
-    for step_seconds in chunks:
-        deadline = time.time() + step_seconds
-        while time.time() < deadline:
-            # Make direct HTTP request instead of calling other tool functions
-            url = build_api_url(f"/api/job/{job_id}")
-            try:
-                resp = requests.get(url, timeout=min(API_TIMEOUT_SECONDS, 8))
-                try:
-                    data = resp.json()
-                except Exception:
-                    data = {"text": resp.text[:500]}
-                
-                last_response = {
-                    "ok": resp.status_code < 400,
-                    "status": resp.status_code,
-                    "job": data,
-                }
-                
-                status = data.get("status") if isinstance(data, dict) else None
-                if status in {"generated", "passed", "failed"}:
-                    return json.dumps(last_response)
-                    
-            except Exception as exc:
-                last_response = {"ok": False, "error": f"failed to get status: {exc}"}
-                
-            time.sleep(1)
-    
-    return json.dumps(last_response or {"ok": False, "error": "no status"})
+async def check_status(job_id: str) -> str:
+    return json.dumps(await _shared_status(job_id, CHECK_STATUS_WAIT_SECONDS))
+
+
+def _batch_response(responses: dict) -> dict:
+    """Record each job (blocking, see record_job) and sort the ids into finished and pending."""
+    for response in responses.values():
+        record_job(response)
+    finished = [job_id for job_id, r in responses.items() if job_state(r) in TERMINAL_JOB_STATES]
+    return {
+        "ok": all(r.get("ok", False) for r in responses.values()),
+        "jobs": responses,
+        "finished": finished,
+        "pending": [job_id for job_id in responses if job_id not in finished],
+    }
+
+
+def _normalize_job_ids(job_ids) -> Optional[list[str]]:
+    if not isinstance(job_ids, list) or not all(isinstance(j, str) for j in job_ids):
+        return None
+    return job_ids
+
+
+@mcp.tool(
+    name="get_jobs_status",
+    description=(
+        "Poll several jobs in one call. Returns {ok, jobs: {jobId: {ok, status, job}}, finished, pending}."
+    ),
+)
+async def get_jobs_status(job_ids: list[str]) -> str:
+    ids = _normalize_job_ids(job_ids)
+    if ids is None:
+        return json.dumps({"ok": False, "error": "job_ids must be a list of strings"})
+    return json.dumps(await asyncio.to_thread(_batch_response, await job_waiter.fetch_many(ids)))
+
+
+@mcp.tool(
+    name="wait_jobs",
+    description=(
+        "Wait on several jobs for up to timeout_seconds (<= 20s). mode='all' returns when every job is "
+        "'generated'/'passed'/'failed', mode='any' as soon as one is. Same response shape as get_jobs_status."
+    ),
+)
+async def wait_jobs(job_ids: list[str], mode: str = "all", timeout_seconds: int = CHECK_STATUS_WAIT_SECONDS) -> str:
+    ids = _normalize_job_ids(job_ids)
+    if ids is None:
+        return json.dumps({"ok": False, "error": "job_ids must be a list of strings"})
+    if mode not in WAIT_MODES:
+        return json.dumps({"ok": False, "error": f"mode must be one of {list(WAIT_MODES)}"})
+    timeout_seconds = max(1, min(CHECK_STATUS_WAIT_SECONDS, int(timeout_seconds)))
+    responses = await job_waiter.wait_many(ids, timeout_seconds, mode=mode)
+    return json.dumps(await asyncio.to_thread(_batch_response, responses))
 
 
 @mcp.tool(
     name="give_feedback",
     description=(
         "Analyze test results and provide actionable feedback to Cursor chat. "
-        "Determines if tests passed/failed and provides specific recommendations for fixes or UI improvements."
+        "Determines if tests passed/failed and provides specific recommendations for fixes or UI improvements. "
+        "Screenshots are returned as file references with sha256 hashes; pass screenshot_mode='thumbnail' "
+        "for small inline previews or 'embed' for full images."
     ),
 )
 def give_feedback(
@@ -378,6 +625,8 @@ def give_feedback(
     screenshot_paths: list[str],
     user_request: str,
     context: str = "",
+    screenshot_mode: str = "reference",
+    logs_path: str = "",
 ) -> str:
     """Analyze test results and provide intelligent feedback for Cursor chat.
     
@@ -386,79 +635,52 @@ def give_feedback(
         screenshot_paths: List of screenshot file paths taken during testing
         user_request: Original user request that triggered the test
         context: Additional context that may be important for analysis
+        screenshot_mode: "reference" (path + sha256, default), "thumbnail"
+            (adds a cached downscaled PNG) or "embed" (adds the full image)
+        logs_path: Optional log file to analyze instead of `logs` (streamed, not loaded)
     
     Returns:
         JSON string with intelligent analysis and actionable recommendations
     """
-    import base64
-    import os
-    import re
-    
     # Validate inputs
     if not isinstance(logs, str):
         return json.dumps({"ok": False, "error": "logs must be a string"})
     if not isinstance(screenshot_paths, list):
         return json.dumps({"ok": False, "error": "screenshot_paths must be a list"})
+    if not isinstance(logs_path, str):
+        return json.dumps({"ok": False, "error": "logs_path must be a string"})
     if not isinstance(user_request, str):
         return json.dumps({"ok": False, "error": "user_request must be a string"})
+    if screenshot_mode not in SCREENSHOT_MODES:
+        return json.dumps({"ok": False, "error": f"screenshot_mode must be one of {list(SCREENSHOT_MODES)}"})
     
-    # Analyze test results from logs
-    test_failed = False
-    test_passed = False
-    error_details = []
-    
-    # Parse logs for test results
-    if "Flow Passed" in logs or "[Passed]" in logs:
-        test_passed = True
-    if "Flow Failed" in logs or "[Failed]" in logs or "Error" in logs:
-        test_failed = True
-        # Extract error details
-        error_lines = [line for line in logs.split('\n') if 'error' in line.lower() or 'failed' in line.lower()]
-        error_details = error_lines[:3]  # Limit to first 3 error lines
-    
-    # Process screenshots with analysis
+    # Analyze test results in one streaming pass over the logs
+    if logs_path:
+        log_file = Path(logs_path)
+        if not log_file.is_absolute():
+            log_file = (find_git_root(Path.cwd()) or Path.cwd()) / log_file
+        if not log_file.is_file():
+            return json.dumps({"ok": False, "error": f"logs_path not found: {log_file}"})
+        analysis = analyze_logs(log_file, from_file=True)
+    else:
+        analysis = analyze_logs(logs)
+    test_passed = analysis.passed
+    test_failed = analysis.failed
+    logs_analysis = analysis.result()
+    error_details = logs_analysis["error_details"]
+
+    # Describe screenshots by reference; bytes only when asked for
+    repo_root = None
     processed_screenshots = []
     for screenshot_path in screenshot_paths:
         if not isinstance(screenshot_path, str):
             continue
-            
-        try:
-            # Convert to absolute path if relative
-            if not os.path.isabs(screenshot_path):
-                # Assume relative to project root
-                repo_root = find_git_root(Path.cwd()) or Path.cwd()
-                screenshot_path = str(repo_root / screenshot_path)
-            
-            screenshot_file = Path(screenshot_path)
-            if screenshot_file.exists():
-                # Read and encode screenshot
-                with open(screenshot_file, "rb") as f:
-                    image_data = f.read()
-                    base64_image = base64.b64encode(image_data).decode('utf-8')
-                    
-                processed_screenshots.append({
-                    "path": str(screenshot_file),
-                    "filename": screenshot_file.name,
-                    "base64": base64_image,
-                    "data": f"data:image/png;base64,{base64_image}",
-                    "size": len(image_data),
-                    "exists": True
-                })
-            else:
-                processed_screenshots.append({
-                    "path": screenshot_path,
-                    "filename": Path(screenshot_path).name,
-                    "exists": False,
-                    "error": "Screenshot file not found"
-                })
-        except Exception as e:
-            processed_screenshots.append({
-                "path": screenshot_path,
-                "filename": Path(screenshot_path).name if screenshot_path else "unknown",
-                "exists": False,
-                "error": f"Failed to process screenshot: {e}"
-            })
-    
+        if not os.path.isabs(screenshot_path):
+            # Assume relative to project root
+            repo_root = repo_root or find_git_root(Path.cwd()) or Path.cwd()
+            screenshot_path = str(repo_root / screenshot_path)
+        processed_screenshots.append(describe_screenshot(Path(screenshot_path), screenshot_mode))
+
     # Generate intelligent feedback based on test results
     if test_failed:
         feedback_message = "🔴 TESTS FAILED - ACTION REQUIRED"
@@ -511,12 +733,7 @@ def give_feedback(
         "recommendations": recommendations,
         "action_needed": action_needed,
         "screenshots": processed_screenshots,
-        "logs_analysis": {
-            "total_lines": len(logs.split('\n')),
-            "contains_errors": bool(error_details),
-            "error_details": error_details,
-            "raw_logs": logs
-        },
+        "logs_analysis": logs_analysis,
         "cursor_instructions": {
             "next_steps": action_needed,
             "primary_focus": cursor_focus,
@@ -533,7 +750,7 @@ def give_feedback(
         }
     }
     
-    return json.dumps(feedback_response, indent=2)
+    return json.dumps(feedback_response)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+"""
+Process-wide cache for the MCP server settings file (mcp/config.json).
+
+Tools call `load_settings()` on every invocation (and `check_status` does so
+once per poll), so re-reading and re-parsing the JSON each time is wasted
+work. `SettingsStore` keeps the parsed document in memory and only reloads it
+when the file's identity (inode, mtime, size) changes. Saves go through a
+temporary file plus `os.replace`, so concurrent readers - including the
+`toggle_copper.py` CLI running in another process - never observe a
+half-written file.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import tempfile
+import threading
+from pathlib import Path
+from typing import Optional, Tuple
+
+# (st_ino, st_mtime_ns, st_size) of the file the cached document was read from
+FileSignature = Tuple[int, int, int]
+
+
+def _file_signature(path: Path) -> Optional[FileSignature]:
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return (st.st_ino, st.st_mtime_ns, st.st_size)
+
+
+class SettingsStore:
+    """Cached, thread-safe view over a JSON settings file.
+
+    `load()` returns a fresh shallow copy on every call so callers may mutate
+    the result (e.g. before passing it back to `save()`) without touching the
+    cached document.
+    """
+
+    def __init__(self, path: Path, defaults: Optional[dict] = None) -> None:
+        self.path = Path(path)
+        self.defaults = dict(defaults or {})
+        self._lock = threading.Lock()
+        self._signature: Optional[FileSignature] = None
+        self._cached: Optional[dict] = None
+        self.reloads = 0
+
+    def load(self) -> dict:
+        """Return current settings, re-reading the file only if it changed on disk."""
+        signature = _file_signature(self.path)
+        with self._lock:
+            if self._cached is not None and signature == self._signature:
+                return dict(self._cached)
+            data = self._read(signature)
+            self._cached = data
+            self._signature = signature
+            self.reloads += 1
+            return dict(data)
+
+    def _read(self, signature: Optional[FileSignature]) -> dict:
+        if signature is None:
+            return dict(self.defaults)
+        try:
+            data = json.loads(self.path.read_text(encoding="utf-8"))
+        except Exception:
+            return dict(self.defaults)
+        if not isinstance(data, dict):
+            return dict(self.defaults)
+        return data
+
+    def save(self, settings: dict) -> None:
+        """Atomically replace the settings file and refresh the cache.
+
+        Raises OSError if the file cannot be written; callers decide whether
+        to swallow it.
+        """
+        text = json.dumps(settings, indent=2)
+        with self._lock:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            fd, tmp_name = tempfile.mkstemp(
+                prefix=f".{self.path.name}.", suffix=".tmp", dir=str(self.path.parent)
+            )
+            try:
+                # mkstemp creates 0600 files; keep the mode of the file being replaced
+                try:
+                    os.chmod(tmp_name, os.stat(self.path).st_mode & 0o777)
+                except OSError:
+                    os.chmod(tmp_name, 0o644)
+                with os.fdopen(fd, "w", encoding="utf-8") as fh:
+                    fh.write(text)
+                    fh.flush()
+                    os.fsync(fh.fileno())
+                os.replace(tmp_name, self.path)
+            except BaseException:
+                try:
+                    os.unlink(tmp_name)
+                except OSError:
+                    pass
+                raise
+            self._cached = dict(settings)
+            self._signature = _file_signature(self.path)
+
+    def invalidate(self) -> None:
+        """Drop the cached document so the next `load()` re-reads the file."""
+        with self._lock:
+            self._cached = None
+            self._signature = None
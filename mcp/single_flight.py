@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+"""
+Single-flight coalescing of identical concurrent async calls.
+
+When several agents, or an agent's retries, fire the same request at the
+same time, `SingleFlight.do(key, fn)` runs `fn()` once: the first caller
+starts it, and every caller that arrives with the same key while it is
+running awaits the same task and gets the same result. Once the task
+finishes the key is free again, so nothing is cached; job_cache.py covers
+reuse after the fact.
+
+The task runs detached from its first caller, so a caller that is cancelled
+(e.g. a tool call timing out) does not cancel it for the others. Results
+are shared objects; post-process them inside `fn`, not per caller.
+
+    flights = SingleFlight()
+    result, shared = await flights.do(("wait", job_id), lambda: waiter.wait(job_id, 8))
+"""
+
+from __future__ import annotations
+
+import asyncio
+import threading
+from typing import Any, Awaitable, Callable, Dict, Hashable, Tuple
+
+
+class SingleFlight:
+    """Coalesces concurrent calls by key; thread-safe, calls on different event loops never share."""
+
+    def __init__(self) -> None:
+        self._tasks: Dict[Hashable, "asyncio.Task[Any]"] = {}
+        self._lock = threading.Lock()
+        self.calls = 0
+        self.shared = 0
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[Any]]) -> Tuple[Any, bool]:
+        """(result of fn(), whether it was shared with a call already in flight). Exceptions propagate to all."""
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            task = self._tasks.get(key)
+            # A task left behind by a closed loop (one asyncio.run per test) is not joinable
+            shared = task is not None and not task.done() and task.get_loop() is loop
+            if shared:
+                self.shared += 1
+            else:
+                self.calls += 1
+                task = self._tasks[key] = loop.create_task(fn())
+                task.add_done_callback(lambda t: self._release(key, t))
+        return await asyncio.shield(task), shared
+
+    def _release(self, key: Hashable, task: "asyncio.Task[Any]") -> None:
+        with self._lock:
+            if self._tasks.get(key) is task:
+                del self._tasks[key]
+        if not task.cancelled():
+            task.exception()  # retrieved, so an unawaited failure is not logged as never retrieved
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {"inFlight": len(self._tasks), "calls": self.calls, "shared": self.shared}
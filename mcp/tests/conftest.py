@@ -0,0 +1,54 @@
+import pathlib
+import socket
+import sys
+import threading
+
+import pytest
+
+# server.py and its helpers are flat modules run from mcp/, not an installed package
+sys.path.insert(0, str(pathlib.Path(__file__).parents[1]))
+
+from stub_server import start_stub, stop_stub  # noqa: E402
+
+
+@pytest.fixture
+def stub_api():
+    api = start_stub()
+    try:
+        yield api
+    finally:
+        stop_stub(api)
+
+
+@pytest.fixture
+def legacy_stub_api():
+    """Stub without the long-poll route, like servers predating /api/job/:id/wait."""
+    api = start_stub(long_poll=False)
+    try:
+        yield api
+    finally:
+        stop_stub(api)
+
+
+@pytest.fixture
+def hanging_api():
+    """Base URL of a server that accepts connections and never answers."""
+    listener = socket.create_server(("127.0.0.1", 0))
+    held = []
+
+    def accept():
+        while True:
+            try:
+                conn, _ = listener.accept()
+            except OSError:
+                return
+            held.append(conn)
+
+    threading.Thread(target=accept, daemon=True).start()
+    host, port = listener.getsockname()[:2]
+    try:
+        yield f"http://{host}:{port}"
+    finally:
+        listener.close()
+        for conn in held:
+            conn.close()
@@ -0,0 +1,131 @@
+"""In-process stand-in for the Node server, shared by tests and benchmarks."""
+
+import json
+import math
+import threading
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qsl
+
+
+MAX_WAIT_MS = 25000
+
+
+def wait_timeout_seconds(raw):
+    """?timeoutMs= as the Node server reads it: clamped to [0, 25s], full wait only when missing or non-numeric."""
+    try:
+        requested = float(raw)
+    except (TypeError, ValueError):
+        requested = float("nan")
+    if not math.isfinite(requested):
+        requested = MAX_WAIT_MS
+    return max(0, min(MAX_WAIT_MS, requested)) / 1000
+
+
+class StubApi:
+    """In-process stand-in for the Node server's /api/generate-tests and /api/job routes."""
+
+    def __init__(self, long_poll=True):
+        self.jobs = {}
+        self.submissions = []
+        self.long_poll = long_poll
+        self.requests = []
+        self.lock = threading.Lock()
+        # One condition per job so an update only wakes that job's long-polls
+        self.changed = {}
+        self.httpd = None
+
+    @property
+    def base_url(self):
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def set_status(self, job_id, status, result=None):
+        with self.lock:
+            self.jobs[job_id] = {"id": job_id, "status": status, "result": result, "error": None, "progress": []}
+            self._condition(job_id).notify_all()
+
+    def _condition(self, job_id):
+        if job_id not in self.changed:
+            self.changed[job_id] = threading.Condition(self.lock)
+        return self.changed[job_id]
+
+    def wait_for_change(self, job_id, seen, timeout):
+        """Mirror of GET /api/job/:id/wait in server/src/index.ts."""
+        with self.lock:
+            job = self.jobs.get(job_id)
+            if job is None or job["status"] != seen:
+                return job, True
+            changed = self._condition(job_id).wait_for(lambda: self.jobs[job_id]["status"] != seen, timeout)
+            return self.jobs[job_id], bool(changed)
+
+    def handler(self):
+        api = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            disable_nagle_algorithm = True
+
+            def log_message(self, *args):
+                pass
+
+            def _send(self, code, body):
+                raw = json.dumps(body).encode()
+                self.send_response(code)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(raw)))
+                self.end_headers()
+                self.wfile.write(raw)
+
+            def do_GET(self):
+                path, _, query = self.path.partition("?")
+                with api.lock:
+                    api.requests.append(path)
+                if api.long_poll and path.startswith("/api/job/") and path.endswith("/wait"):
+                    params = dict(parse_qsl(query))
+                    job_id = path[len("/api/job/"):-len("/wait")]
+                    timeout = wait_timeout_seconds(params.get("timeoutMs"))
+                    job, changed = api.wait_for_change(job_id, params.get("status", ""), timeout)
+                    if job is None:
+                        return self._send(404, {"error": "job not found", "id": job_id})
+                    return self._send(200, dict(job, changed=changed))
+                if path.startswith("/api/job/") and "/" not in path[len("/api/job/"):]:
+                    job_id = path[len("/api/job/"):]
+                    with api.lock:
+                        job = api.jobs.get(job_id)
+                    if job is None:
+                        return self._send(404, {"error": "job not found", "id": job_id})
+                    return self._send(200, job)
+                self._send(404, {"error": "not found"})
+
+            def do_POST(self):
+                length = int(self.headers.get("Content-Length", "0"))
+                body = json.loads(self.rfile.read(length) or b"{}")
+                if self.path.startswith("/api/generate-tests"):
+                    job_id = str(uuid.uuid4())
+                    with api.lock:
+                        api.submissions.append(body)
+                    api.set_status(job_id, "queued")
+                    return self._send(200, {"jobId": job_id, "status": "queued"})
+                self._send(404, {"error": "not found"})
+
+        return Handler
+
+
+class _StubHTTPServer(ThreadingHTTPServer):
+    # Benchmarks open hundreds of connections at once
+    request_queue_size = 1024
+
+
+def start_stub(long_poll=True):
+    api = StubApi(long_poll=long_poll)
+    api.httpd = _StubHTTPServer(("127.0.0.1", 0), api.handler())
+    api.httpd.daemon_threads = True
+    thread = threading.Thread(target=api.httpd.serve_forever, kwargs={"poll_interval": 0.05}, daemon=True)
+    thread.start()
+    return api
+
+
+def stop_stub(api):
+    api.httpd.shutdown()
+    api.httpd.server_close()
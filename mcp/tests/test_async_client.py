@@ -0,0 +1,47 @@
+import asyncio
+
+from async_client import AsyncApiClient
+
+
+def test_connections_are_reused(stub_api):
+    stub_api.set_status("job-1", "running")
+    client = AsyncApiClient(pool_size=2, retries=0)
+
+    async def scenario():
+        for _ in range(20):
+            resp = await client.get(f"{stub_api.base_url}/api/job/job-1", endpoint="job")
+            assert resp.json()["status"] == "running"
+        await client.aclose()
+
+    asyncio.run(scenario())
+    stats = client.stats()
+    assert stats["calls"] == 20
+    assert stats["requestsSent"] == 20
+    assert stats["connectionsOpened"] == 1
+    assert stats["connectionsReused"] == 19
+
+
+def test_endpoint_timeouts_capped():
+    client = AsyncApiClient(max_timeout=5, connect_timeout=3)
+    assert client.timeout_for("generate") == 5
+    assert client.timeout_for("unknown") == 5
+    assert AsyncApiClient(connect_timeout=3).timeout_for("generate") == 10
+
+
+def test_calls_to_one_endpoint_spread_across_shards(stub_api):
+    stub_api.set_status("job-1", "running")
+    client = AsyncApiClient(pool_size=64, retries=0)  # four shards of 16
+    url = f"{stub_api.base_url}/api/job/job-1/wait?status=running&timeoutMs=300"
+
+    async def scenario():
+        loop = asyncio.get_running_loop()
+        start = loop.time()
+        responses = await asyncio.gather(*(client.get(url, endpoint="job") for _ in range(40)))
+        elapsed = loop.time() - start
+        await client.aclose()
+        return responses, elapsed
+
+    responses, elapsed = asyncio.run(scenario())
+    assert all(r.json()["changed"] is False for r in responses)
+    assert client.stats()["connectionsOpened"] == 40
+    assert elapsed < 0.6  # one round of held polls, not three queued behind a 16-connection shard
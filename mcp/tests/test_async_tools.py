@@ -0,0 +1,134 @@
+import asyncio
+import json
+import threading
+import time
+
+import pytest
+
+import server
+from async_client import AsyncApiClient
+from job_wait import AsyncJobWaiter
+
+TERMINAL = {"generated", "passed", "failed"}
+
+
+@pytest.fixture
+def tools(stub_api, monkeypatch):
+    """server.py tools pointed at the stub, with a fresh async client."""
+    client = AsyncApiClient(retries=0)
+    monkeypatch.setattr(server.settings_store, "load", lambda: {"apiBaseUrl": stub_api.base_url})
+    monkeypatch.setattr(server, "api_client", client)
+    monkeypatch.setattr(server, "job_waiter", AsyncJobWaiter(client, server.build_api_url, TERMINAL))
+    return server
+
+
+def test_submit_and_wait(tools, stub_api):
+    async def scenario():
+        started = json.loads(await tools.test_modification("add login", [{"file": "a.py", "patch": "+x"}], []))
+        job_id = started["jobId"]
+        threading.Timer(0.2, stub_api.set_status, (job_id, "passed")).start()
+        status = json.loads(await tools.check_status(job_id))
+        return started, status
+
+    started, status = asyncio.run(scenario())
+
+    assert started["ok"] is True
+    assert stub_api.submissions[0]["modifiedFiles"][0]["diff"] == "+x"
+    assert status["job"]["status"] == "passed"
+
+
+def test_many_concurrent_waits_share_one_loop(tools, stub_api):
+    ids = [f"job-{i}" for i in range(200)]
+    for job_id in ids:
+        stub_api.set_status(job_id, "running")
+
+    def finish_all():
+        time.sleep(0.3)
+        for job_id in ids:
+            stub_api.set_status(job_id, "generated")
+
+    async def scenario():
+        threading.Thread(target=finish_all, daemon=True).start()
+        return await asyncio.gather(*(tools.wait_job_step(job_id, 5) for job_id in ids))
+
+    start = time.monotonic()
+    results = asyncio.run(scenario())
+
+    assert time.monotonic() - start < 3
+    assert all(json.loads(r)["job"]["status"] == "generated" for r in results)
+
+
+def test_wait_jobs_any_cancels_pending_waits(tools, stub_api):
+    for job_id in ("a", "b"):
+        stub_api.set_status(job_id, "running")
+    threading.Timer(0.2, stub_api.set_status, ("a", "failed")).start()
+
+    start = time.monotonic()
+    result = json.loads(asyncio.run(tools.wait_jobs(["a", "b"], mode="any", timeout_seconds=10)))
+
+    assert time.monotonic() - start < 1
+    assert result["finished"] == ["a"]
+    assert result["pending"] == ["b"]
+    assert result["jobs"]["b"]["job"]["status"] == "running"
+
+
+FLOW = 'url: "http://localhost:3000"\n---\n- launchApp\n- tapOn: "Login"\n'
+
+
+def test_finished_jobs_feed_the_flow_index(tools, stub_api, tmp_path, monkeypatch):
+    monkeypatch.setattr(server, "_flow_index", server.FlowIndex(tmp_path / "flows.sqlite3"))
+    result = {"tests": [FLOW], "summary": [{"file": "a.yaml", "success": False, "durationMs": 1200}]}
+    stub_api.set_status("job-1", "generated", result)
+    first = json.loads(asyncio.run(tools.get_job_status("job-1")))
+    assert first["job"]["result"]["flowIndex"][0]["seenBefore"] is False
+
+    # Same flow modulo layout in a later job: the earlier failure comes back
+    result = {"tests": [FLOW.replace('"Login"', '" Login "')], "summary": [{"file": "b.yaml", "success": True}]}
+    stub_api.set_status("job-2", "generated", result)
+    second = json.loads(asyncio.run(tools.check_status("job-2")))["job"]["result"]["flowIndex"][0]
+    assert second["seenBefore"] is True
+    assert second["previous"]["job_id"] == "job-1" and second["previous"]["status"] == "failed"
+    assert second["previous"]["result"] == {"file": "a.yaml", "durationMs": 1200}
+
+    looked_up = json.loads(tools.lookup_flow(FLOW))
+    assert looked_up["ok"] and looked_up["runs"] == 2 and looked_up["previous"]["job_id"] == "job-2"
+
+    stub_api.set_status("job-3", "running")
+    assert json.loads(asyncio.run(tools.get_job_status("job-3")))["job"]["result"] is None
+    server._flow_index.close()
+
+
+def test_lint_flows_reports_diagnostics(tools, tmp_path):
+    report = json.loads(tools.lint_flows([FLOW, "nope"]))
+    assert report["ok"] is False and report["diagnostics"][0]["rule"] == "syntax"
+
+    flow = FLOW + '- runFlow:\n  file: "login.yaml"\n'
+    report = json.loads(tools.lint_flows([flow], base_dir=str(tmp_path)))
+    assert [d["rule"] for d in report["diagnostics"]] == ["missing-file"]
+    (tmp_path / "login.yaml").write_text(FLOW)
+    assert json.loads(tools.lint_flows([flow], base_dir=str(tmp_path)))["ok"] is True
+
+
+def test_blocking_work_runs_off_the_event_loop(tools, stub_api, monkeypatch):
+    threads = {}
+
+    def spy(name, fn):
+        def wrapper(*args, **kwargs):
+            threads.setdefault(name, set()).add(threading.get_ident())
+            return fn(*args, **kwargs)
+        monkeypatch.setattr(server, name, wrapper)
+
+    for name in ("payload_fingerprint", "index_job_flows"):
+        spy(name, getattr(server, name))
+
+    async def scenario():
+        started = json.loads(await tools.test_modification("add login", [], []))
+        stub_api.set_status(started["jobId"], "passed")
+        await tools.get_job_status(started["jobId"])
+        await tools.get_jobs_status([started["jobId"]])
+        return threading.get_ident()
+
+    loop_thread = asyncio.run(scenario())
+
+    assert set(threads) == {"payload_fingerprint", "index_job_flows"}
+    assert all(loop_thread not in idents for idents in threads.values())
@@ -0,0 +1,111 @@
+import os
+import subprocess
+
+import pytest
+
+import server
+from diff_cache import DiffCache
+from git_changes import collect_changes
+from untracked_diff import iter_new_file_diffs
+
+
+def git(repo, *args):
+    return subprocess.run(
+        ["git", "-C", str(repo), "-c", "user.email=t@t", "-c", "user.name=t", *args],
+        check=True,
+        capture_output=True,
+        text=True,
+    ).stdout
+
+
+def touch_later(path, content):
+    """Rewrite `path` and bump mtime so the change is visible even on coarse clocks."""
+    st = path.stat()
+    path.write_text(content)
+    os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000_000))
+
+
+@pytest.fixture
+def repo(tmp_path):
+    git(tmp_path, "init", "-q")
+    for name in ("a.txt", "b.txt", "r.txt"):
+        (tmp_path / name).write_text(f"{name}\n")
+    git(tmp_path, "add", ".")
+    git(tmp_path, "commit", "-qm", "init")
+    (tmp_path / "a.txt").write_text("a.txt\nmore\n")
+    (tmp_path / "b.txt").write_text("b.txt\nmore\n")
+    git(tmp_path, "mv", "r.txt", "r2.txt")
+    (tmp_path / "new.txt").write_text("new\n")
+    return tmp_path
+
+
+def test_lru_evicts_by_bytes():
+    cache = DiffCache(max_bytes=10)
+    cache.put("a", "aaaa", 4)
+    cache.put("b", "bbbb", 4)
+    assert cache.get("a") == "aaaa"  # a is now most recent
+    cache.put("c", "cccc", 4)
+    assert cache.get("b") is None
+    cache.put("huge", "x" * 11, 11)  # larger than the whole cache: not stored
+    assert cache.get("huge") is None
+    assert cache.stats() == {
+        "entries": 2, "bytes": 8, "maxBytes": 10,
+        "hits": 1, "misses": 2, "evictions": 1, "hitRatio": 0.333,
+    }
+
+
+def test_unchanged_tree_only_runs_status(repo):
+    cache = DiffCache()
+    first = collect_changes(repo, cache=cache)
+    assert first.git_invocations == 2
+    assert first.patches == collect_changes(repo).patches
+    assert "rename from r.txt" in first.patch_for("r2.txt")
+
+    second = collect_changes(repo, cache=cache)
+    assert second.git_invocations == 1
+    assert second.patches == first.patches
+    assert cache.hits == 3
+
+
+def test_only_changed_files_are_rediffed(repo):
+    cache = DiffCache()
+    collect_changes(repo, cache=cache)
+    touch_later(repo / "a.txt", "a.txt\nedited\n")
+    misses = cache.misses
+
+    changes = collect_changes(repo, cache=cache)
+    assert cache.misses - misses == 1
+    assert "+edited" in changes.patch_for("a.txt")
+    assert changes.patches == collect_changes(repo).patches
+
+
+def test_staging_and_commit_invalidate(repo):
+    cache = DiffCache()
+    collect_changes(repo, cache=cache)
+    git(repo, "add", "a.txt")  # index blob changes, worktree does not
+    misses = cache.misses
+    collect_changes(repo, cache=cache)
+    assert cache.misses - misses == 1
+
+    git(repo, "commit", "-qm", "second")  # new HEAD sha: every key changes
+    changes = collect_changes(repo, cache=cache)
+    assert changes.patches == collect_changes(repo).patches
+    assert changes.patch_for("a.txt") == ""
+
+
+def test_untracked_diffs_reuse_cache(repo):
+    cache = DiffCache()
+    paths = [repo / "new.txt"]
+    first = "".join(iter_new_file_diffs(repo, paths, cache=cache))
+    assert "".join(iter_new_file_diffs(repo, paths, cache=cache)) == first
+    assert (cache.hits, cache.misses) == (1, 1)
+    touch_later(repo / "new.txt", "newer\n")
+    assert "+newer\n" in "".join(iter_new_file_diffs(repo, paths, cache=cache))
+
+
+def test_server_stats_tool(repo, monkeypatch):
+    monkeypatch.setattr(server, "diff_cache", DiffCache())
+    server.per_file_diffs(repo)
+    server.per_file_diffs(repo)
+    stats = server.json.loads(server.get_diff_cache_stats())
+    assert stats["hits"] == 4 and stats["misses"] == 4
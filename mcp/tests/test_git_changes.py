@@ -0,0 +1,100 @@
+import subprocess
+
+import pytest
+
+import server
+from git_changes import collect_changes, parse_status_v2
+
+
+def git(repo, *args):
+    return subprocess.run(
+        ["git", "-C", str(repo), "-c", "user.email=t@t", "-c", "user.name=t", *args],
+        check=True,
+        capture_output=True,
+        text=True,
+    ).stdout
+
+
+@pytest.fixture
+def repo(tmp_path):
+    git(tmp_path, "init", "-q")
+    (tmp_path / "a.txt").write_text("a\n")
+    (tmp_path / "b c.txt").write_text("b\n")
+    (tmp_path / "r.txt").write_text("rename me\n")
+    (tmp_path / "d").mkdir()
+    (tmp_path / "d" / "q.txt").write_text("q\n")
+    (tmp_path / "keep.txt").write_text("same\n")
+    (tmp_path / ".gitignore").write_text("*.log\n")
+    git(tmp_path, "add", ".")
+    git(tmp_path, "commit", "-qm", "init")
+
+    (tmp_path / "a.txt").write_text("a\na2\n")           # unstaged edit
+    (tmp_path / "b c.txt").write_text("b\ns\n")          # staged edit, path with space
+    git(tmp_path, "add", "b c.txt")
+    git(tmp_path, "mv", "r.txt", "r2.txt")                # staged rename
+    (tmp_path / "d" / "q.txt").unlink()                   # deletion
+    (tmp_path / "new.txt").write_text("new\n")            # untracked
+    (tmp_path / "t\tx.txt").write_text("tab\n")           # untracked, quoted by git
+    (tmp_path / "debug.log").write_text("ignored\n")
+    return tmp_path
+
+
+def test_status_parsing(repo):
+    changes = collect_changes(repo)
+    assert changes.git_invocations == 2
+    assert changes.tracked == ["a.txt", "b c.txt", "d/q.txt", "r2.txt"]
+    assert changes.untracked == ["new.txt", "t\tx.txt"]
+    assert changes.changes["r2.txt"].orig_path == "r.txt"
+
+
+def test_patches_match_per_file_git_diff(repo):
+    changes = collect_changes(repo)
+    for rel in changes.tracked:
+        expected = git(repo, "diff", "--no-ext-diff", "HEAD", "--", rel)
+        if rel == "r2.txt":
+            # pathspec-limited diff cannot see the rename source
+            assert "rename from r.txt" in changes.patch_for(rel)
+            continue
+        assert changes.patch_for(rel) == expected, rel
+
+
+def test_quoted_tracked_path(repo):
+    git(repo, "add", "t\tx.txt")
+    changes = collect_changes(repo)
+    assert changes.patch_for("t\tx.txt").endswith("+tab\n")
+
+
+def test_server_helpers_use_change_set(repo):
+    changed = server.list_changed_files(repo)
+    assert [p.relative_to(repo).as_posix() for p in changed] == [
+        "a.txt", "b c.txt", "d/q.txt", "new.txt", "r2.txt", "t\tx.txt",
+    ]
+    diffs = server.per_file_diffs(repo)
+    assert "+a2" in diffs[repo / "a.txt"]
+    assert diffs[repo / "new.txt"].startswith("diff --git a/new.txt b/new.txt\nnew file mode")
+    # Files outside the change set keep the old semantics
+    assert server.per_file_diff(repo, repo / "keep.txt") == ""
+    assert "+ignored" in server.per_file_diff(repo, repo / "debug.log")
+
+
+def test_unborn_head(tmp_path):
+    git(tmp_path, "init", "-q")
+    (tmp_path / "x.txt").write_text("x\n")
+    git(tmp_path, "add", "x.txt")
+    changes = collect_changes(tmp_path)
+    assert changes.tracked == ["x.txt"]
+    assert "+x" in changes.patch_for("x.txt")
+
+
+def test_parse_status_v2_records():
+    raw = (
+        "1 .M N... 100644 100644 100644 aaa aaa file one.txt\0"
+        "2 R. N... 100644 100644 100644 bbb bbb R100 new.txt\0old.txt\0"
+        "u UU N... 100644 100644 100644 100644 c1 c2 c3 conflict.txt\0"
+        "? untracked.txt\0"
+    )
+    changes = parse_status_v2(raw)
+    assert changes["file one.txt"].status == ".M"
+    assert changes["new.txt"].orig_path == "old.txt"
+    assert changes["conflict.txt"].tracked
+    assert not changes["untracked.txt"].tracked
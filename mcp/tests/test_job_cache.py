@@ -0,0 +1,119 @@
+import asyncio
+import json
+
+import pytest
+
+import server
+from async_client import AsyncApiClient
+from diff_cache import DiffCache
+from job_cache import JobCache, content_hash, payload_fingerprint
+from job_wait import AsyncJobWaiter
+
+TERMINAL = {"generated", "passed", "failed"}
+
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def tools(stub_api, monkeypatch):
+    client = AsyncApiClient(retries=0)
+    monkeypatch.setattr(server.settings_store, "load", lambda: {"apiBaseUrl": stub_api.base_url})
+    monkeypatch.setattr(server, "api_client", client)
+    monkeypatch.setattr(server, "job_waiter", AsyncJobWaiter(client, server.build_api_url, TERMINAL))
+    monkeypatch.setattr(server, "job_cache", JobCache(ttl_seconds=60, max_entries=8, enabled=True))
+    return server
+
+
+def submit(tools, message="add login", files=None, related=(), **kwargs):
+    files = files if files is not None else [{"path": "/app/a.py", "diff": "+x"}, {"path": "/app/b.py", "diff": "+y"}]
+    return json.loads(asyncio.run(tools.test_modification(message, files, list(related), **kwargs)))
+
+
+def test_fingerprint_ignores_order_but_not_content(tmp_path):
+    related = tmp_path / "r.py"
+    related.write_text("v1")
+    a, b = {"path": "/app/a.py", "diff": "+x"}, {"path": "/app/b.py", "diff": "+y"}
+    key = payload_fingerprint("msg", [a, b], [str(related), "/gone.py"])
+
+    assert payload_fingerprint("msg", [b, a], ["/gone.py", str(related)]) == key
+    assert payload_fingerprint("msg", [a, dict(b, diff="+z")], [str(related), "/gone.py"]) != key
+    assert payload_fingerprint("other", [a, b], [str(related), "/gone.py"]) != key
+    assert payload_fingerprint("msg", [a, b], [str(related), "/gone.py"], base_url="http://x") != key
+    related.write_text("v2")
+    assert payload_fingerprint("msg", [a, b], [str(related), "/gone.py"]) != key
+
+
+def test_content_hash_is_memoized_by_stat(tmp_path):
+    path = tmp_path / "r.py"
+    path.write_text("v1")
+    cache = DiffCache()
+    first = content_hash(path, cache)
+    assert content_hash(path, cache) == first and cache.hits == 1
+    assert content_hash(tmp_path / "gone.py", cache) is None
+
+
+def test_ttl_and_size_bound():
+    clock = Clock()
+    cache = JobCache(ttl_seconds=10, max_entries=2, enabled=True, clock=clock)
+    cache.put("a", "job-a")
+    cache.put("b", "job-b")
+    assert cache.get("a").job_id == "job-a"
+    cache.put("c", "job-c")  # evicts b, the least recently used
+    assert cache.get("b") is None and cache.get("a") is not None
+    clock.now = 11
+    assert cache.get("a") is None
+    assert cache.stats()["evictions"] == 2
+
+
+def test_record_keeps_results_and_drops_failures():
+    cache = JobCache(enabled=True)
+    cache.put("a", "job-a")
+    cache.put("b", "job-b")
+    cache.record({"ok": True, "status": 200, "job": {"id": "job-a", "status": "running"}})
+    assert cache.get("a").job is None
+    cache.record({"ok": True, "status": 200, "job": {"id": "job-a", "status": "passed", "result": {"tests": []}}})
+    assert cache.get("a").job["result"] == {"tests": []}
+    cache.record({"ok": True, "status": 200, "job": {"id": "job-b", "status": "failed"}})
+    assert cache.get("b") is None
+    cache.record({"ok": False, "status": 404, "job": {"error": "job not found", "id": "job-a"}})
+    assert cache.get("a") is None
+
+
+def test_resubmission_reuses_the_job(tools, stub_api):
+    first = submit(tools)
+    again = submit(tools, files=[{"path": "/app/b.py", "diff": "+y"}, {"path": "/app/a.py", "diff": "+x"}])
+    assert len(stub_api.submissions) == 1
+    assert again["cached"] is True and again["jobId"] == first["jobId"] and again["finished"] is False
+
+    stub_api.set_status(first["jobId"], "passed", {"tests": ["flow"]})
+    asyncio.run(tools.get_job_status(first["jobId"]))
+    done = submit(tools)
+    assert done["job"]["status"] == "passed" and done["job"]["result"]["tests"] == ["flow"]
+
+    fresh = submit(tools, use_cache=False)
+    assert "cached" not in fresh and len(stub_api.submissions) == 2
+
+
+def test_failed_job_is_resubmitted(tools, stub_api):
+    first = submit(tools)
+    stub_api.set_status(first["jobId"], "failed")
+    asyncio.run(tools.check_status(first["jobId"]))
+    assert submit(tools)["jobId"] != first["jobId"]
+    assert len(stub_api.submissions) == 2
+
+
+def test_disabled_cache_reuses_only_running_jobs(tools, stub_api, monkeypatch):
+    monkeypatch.setattr(server, "job_cache", JobCache(enabled=False))
+    first = submit(tools)
+    assert submit(tools)["jobId"] == first["jobId"]
+    stub_api.set_status(first["jobId"], "passed")
+    asyncio.run(tools.get_job_status(first["jobId"]))
+    assert submit(tools)["jobId"] != first["jobId"]
+    assert len(stub_api.submissions) == 2
+    assert json.loads(tools.get_job_cache_stats())["enabled"] is False
@@ -0,0 +1,146 @@
+import asyncio
+import threading
+import time
+
+from async_client import AsyncApiClient
+from job_wait import LONG_POLL_GRACE_SECONDS, AsyncJobWaiter, PollBackoff
+
+TERMINAL = {"generated", "passed", "failed"}
+
+
+def make_waiter(api):
+    return AsyncJobWaiter(AsyncApiClient(retries=0), lambda path: api.base_url + path, TERMINAL)
+
+
+def finish_later(api, job_id, delay, status="passed"):
+    finished = {}
+
+    def run():
+        time.sleep(delay)
+        finished["at"] = time.monotonic()
+        api.set_status(job_id, status)
+
+    threading.Thread(target=run, daemon=True).start()
+    return finished
+
+
+def test_long_poll_returns_promptly_on_state_change(stub_api):
+    stub_api.set_status("job-1", "running")
+    waiter = make_waiter(stub_api)
+    finished = finish_later(stub_api, "job-1", 0.3)
+
+    result = asyncio.run(waiter.wait("job-1", timeout_seconds=5))
+    returned_at = time.monotonic()
+
+    assert result["job"]["status"] == "passed"
+    assert returned_at - finished["at"] < 0.1
+    assert waiter.long_poll_supported() is True
+    # One request to learn the current state, one held until the change
+    assert stub_api.requests == ["/api/job/job-1/wait", "/api/job/job-1/wait"]
+
+
+def test_long_poll_times_out_with_latest_state(stub_api):
+    stub_api.set_status("job-1", "running")
+    waiter = make_waiter(stub_api)
+
+    start = time.monotonic()
+    result = asyncio.run(waiter.wait("job-1", timeout_seconds=0.5))
+
+    assert result["job"]["status"] == "running"
+    assert 0.4 < time.monotonic() - start < 2
+
+
+def test_zero_hold_answers_at_once(stub_api):
+    # Under 1 ms left truncates to timeoutMs=0, which must not mean the server's full 25 s
+    stub_api.set_status("job-1", "running")
+    waiter = make_waiter(stub_api)
+
+    async def scenario():
+        loop = asyncio.get_running_loop()
+        return await waiter._long_poll("job-1", "running", 0.0004, loop.time() + 1)
+
+    start = time.monotonic()
+    result = asyncio.run(scenario())
+
+    assert result["job"]["status"] == "running" and result["job"]["changed"] is False
+    assert time.monotonic() - start < 0.5
+
+def test_unknown_job_returns_404(stub_api):
+    waiter = make_waiter(stub_api)
+    result = asyncio.run(waiter.wait("missing", timeout_seconds=2))
+    assert result["ok"] is False
+    assert result["status"] == 404
+
+
+def test_falls_back_to_adaptive_polling(legacy_stub_api):
+    legacy_stub_api.set_status("job-1", "running")
+    waiter = make_waiter(legacy_stub_api)
+    finished = finish_later(legacy_stub_api, "job-1", 0.5)
+
+    result = asyncio.run(waiter.wait("job-1", timeout_seconds=5))
+
+    assert result["job"]["status"] == "passed"
+    assert waiter.long_poll_supported() is False
+    assert time.monotonic() - finished["at"] < 0.5
+    # Route probed once, then plain status polls with growing gaps
+    assert legacy_stub_api.requests.count("/api/job/job-1/wait") == 1
+    assert legacy_stub_api.requests.count("/api/job/job-1") < 10
+
+
+def test_poll_backoff_grows_and_resets():
+    backoff = PollBackoff(initial=0.1, factor=2, maximum=0.5)
+    assert [backoff.next_delay() for _ in range(5)] == [0.1, 0.2, 0.4, 0.5, 0.5]
+    backoff.reset()
+    assert backoff.next_delay() == 0.1
+
+
+def test_fetch_many_keeps_order_and_dedupes(stub_api):
+    for job_id, status in [("a", "running"), ("b", "passed"), ("c", "queued")]:
+        stub_api.set_status(job_id, status)
+    waiter = make_waiter(stub_api)
+
+    results = asyncio.run(waiter.fetch_many(["c", "a", "b", "a", "missing"]))
+
+    assert list(results) == ["c", "a", "b", "missing"]
+    assert [r["job"].get("status") for r in results.values()] == ["queued", "running", "passed", None]
+    assert results["missing"]["status"] == 404
+
+
+def test_wait_many_any_returns_on_first_terminal(stub_api):
+    for job_id in ("a", "b", "c"):
+        stub_api.set_status(job_id, "running")
+    waiter = make_waiter(stub_api)
+    finished = finish_later(stub_api, "b", 0.3, status="failed")
+
+    results = asyncio.run(waiter.wait_many(["a", "b", "c"], timeout_seconds=10, mode="any"))
+
+    assert time.monotonic() - finished["at"] < 0.5
+    assert results["b"]["job"]["status"] == "failed"
+    assert results["a"]["job"]["status"] == "running"
+    assert results["c"]["job"]["status"] == "running"
+
+
+def test_wait_many_all_waits_for_every_job(stub_api):
+    for job_id in ("a", "b"):
+        stub_api.set_status(job_id, "running")
+    waiter = make_waiter(stub_api)
+    finish_later(stub_api, "a", 0.1)
+    finished = finish_later(stub_api, "b", 0.4, status="generated")
+
+    results = asyncio.run(waiter.wait_many(["a", "b"], timeout_seconds=10, mode="all"))
+
+    assert time.monotonic() - finished["at"] < 0.1
+    assert [r["job"]["status"] for r in results.values()] == ["passed", "generated"]
+
+
+def test_wait_keeps_its_deadline_against_a_hanging_server(hanging_api):
+    # Default retry budget: read timeouts must still not be retried past the deadline
+    waiter = AsyncJobWaiter(AsyncApiClient(), lambda path: hanging_api + path, TERMINAL)
+
+    start = time.monotonic()
+    result = asyncio.run(waiter.wait("job-1", timeout_seconds=0.5))
+    elapsed = time.monotonic() - start
+
+    assert elapsed < 0.5 + LONG_POLL_GRACE_SECONDS + 0.5
+    assert result["ok"] is False
+    assert result["error"] == "failed to get status: ReadTimeout"
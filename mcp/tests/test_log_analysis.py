@@ -0,0 +1,98 @@
+import json
+import random
+
+import pytest
+
+import log_analysis
+import server
+from log_analysis import MAX_LINE_CHARS, LogAnalyzer, analyze_logs
+
+MAESTRO_LOG = """\
+Running on emulator-5554
+ > Flow login
+Launch app "com.example"... COMPLETED
+Tap on "Login"... COMPLETED
+Assert that "Welcome" is visible... FAILED
+Element not found: Text matching regex: Welcome
+Timed out waiting for animation to end
+[Failed] login (12s) (Assertion is false: "Welcome" is visible)
+"""
+
+
+def per_line(text, **kw):
+    analyzer = LogAnalyzer(**kw)
+    for line in text.split("\n"):
+        analyzer.feed(line)
+    return analyzer.result()
+
+
+@pytest.mark.parametrize("text", ["", "a", "a\n", "a\nb", "\n\n", "x\r\nError\r\n"])
+def test_line_splitting_matches_split(tmp_path, text):
+    assert analyze_logs(text).total_lines == len(text.split("\n"))
+    path = tmp_path / "log.txt"
+    path.write_bytes(text.encode())
+    assert analyze_logs(path, from_file=True).result() == per_line(text)
+
+
+@pytest.mark.parametrize("seed", range(12))
+def test_block_scan_matches_per_line_feed(tmp_path, monkeypatch, seed):
+    rng = random.Random(seed)
+    pool = ["plain", "", "Error x", "step... FAILED", "timed out", "[Passed] f", "Flow Failed", "ok\r", "İ ERROR"]
+    text = "\n".join(rng.choice(pool) if rng.random() < 0.2 else f"debug {i}" for i in range(3000))
+    kw = dict(tail_lines=[0, 1, 5, 40][seed % 4], context_lines=[0, 1, 3][seed % 3], max_error_contexts=7)
+    expected = per_line(text, **kw)
+    assert analyze_logs(text, **kw).result() == expected
+
+    monkeypatch.setattr(log_analysis, "READ_BLOCK_CHARS", rng.choice([1, 7, 100, 4096]))
+    path = tmp_path / "log.txt"
+    path.write_bytes(text.encode())
+    assert analyze_logs(path, from_file=True, **kw).result() == expected
+
+
+def test_counters_context_and_tail():
+    analysis = analyze_logs(MAESTRO_LOG, tail_lines=3, context_lines=1)
+    result = analysis.result()
+    assert analysis.failed and not analysis.passed
+    assert result["total_lines"] == len(MAESTRO_LOG.split("\n"))
+    assert result["counters"] == {
+        "flowPassed": 0, "flowFailed": 1, "stepFailures": 1, "timeouts": 1, "errorLines": 2,
+    }
+    assert result["error_details"] == [
+        'Assert that "Welcome" is visible... FAILED',
+        '[Failed] login (12s) (Assertion is false: "Welcome" is visible)',
+    ]
+    assert result["error_context"][0] == {
+        "line": 5,
+        "lines": ['Tap on "Login"... COMPLETED', 'Assert that "Welcome" is visible... FAILED',
+                  "Element not found: Text matching regex: Welcome"],
+    }
+    assert result["tail"].splitlines()[-1] == '[Failed] login (12s) (Assertion is false: "Welcome" is visible)'
+    assert result["tail_lines"] == 3
+
+
+def test_legacy_semantics_preserved():
+    # Any case-sensitive "Error" marks failure; error lines only reported on failure
+    assert analyze_logs("NullPointerError at x").failed
+    passed = analyze_logs("step failed but retried\n[Passed] flow")
+    assert passed.passed and not passed.failed
+    assert passed.result()["error_details"] == []
+
+
+def test_memory_is_bounded():
+    analysis = analyze_logs("x" * 10_000 + "\n" + "error\n" * 5000, max_error_contexts=4)
+    result = analysis.result()
+    assert len(result["error_context"]) == 4
+    assert result["error_context"][-1]["line"] == 5001
+    assert len(analysis.result()["tail"].split("\n")) == 40
+    assert len(analyze_logs("y" * 10_000).result()["tail"]) == MAX_LINE_CHARS + 1
+
+
+def test_give_feedback_from_file(tmp_path):
+    log = tmp_path / "maestro.log"
+    log.write_text(MAESTRO_LOG)
+    out = json.loads(server.give_feedback("", [], "login", logs_path=str(log)))
+    assert out["status"] == "failed"
+    assert "raw_logs" not in out["logs_analysis"]
+    assert out["logs_analysis"]["counters"]["stepFailures"] == 1
+    missing = json.loads(server.give_feedback("", [], "login", logs_path=str(tmp_path / "nope.log")))
+    assert missing["ok"] is False
@@ -0,0 +1,87 @@
+import base64
+import hashlib
+import json
+
+import pytest
+
+import screenshots
+import server
+from screenshots import describe_screenshot
+
+Image = pytest.importorskip("PIL.Image")
+
+
+@pytest.fixture
+def png(tmp_path):
+    path = tmp_path / "shot.png"
+    Image.new("RGB", (1080, 1920), (30, 120, 200)).save(path)
+    return path
+
+
+def test_reference_mode_has_no_bytes(png):
+    entry = describe_screenshot(png)
+    assert entry == {
+        "path": str(png),
+        "filename": "shot.png",
+        "exists": True,
+        "size": png.stat().st_size,
+        "mimeType": "image/png",
+        "sha256": hashlib.sha256(png.read_bytes()).hexdigest(),
+    }
+
+
+def test_embed_mode_has_single_data_url(png):
+    entry = describe_screenshot(png, "embed")
+    assert "base64" not in entry
+    prefix, payload = entry["data"].split(",", 1)
+    assert prefix == "data:image/png;base64"
+    assert base64.b64decode(payload) == png.read_bytes()
+
+
+def test_thumbnail_generated_once_per_hash(png, tmp_path):
+    cache = tmp_path / "thumbs"
+    first = describe_screenshot(png, "thumbnail", max_px=64, cache_dir=cache)
+    thumb = first["thumbnail"]
+    assert thumb["path"] == str(cache / f"{first['sha256']}-64.png")
+    with Image.open(thumb["path"]) as img:
+        assert max(img.size) == 64
+
+    # Same content elsewhere reuses the cached file
+    copy = tmp_path / "copy.png"
+    copy.write_bytes(png.read_bytes())
+    mtime = (cache / f"{first['sha256']}-64.png").stat().st_mtime_ns
+    second = describe_screenshot(copy, "thumbnail", max_px=64, cache_dir=cache)
+    assert second["thumbnail"]["path"] == thumb["path"]
+    assert (cache / f"{first['sha256']}-64.png").stat().st_mtime_ns == mtime
+    assert len(list(cache.iterdir())) == 1
+
+
+def test_missing_and_hash_cache(png, tmp_path):
+    missing = describe_screenshot(tmp_path / "nope.png")
+    assert missing["exists"] is False and "error" in missing
+
+    digest = screenshots.file_sha256(png)
+    png.write_bytes(png.read_bytes() + b"\0")  # size changes -> rehash
+    assert screenshots.file_sha256(png) != digest
+
+
+def test_hash_cache_is_bounded(tmp_path, monkeypatch):
+    cache = screenshots.DiffCache(max_bytes=500)
+    monkeypatch.setattr(screenshots, "_hash_cache", cache)
+    for i in range(20):
+        path = tmp_path / f"shot-{i}.png"
+        path.write_bytes(bytes([i]))
+        assert screenshots.file_sha256(path) == hashlib.sha256(bytes([i])).hexdigest()
+    assert cache.stats()["bytes"] <= 500 and cache.evictions > 0
+    screenshots.file_sha256(tmp_path / "shot-19.png")
+    assert cache.hits == 1
+
+
+def test_give_feedback_modes(png):
+    out = json.loads(server.give_feedback("Flow Passed", [str(png)], "make it blue"))
+    assert out["status"] == "passed"
+    assert "data" not in out["screenshots"][0]
+    embedded = json.loads(server.give_feedback("", [str(png)], "x", screenshot_mode="embed"))
+    assert embedded["screenshots"][0]["data"].startswith("data:image/png;base64,")
+    bad = json.loads(server.give_feedback("", [], "x", screenshot_mode="inline"))
+    assert bad["ok"] is False
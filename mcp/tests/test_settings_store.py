@@ -0,0 +1,50 @@
+import json
+import os
+
+from settings_store import SettingsStore
+
+
+def test_missing_file_returns_defaults(tmp_path):
+    store = SettingsStore(tmp_path / "config.json", defaults={"copperEnabled": False})
+    assert store.load() == {"copperEnabled": False}
+
+
+def test_cached_until_file_changes(tmp_path):
+    path = tmp_path / "config.json"
+    path.write_text(json.dumps({"copperEnabled": False}))
+    store = SettingsStore(path)
+
+    assert store.load() == {"copperEnabled": False}
+    store.load()
+    assert store.reloads == 1
+
+    # Another process (e.g. toggle_copper.py) rewrites the file
+    path.write_text(json.dumps({"copperEnabled": True, "apiBaseUrl": "http://x"}))
+    assert store.load()["copperEnabled"] is True
+    assert store.reloads == 2
+
+
+def test_load_returns_copy(tmp_path):
+    store = SettingsStore(tmp_path / "config.json", defaults={"copperEnabled": False})
+    settings = store.load()
+    settings["copperEnabled"] = True
+    assert store.load() == {"copperEnabled": False}
+
+
+def test_save_is_atomic_and_refreshes_cache(tmp_path):
+    path = tmp_path / "config.json"
+    store = SettingsStore(path)
+    store.save({"copperEnabled": True})
+
+    assert json.loads(path.read_text()) == {"copperEnabled": True}
+    assert store.load() == {"copperEnabled": True}
+    assert store.reloads == 0
+    # No temp files left behind
+    assert os.listdir(tmp_path) == ["config.json"]
+
+
+def test_invalid_json_falls_back_to_defaults(tmp_path):
+    path = tmp_path / "config.json"
+    path.write_text("{not json")
+    store = SettingsStore(path, defaults={"copperEnabled": False})
+    assert store.load() == {"copperEnabled": False}
@@ -0,0 +1,105 @@
+import asyncio
+import json
+import threading
+
+import pytest
+
+import server
+from async_client import AsyncApiClient
+from job_cache import JobCache
+from job_wait import AsyncJobWaiter
+from single_flight import SingleFlight
+
+TERMINAL = {"generated", "passed", "failed"}
+
+
+@pytest.fixture
+def tools(stub_api, monkeypatch):
+    client = AsyncApiClient(retries=0)
+    monkeypatch.setattr(server.settings_store, "load", lambda: {"apiBaseUrl": stub_api.base_url})
+    monkeypatch.setattr(server, "api_client", client)
+    monkeypatch.setattr(server, "job_waiter", AsyncJobWaiter(client, server.build_api_url, TERMINAL))
+    monkeypatch.setattr(server, "job_cache", JobCache(enabled=False))
+    monkeypatch.setattr(server, "submit_flights", SingleFlight())
+    monkeypatch.setattr(server, "status_flights", SingleFlight())
+    return server
+
+
+def test_concurrent_calls_share_one_run():
+    flights = SingleFlight()
+    runs = []
+
+    async def work(key):
+        runs.append(key)
+        await asyncio.sleep(0.05)
+        return {"key": key}
+
+    async def scenario():
+        calls = [flights.do("a", lambda: work("a")) for _ in range(5)] + [flights.do("b", lambda: work("b"))]
+        return await asyncio.gather(*calls)
+
+    results = asyncio.run(scenario())
+    assert runs == ["a", "b"]
+    assert [shared for _, shared in results] == [False, True, True, True, True, False]
+    assert results[0][0] is results[4][0]
+    assert flights.stats() == {"inFlight": 0, "calls": 2, "shared": 4}
+
+
+def test_errors_reach_every_caller_and_free_the_key():
+    flights = SingleFlight()
+
+    async def fail():
+        await asyncio.sleep(0.01)
+        raise RuntimeError("boom")
+
+    async def scenario():
+        results = await asyncio.gather(flights.do("k", fail), flights.do("k", fail), return_exceptions=True)
+        again, shared = await flights.do("k", lambda: asyncio.sleep(0, "ok"))
+        return results, again, shared
+
+    results, again, shared = asyncio.run(scenario())
+    assert all(isinstance(r, RuntimeError) for r in results)
+    assert (again, shared) == ("ok", False)
+
+
+def test_cancelled_caller_does_not_cancel_the_others():
+    flights = SingleFlight()
+
+    async def scenario():
+        first = asyncio.ensure_future(flights.do("k", lambda: asyncio.sleep(0.05, "done")))
+        await asyncio.sleep(0)
+        second = asyncio.ensure_future(flights.do("k", lambda: asyncio.sleep(0, "other")))
+        await asyncio.sleep(0)
+        first.cancel()
+        return await second
+
+    assert asyncio.run(scenario()) == ("done", True)
+
+
+def test_burst_of_identical_submissions_starts_one_job(tools, stub_api):
+    files = [{"path": "/app/a.py", "diff": "+x"}]
+
+    async def scenario():
+        return await asyncio.gather(*(tools.test_modification("add login", files, []) for _ in range(10)))
+
+    started = [json.loads(r) for r in asyncio.run(scenario())]
+    assert len(stub_api.submissions) == 1
+    assert len({r["jobId"] for r in started}) == 1
+    assert sum(r.get("coalesced", False) for r in started) == 9
+
+    # Later identical submissions attach to the running job even with the result cache off
+    assert json.loads(asyncio.run(tools.test_modification("add login", files, [])))["jobId"] == started[0]["jobId"]
+    assert len(stub_api.submissions) == 1
+
+
+def test_waiters_share_one_status_stream(tools, stub_api):
+    stub_api.set_status("job-1", "running")
+    threading.Timer(0.2, stub_api.set_status, ("job-1", "passed")).start()
+
+    async def scenario():
+        return await asyncio.gather(*(tools.check_status("job-1") for _ in range(20)))
+
+    results = [json.loads(r) for r in asyncio.run(scenario())]
+    assert all(r["job"]["status"] == "passed" for r in results)
+    assert stub_api.requests.count("/api/job/job-1/wait") <= 2  # one long-poll per state change, not per waiter
+    assert json.loads(tools.get_job_cache_stats())["statusRequests"]["shared"] == 19
@@ -0,0 +1,140 @@
+import subprocess
+import tracemalloc
+
+import pytest
+
+import server
+import untracked_diff
+from diff_cache import DiffCache
+from untracked_diff import iter_new_file_diff, iter_new_file_diffs
+
+
+def render(repo, path, **kw):
+    return "".join(iter_new_file_diff(repo, path, **kw))
+
+
+def git_new_file_diff(repo, rel):
+    out = subprocess.run(
+        ["git", "-C", str(repo), "diff", "--no-index", "--no-ext-diff", "/dev/null", rel],
+        capture_output=True,
+        text=True,
+    ).stdout
+    # Everything after the index line (which carries the real blob sha)
+    return out.split("\n", 3)[3]
+
+
+@pytest.mark.parametrize(
+    "content",
+    ["a\nb\n", "single\n", "no newline", "x\n\ny\n", "café\n"],
+)
+def test_text_body_matches_git(tmp_path, content):
+    (tmp_path / "f.txt").write_text(content, encoding="utf-8")
+    diff = render(tmp_path, tmp_path / "f.txt")
+    assert diff.startswith("diff --git a/f.txt b/f.txt\nnew file mode 100644\nindex 0000000..0000000\n")
+    assert diff.split("\n", 3)[3] == git_new_file_diff(tmp_path, "f.txt")
+
+
+def test_empty_executable_and_binary(tmp_path):
+    (tmp_path / "empty").write_text("")
+    assert render(tmp_path, tmp_path / "empty").endswith("index 0000000..0000000\n")
+
+    script = tmp_path / "run.sh"
+    script.write_text("echo hi\n")
+    script.chmod(0o755)
+    assert "new file mode 100755\n" in render(tmp_path, script)
+
+    (tmp_path / "img.png").write_bytes(b"\x89PNG\r\n\x1a\n\0\0\0\rIHDR" + bytes(range(256)) * 100)
+    diff = render(tmp_path, tmp_path / "img.png")
+    assert diff.endswith("Binary files /dev/null and b/img.png differ\n")
+    assert "+" not in diff.split("\n", 3)[3]
+
+
+def test_per_file_budget_truncates_on_line_boundary(tmp_path):
+    (tmp_path / "big.log").write_text("".join(f"line {i:04d}\n" for i in range(1000)))  # 10 bytes/line
+    diff = render(tmp_path, tmp_path / "big.log", max_bytes=95)
+    assert "@@ -0,0 +1,9 @@\n" in diff
+    assert diff.count("\n+line ") == 9
+    assert diff.endswith("\\ Truncated: 9910 of 10000 bytes omitted (per-file diff budget 95 bytes)\n")
+
+
+def test_total_budget_omits_remaining_files(tmp_path):
+    paths = []
+    for name in ("a.txt", "b.txt", "c.txt"):
+        (tmp_path / name).write_text("0123456789\n" * 10)  # 110 bytes
+        paths.append(tmp_path / name)
+    diff = "".join(iter_new_file_diffs(tmp_path, paths, max_file_bytes=1000, max_total_bytes=150))
+    a, b, c = diff.split("diff --git ")[1:]
+    assert "\\ Truncated" not in a and a.count("\n+0") == 10
+    assert b.count("\n+0") == 3 and "\\ Truncated: 77 of 110" in b
+    assert c == "a/c.txt b/c.txt\nnew file mode 100644\nindex 0000000..0000000\n" \
+        "\\ Omitted: total untracked diff budget exhausted\n"
+
+
+def test_peak_memory_independent_of_file_size(tmp_path):
+    def write(path, size_mb):
+        with open(path, "w") as fh:
+            line = "x" * 99 + "\n"
+            for _ in range(size_mb * 10486):
+                fh.write(line)
+
+    peaks = []
+    for size_mb in (1, 16):
+        path = tmp_path / f"{size_mb}.log"
+        write(path, size_mb)
+        tracemalloc.start()
+        for _ in iter_new_file_diff(tmp_path, path, max_bytes=64 * 1024):
+            pass
+        peaks.append(tracemalloc.get_traced_memory()[1])
+        tracemalloc.stop()
+    assert peaks[1] < peaks[0] * 1.5 + 64 * 1024
+
+
+def test_server_uses_streaming_producer(tmp_path):
+    subprocess.run(["git", "-C", str(tmp_path), "init", "-q"], check=True)
+    (tmp_path / "new.txt").write_text("one\ntwo\n")
+    (tmp_path / "blob.bin").write_bytes(b"\0" * 10)
+    diffs = server.get_untracked_diffs(tmp_path)
+    assert "Binary files /dev/null and b/blob.bin differ\n" in diffs
+    assert "+one\n+two\n" in diffs
+    assert server.unified_diff_for_new_file(tmp_path, tmp_path / "new.txt").endswith("@@ -0,0 +1,2 @@\n+one\n+two\n")
+
+
+def make_tree(root, count):
+    paths = []
+    for i in range(count):
+        path = root / f"f{i:03d}.txt"
+        if i % 7 == 0:
+            path.write_bytes(b"\0bin" * (i + 1))
+        elif i % 11 == 0:
+            path.write_text("")
+        else:
+            path.write_text("".join(f"{i} line {j}\n" for j in range(i * 3)) + ("tail" if i % 2 else ""))
+        paths.append(path)
+    return paths
+
+
+@pytest.mark.parametrize("pool_kind", ["thread", "process"])
+@pytest.mark.parametrize("total", [10**9, 20_000, 0])
+def test_parallel_output_is_byte_identical(tmp_path, pool_kind, total):
+    paths = make_tree(tmp_path, 60)
+    kw = dict(max_file_bytes=1500, max_total_bytes=total)
+    serial = "".join(iter_new_file_diffs(tmp_path, paths, workers=1, **kw))
+    parallel = "".join(iter_new_file_diffs(
+        tmp_path, paths, workers=4, pool_kind=pool_kind, parallel_threshold=1, **kw,
+    ))
+    assert parallel == serial
+    cached = DiffCache()
+    for _ in range(2):
+        assert "".join(iter_new_file_diffs(
+            tmp_path, paths, workers=4, pool_kind=pool_kind, parallel_threshold=1, cache=cached, **kw,
+        )) == serial
+
+
+def test_small_batches_stay_serial(tmp_path, monkeypatch):
+    paths = make_tree(tmp_path, 5)
+
+    def no_pool(*args):
+        raise AssertionError("pool used below threshold")
+
+    monkeypatch.setattr(untracked_diff, "_executor", no_pool)
+    assert "".join(iter_new_file_diffs(tmp_path, paths, workers=4, parallel_threshold=6))
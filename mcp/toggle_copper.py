@@ -2,28 +2,25 @@
 from __future__ import annotations
 
 import argparse
-import json
 from pathlib import Path
 
+from settings_store import SettingsStore
+
 
 def settings_path() -> Path:
     return (Path(__file__).parent / "config.json").resolve()
 
 
+_store = SettingsStore(settings_path(), defaults={"copperEnabled": False})
+
+
 def load_settings() -> dict:
-    path = settings_path()
-    if path.exists():
-        try:
-            return json.loads(path.read_text(encoding="utf-8"))
-        except Exception:
-            pass
-    return {"copperEnabled": False}
+    return _store.load()
 
 
 def save_settings(data: dict) -> None:
-    path = settings_path()
-    path.parent.mkdir(parents=True, exist_ok=True)
-    path.write_text(json.dumps(data, indent=2), encoding="utf-8")
+    # Write-then-rename so a running MCP server never reads a partial file
+    _store.save(data)
 
 
 def main() -> None:
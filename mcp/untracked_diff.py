@@ -0,0 +1,352 @@
+#!/usr/bin/env python3
+"""
+Streaming, size-bounded "new file" diffs for untracked files.
+
+`git diff` never covers untracked files, so server.py synthesizes their
+patches. Reading each file whole and joining everything into one string lets a
+single stray log or build artifact blow up memory and the payload sent to the
+server. The producers here:
+
+- sniff the first 8000 bytes for NUL (git's heuristic) and emit a git-style
+  "Binary files ... differ" stub instead of content;
+- stream text in newline-aligned 64 KiB blocks instead of reading it whole;
+- stop at a per-file byte budget and at a total budget across all files,
+  leaving a `\\ Truncated...` / `\\ Omitted...` marker line;
+- from MCP_DIFF_PARALLEL_THRESHOLD files up, render files on a bounded
+  thread (or process) pool while emitting them in input order.
+
+Peak memory is bounded by the budgets, not by file size.
+
+Configuration (environment variables):
+    MCP_DIFF_MAX_FILE_BYTES   content bytes diffed per untracked file (default 256 KiB)
+    MCP_DIFF_MAX_TOTAL_BYTES  content bytes diffed across all untracked files (default 4 MiB)
+    MCP_DIFF_WORKERS          parallel render workers (default min(8, CPU count); 1 = serial)
+    MCP_DIFF_POOL             "thread" (default) or "process"
+    MCP_DIFF_PARALLEL_THRESHOLD  fewest files worth parallelizing (default 32)
+"""
+
+from __future__ import annotations
+
+import os
+import stat
+from pathlib import Path
+from collections import deque
+from concurrent.futures import Executor, Future, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import (
+    BinaryIO, Callable, Deque, Dict, Generator, Hashable, Iterable, Iterator, List, NamedTuple, Optional, Tuple,
+)
+
+from diff_cache import DiffCache, file_key
+
+# git treats a file as binary if its first 8000 bytes contain a NUL
+BINARY_SNIFF_BYTES = 8000
+SCAN_CHUNK_BYTES = 64 * 1024
+
+
+def _env_bytes(name: str, default: int) -> int:
+    try:
+        return max(0, int(os.getenv(name, str(default))))
+    except ValueError:
+        return default
+
+
+MAX_FILE_BYTES = _env_bytes("MCP_DIFF_MAX_FILE_BYTES", 256 * 1024)
+MAX_TOTAL_BYTES = _env_bytes("MCP_DIFF_MAX_TOTAL_BYTES", 4 * 1024 * 1024)
+PARALLEL_WORKERS = max(1, _env_bytes("MCP_DIFF_WORKERS", min(8, os.cpu_count() or 1)))
+PARALLEL_THRESHOLD = _env_bytes("MCP_DIFF_PARALLEL_THRESHOLD", 32)
+POOL_KIND = "process" if os.getenv("MCP_DIFF_POOL", "thread") == "process" else "thread"
+
+# Long-lived pools keyed by (kind, workers), created on first parallel call
+_EXECUTORS: Dict[Tuple[str, int], Executor] = {}
+
+
+def _header(rel: str, mode: str) -> str:
+    return (
+        f"diff --git a/{rel} b/{rel}\n"
+        f"new file mode {mode}\n"
+        f"index 0000000..0000000\n"
+    )
+
+
+def _hunk_range(count: int) -> str:
+    # git omits the length when it is 1: "@@ -0,0 +1 @@"
+    return "1" if count == 1 else f"1,{count}"
+
+
+def _scan(fh: BinaryIO, size: int, budget: int) -> Tuple[int, int, bool]:
+    """Count the lines that fit in `budget` bytes without holding them.
+
+    Returns (lines, body_bytes, missing_final_newline). When the file is larger
+    than the budget only complete lines are counted, and body_bytes ends at
+    the last newline inside the budget.
+    """
+    limit = min(size, budget)
+    newlines = 0
+    read = 0
+    last_newline_end = 0
+    while read < limit:
+        chunk = fh.read(min(SCAN_CHUNK_BYTES, limit - read))
+        if not chunk:
+            break
+        newlines += chunk.count(b"\n")
+        pos = chunk.rfind(b"\n")
+        if pos != -1:
+            last_newline_end = read + pos + 1
+        read += len(chunk)
+    if size > budget or read == last_newline_end:
+        return newlines, last_newline_end, False
+    return newlines + 1, read, True
+
+
+def _iter_added(fh: BinaryIO, length: int) -> Iterator[str]:
+    """Yield the next `length` bytes as "+"-prefixed lines, one block at a time.
+
+    Blocks are cut at newlines and decoded in one call each, which keeps the
+    per-line work in C. A line longer than a block is carried over (bounded
+    by `length`, which never exceeds the budget).
+    """
+    carry = b""
+    left = length
+    while left > 0:
+        chunk = fh.read(min(SCAN_CHUNK_BYTES, left))
+        if not chunk:
+            break
+        left -= len(chunk)
+        block = carry + chunk
+        cut = len(block) if left <= 0 else block.rfind(b"\n") + 1
+        carry = block[cut:]
+        if not cut:
+            continue
+        text = block[:cut].decode("utf-8", errors="ignore")
+        if text.endswith("\n"):
+            yield "+" + text[:-1].replace("\n", "\n+") + "\n"
+        else:
+            yield "+" + text.replace("\n", "\n+")
+
+
+def iter_new_file_diff(
+    repo_root: Path,
+    file_path: Path,
+    max_bytes: Optional[int] = None,
+) -> Generator[str, None, Tuple[int, bool]]:
+    """Yield a unified diff that adds `file_path`, chunk by chunk.
+
+    At most `max_bytes` of file content are emitted (default MAX_FILE_BYTES);
+    the rest is replaced by a `\\ Truncated` marker line. The generator
+    returns (content bytes emitted, truncated) for budget accounting.
+    """
+    budget = MAX_FILE_BYTES if max_bytes is None else max(0, max_bytes)
+    rel = file_path.relative_to(repo_root).as_posix()
+    try:
+        st = os.lstat(file_path)
+    except OSError:
+        yield _header(rel, "100644")
+        return 0, False
+
+    if stat.S_ISLNK(st.st_mode):
+        # git stores the link target as the blob, without a trailing newline
+        target = os.readlink(file_path)
+        yield _header(rel, "120000")
+        yield f"--- /dev/null\n+++ b/{rel}\n@@ -0,0 +1 @@\n+{target}\n\\ No newline at end of file\n"
+        return 0, False
+
+    mode = "100755" if st.st_mode & stat.S_IXUSR else "100644"
+    try:
+        fh = open(file_path, "rb")
+    except OSError:
+        yield _header(rel, mode)
+        return 0, False
+
+    with fh:
+        size = os.fstat(fh.fileno()).st_size
+        yield _header(rel, mode)
+        if size == 0:
+            return 0, False
+        if b"\0" in fh.read(BINARY_SNIFF_BYTES):
+            yield f"Binary files /dev/null and b/{rel} differ\n"
+            return 0, False
+
+        fh.seek(0)
+        count, body_bytes, missing_newline = _scan(fh, size, budget)
+        if count:
+            fh.seek(0)
+            yield f"--- /dev/null\n+++ b/{rel}\n@@ -0,0 +{_hunk_range(count)} @@\n"
+            yield from _iter_added(fh, body_bytes)
+            if missing_newline:
+                yield "\n\\ No newline at end of file\n"
+        truncated = size > budget
+        if truncated:
+            yield f"\\ Truncated: {size - body_bytes} of {size} bytes omitted (per-file diff budget {budget} bytes)\n"
+        return body_bytes, truncated
+
+
+class Rendered(NamedTuple):
+    """One file's materialized diff."""
+
+    text: str
+    used: int  # file bytes emitted (counted against the total budget)
+    truncated: bool
+    # Bytes the budget is compared against; 0 when the output cannot depend
+    # on the budget (binary, symlink, empty or unreadable files)
+    size: int
+
+
+def _render(repo_root: Path, path: Path, budget: int) -> Rendered:
+    """Materialize one file's diff. Top-level so process pools can pickle it."""
+    chunks: List[str] = []
+    gen = iter_new_file_diff(repo_root, path, budget)
+    while True:
+        try:
+            chunks.append(next(gen))
+        except StopIteration as stop:
+            used, truncated = stop.value
+            break
+    text = "".join(chunks)
+    size = 0
+    if used or truncated:
+        try:
+            size = os.stat(path).st_size
+        except OSError:
+            pass
+    return Rendered(text, used, truncated, size)
+
+
+def _cache_key(repo_root: Path, path: Path, budget: int) -> Hashable:
+    # New-file diffs do not depend on HEAD; the budget is part of the key
+    return (file_key(repo_root, path.relative_to(repo_root).as_posix()), budget)
+
+
+def _cached_render(repo_root: Path, path: Path, budget: int, cache: Optional[DiffCache]) -> Rendered:
+    if cache is None:
+        return _render(repo_root, path, budget)
+    key = _cache_key(repo_root, path, budget)
+    entry = cache.get(key)
+    if entry is None:
+        entry = _render(repo_root, path, budget)
+        cache.put(key, entry, len(entry.text))
+    return entry
+
+
+def _omitted(repo_root: Path, path: Path) -> str:
+    rel = path.relative_to(repo_root).as_posix()
+    return _header(rel, "100644") + "\\ Omitted: total untracked diff budget exhausted\n"
+
+
+def _executor(kind: str, workers: int) -> Executor:
+    key = (kind, workers)
+    pool = _EXECUTORS.get(key)
+    if pool is None:
+        pool_cls = ProcessPoolExecutor if kind == "process" else ThreadPoolExecutor
+        pool = _EXECUTORS[key] = pool_cls(max_workers=workers)
+    return pool
+
+
+def _prerender(
+    repo_root: Path,
+    paths: List[Path],
+    budget: int,
+    cache: Optional[DiffCache],
+    pool: Executor,
+    window: int,
+    exhausted: Callable[[], bool],
+) -> Iterator[Optional[Rendered]]:
+    """Render `paths` at `budget` on `pool`, yielding results in input order.
+
+    At most `window` files are in flight, which bounds memory; once
+    `exhausted()` the rest are not rendered at all and yield None. Cache
+    lookups stay in this process so process workers only see misses.
+    """
+    pending: Deque[Tuple[Optional[Hashable], Optional["Future[Rendered]"]]] = deque()
+    it = iter(paths)
+
+    def submit() -> bool:
+        path = next(it, None)
+        if path is None:
+            return False
+        if exhausted():
+            pending.append((None, None))
+            return True
+        key = _cache_key(repo_root, path, budget) if cache is not None else None
+        entry = cache.get(key) if cache is not None else None
+        if entry is not None:
+            done: "Future[Rendered]" = Future()
+            done.set_result(entry)
+            pending.append((None, done))
+        else:
+            pending.append((key, pool.submit(_render, repo_root, path, budget)))
+        return True
+
+    for _ in range(window):
+        if not submit():
+            break
+    while pending:
+        key, future = pending.popleft()
+        if future is None:
+            yield None
+        else:
+            entry = future.result()
+            if key is not None and cache is not None:
+                cache.put(key, entry, len(entry.text))
+            yield entry
+        submit()
+
+
+def iter_new_file_diffs(
+    repo_root: Path,
+    paths: Iterable[Path],
+    max_file_bytes: Optional[int] = None,
+    max_total_bytes: Optional[int] = None,
+    cache: Optional[DiffCache] = None,
+    workers: Optional[int] = None,
+    pool_kind: Optional[str] = None,
+    parallel_threshold: Optional[int] = None,
+) -> Iterator[str]:
+    """Yield diffs for several new files, sharing one total content budget.
+
+    Once the total is spent, remaining files get a header plus an
+    `\\ Omitted` marker so the receiver still knows they exist. With a
+    `cache`, each file's diff is reused until its mtime or size changes.
+
+    With at least `parallel_threshold` files and more than one worker, files
+    are rendered at the per-file budget on a thread or process pool and
+    assembled in input order; a file the remaining total would have cut
+    shorter is re-rendered at that smaller budget, so the output is
+    byte-identical to the serial path.
+    """
+    per_file = MAX_FILE_BYTES if max_file_bytes is None else max(0, max_file_bytes)
+    remaining = MAX_TOTAL_BYTES if max_total_bytes is None else max(0, max_total_bytes)
+    workers = PARALLEL_WORKERS if workers is None else max(1, workers)
+    pool_kind = POOL_KIND if pool_kind is None else pool_kind
+    threshold = PARALLEL_THRESHOLD if parallel_threshold is None else parallel_threshold
+
+    if workers > 1:
+        paths = list(paths)
+    if workers > 1 and len(paths) >= threshold:
+        rendered = _prerender(
+            repo_root, paths, per_file, cache, _executor(pool_kind, workers),
+            window=workers * 4, exhausted=lambda: remaining <= 0,
+        )
+        for path, entry in zip(paths, rendered):
+            if remaining <= 0 or entry is None:
+                yield _omitted(repo_root, path)
+                continue
+            budget = min(per_file, remaining)
+            if entry.size > budget:
+                entry = _cached_render(repo_root, path, budget, cache)
+            remaining = 0 if entry.truncated and budget < per_file else remaining - entry.used
+            yield entry.text
+        return
+
+    for path in paths:
+        if remaining <= 0:
+            yield _omitted(repo_root, path)
+            continue
+        budget = min(per_file, remaining)
+        if cache is None:
+            used, truncated = yield from iter_new_file_diff(repo_root, path, budget)
+        else:
+            entry = _cached_render(repo_root, path, budget, cache)
+            used, truncated = entry.used, entry.truncated
+            yield entry.text
+        # Cut short by the total budget: nothing useful fits after this file
+        remaining = 0 if truncated and budget < per_file else remaining - used
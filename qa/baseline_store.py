@@ -0,0 +1,326 @@
+#!/usr/bin/env python3
+"""
+Content-addressed store for approved screenshot baselines.
+
+Approved images are kept once per content hash under qa/baselines/blobs/,
+and qa/baselines/manifest.json maps each screen name to its blob:
+
+    {"version": 1, "baselines": {"home-initial.png": {
+        "sha256": "...", "width": 1170, "height": 2532,
+        "pixel_hash": "...", "approved_at": "2026-10-16T09:30:00Z"}}}
+
+Approving a screen whose file or decoded pixels are unchanged writes
+nothing, and screens with the same content share one blob, so approvals
+cost O(changed screens) in work and in repository growth. The manifest is
+JSON with sorted keys, so approvals read as small diffs in review. Lookups
+are dict reads on the loaded manifest, and the stored sha256 and pixel
+hash let the comparison step (visual_diff.py) recognize unchanged
+screenshots without reading or decoding the baseline at all.
+
+An entry may also list masks: regions with dynamic content (clocks,
+counters, animations) that the comparison ignores. A mask is a pixel
+rectangle or a Maestro-style selector resolved against the view hierarchy
+saved next to each screenshot (see visual_diff.resolve_regions()):
+
+    "masks": [{"rect": [0, 0, 1170, 120], "reason": "status bar"},
+              {"selector": {"text": "\\d+ min ago"}, "padding": 4}]
+
+Masks belong to the screen, so re-approving it keeps them.
+
+    python qa/baseline_store.py approve                 # every PNG in qa/generated/
+    python qa/baseline_store.py approve home-initial.png
+    python qa/baseline_store.py list
+    python qa/baseline_store.py mask home.png --rect 0 0 1170 120 --text '\\d+:\\d+' --reason clock
+    python qa/baseline_store.py migrate                 # move flat qa/baselines/*.png into the store
+    python qa/baseline_store.py gc                      # delete unreferenced blobs
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple, Union
+
+from visual_diff import BASELINES_DIR, GENERATED_DIR, ImageLoadError, file_sha256, load_image, pixel_hash
+
+MANIFEST_NAME = "manifest.json"
+BLOBS_NAME = "blobs"
+MANIFEST_VERSION = 1
+MASK_SELECTOR_KEYS = frozenset({"text", "id"})
+
+
+@dataclass
+class BaselineEntry:
+    sha256: str
+    width: int
+    height: int
+    pixel_hash: str
+    approved_at: str
+    masks: List[Dict[str, Any]] = field(default_factory=list)
+
+    def to_dict(self) -> Dict[str, Any]:
+        data = asdict(self)
+        if not self.masks:
+            del data["masks"]  # keep unmasked entries free of noise in manifest diffs
+        return data
+
+
+@dataclass
+class ApproveResult:
+    added: List[str]
+    updated: List[str]
+    unchanged: List[str]
+    errors: Dict[str, str]
+    blobs_written: int = 0
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+
+def validate_mask(spec: Dict[str, Any]) -> None:
+    """Raise ValueError unless `spec` is a rect or selector mask (see visual_diff.resolve_regions())."""
+    if "rect" in spec:
+        rect = spec["rect"]
+        if not (isinstance(rect, list) and len(rect) == 4 and all(isinstance(v, int) for v in rect)):
+            raise ValueError(f"mask rect must be [x0, y0, x1, y1] in pixels, got {rect!r}")
+        if rect[0] >= rect[2] or rect[1] >= rect[3]:
+            raise ValueError(f"mask rect {rect!r} is empty")
+    elif "selector" in spec:
+        selector = spec["selector"]
+        if not (isinstance(selector, dict) and selector and set(selector) <= MASK_SELECTOR_KEYS):
+            raise ValueError(f"mask selector must map {sorted(MASK_SELECTOR_KEYS)} to patterns, got {selector!r}")
+        if not isinstance(spec.get("padding", 0), int):
+            raise ValueError("mask padding must be an integer")
+    else:
+        raise ValueError(f"mask needs a rect or a selector, got {spec!r}")
+
+
+def _utc_now() -> str:
+    return time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime())
+
+
+class BaselineStore:
+    """The manifest and blob directory under `root` (qa/baselines by default).
+
+    The manifest is read once on construction; changes are written back by
+    save(), atomically. A missing or unreadable manifest is an empty store.
+    """
+
+    def __init__(self, root: Union[str, Path] = BASELINES_DIR):
+        self.root = Path(root)
+        self.manifest_path = self.root / MANIFEST_NAME
+        self.blobs = self.root / BLOBS_NAME
+        self.entries: Dict[str, BaselineEntry] = {}
+        self._dirty = False
+        try:
+            data = json.loads(self.manifest_path.read_text())
+        except (OSError, ValueError):
+            return
+        if isinstance(data, dict) and data.get("version") == MANIFEST_VERSION:
+            for name, entry in data.get("baselines", {}).items():
+                try:
+                    self.entries[name] = BaselineEntry(**entry)
+                except TypeError:
+                    continue
+
+    def __contains__(self, name: str) -> bool:
+        return name in self.entries
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def names(self) -> List[str]:
+        return sorted(self.entries)
+
+    def lookup(self, name: str) -> Optional[BaselineEntry]:
+        return self.entries.get(name)
+
+    def blob_path(self, digest: str) -> Path:
+        return self.blobs / digest[:2] / f"{digest}.png"
+
+    def path(self, name: str) -> Optional[Path]:
+        """The blob holding the approved image for `name`, if any."""
+        entry = self.entries.get(name)
+        return self.blob_path(entry.sha256) if entry else None
+
+    def _store_blob(self, source: Path, digest: str) -> bool:
+        target = self.blob_path(digest)
+        if target.exists():
+            return False
+        target.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=str(target.parent), suffix=".tmp")
+        os.close(fd)
+        try:
+            shutil.copyfile(source, tmp)
+            os.replace(tmp, target)
+        except BaseException:
+            os.unlink(tmp)
+            raise
+        return True
+
+    def approve(self, images: Iterable[Tuple[str, Union[str, Path]]], now: Optional[str] = None) -> ApproveResult:
+        """Make each (name, path) image the baseline for `name`.
+
+        An image whose bytes or decoded pixels match the current baseline
+        leaves the entry untouched. Undecodable images are reported in
+        `errors` and skipped.
+        """
+        now = now or _utc_now()
+        result = ApproveResult([], [], [], {})
+        for name, path in images:
+            path = Path(path)
+            current = self.entries.get(name)
+            try:
+                digest = file_sha256(path)
+                if current is not None and current.sha256 == digest:
+                    result.unchanged.append(name)
+                    continue
+                array = load_image(path)
+            except (OSError, ImageLoadError) as exc:
+                result.errors[name] = str(exc)
+                continue
+            pixels = pixel_hash(array)
+            if current is not None and current.pixel_hash == pixels:
+                result.unchanged.append(name)  # re-encoded, same pixels: keep the existing blob
+                continue
+            if self._store_blob(path, digest):
+                result.blobs_written += 1
+            height, width = array.shape[:2]
+            masks = current.masks if current is not None else []  # masks describe the screen, not one image
+            self.entries[name] = BaselineEntry(digest, width, height, pixels, now, masks)
+            (result.updated if current is not None else result.added).append(name)
+            self._dirty = True
+        return result
+
+    def set_masks(self, name: str, masks: Sequence[Dict[str, Any]]) -> None:
+        """Replace the ignore regions of an approved screen; raises KeyError or ValueError."""
+        entry = self.entries[name]
+        for spec in masks:
+            validate_mask(spec)
+        entry.masks = [dict(spec) for spec in masks]
+        self._dirty = True
+
+    def remove(self, names: Iterable[str]) -> List[str]:
+        removed = [name for name in names if self.entries.pop(name, None) is not None]
+        self._dirty = self._dirty or bool(removed)
+        return removed
+
+    def save(self) -> None:
+        if not self._dirty:
+            return
+        data = {
+            "version": MANIFEST_VERSION,
+            "baselines": {name: self.entries[name].to_dict() for name in sorted(self.entries)},
+        }
+        self.root.mkdir(parents=True, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=str(self.root), suffix=".json.tmp")
+        with os.fdopen(fd, "w") as fh:
+            json.dump(data, fh, indent=2, sort_keys=True)
+            fh.write("\n")
+        os.replace(tmp, self.manifest_path)
+        self._dirty = False
+
+    def gc(self) -> int:
+        """Delete blobs no manifest entry refers to; returns how many."""
+        referenced = {entry.sha256 for entry in self.entries.values()}
+        removed = 0
+        for blob in self.blobs.glob("*/*.png"):
+            if blob.stem not in referenced:
+                blob.unlink()
+                removed += 1
+        return removed
+
+    def flat_images(self) -> List[Tuple[str, Path]]:
+        """Loose PNGs under root (outside the blob directory), as (name, path)."""
+        return [
+            (str(p.relative_to(self.root)), p)
+            for p in sorted(self.root.rglob("*.png"))
+            if p.relative_to(self.root).parts[0] != BLOBS_NAME
+        ]
+
+
+def _generated_images(generated: Path, names: Sequence[str]) -> List[Tuple[str, Path]]:
+    if names:
+        return [(name, generated / name) for name in names]
+    return [(str(p.relative_to(generated)), p) for p in sorted(generated.rglob("*.png"))]
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--root", default=str(BASELINES_DIR), help="baseline store directory")
+    commands = parser.add_subparsers(dest="command", required=True)
+    approve = commands.add_parser("approve", help="approve generated screenshots as baselines")
+    approve.add_argument("names", nargs="*", help="screen names (default: every PNG in --generated)")
+    approve.add_argument("--generated", default=str(GENERATED_DIR))
+    commands.add_parser("list", help="print the manifest as JSON lines")
+    lookup = commands.add_parser("lookup", help="print one entry")
+    lookup.add_argument("name")
+    mask = commands.add_parser("mask", help="set the regions ignored when comparing a screen (none: clear them)")
+    mask.add_argument("name")
+    mask.add_argument("--rect", nargs=4, type=int, action="append", default=[], metavar=("X0", "Y0", "X1", "Y1"))
+    mask.add_argument("--text", action="append", default=[], help="ignore elements whose text matches this regex")
+    mask.add_argument("--id", action="append", default=[], help="ignore elements whose id matches this regex")
+    mask.add_argument("--padding", type=int, default=0, help="pixels added around selector matches")
+    mask.add_argument("--reason", default="", help="why the region is dynamic (kept in the manifest)")
+    mask.add_argument("--append", action="store_true", help="add to the existing masks instead of replacing them")
+    commands.add_parser("migrate", help="move loose PNGs under --root into the store")
+    commands.add_parser("gc", help="delete unreferenced blobs")
+    args = parser.parse_args(argv)
+
+    store = BaselineStore(args.root)
+    if args.command == "list":
+        for name in store.names():
+            print(json.dumps({"name": name, **store.entries[name].to_dict(), "path": str(store.path(name))}))
+        return 0
+    if args.command == "lookup":
+        entry = store.lookup(args.name)
+        print(json.dumps(entry.to_dict() if entry else None))
+        return 0 if entry else 1
+    if args.command == "mask":
+        entry = store.lookup(args.name)
+        if entry is None:
+            print(f"no baseline named {args.name!r}", file=sys.stderr)
+            return 1
+        note = {"reason": args.reason} if args.reason else {}
+        specs = [{"rect": list(rect), **note} for rect in args.rect]
+        specs += [{"selector": {"text": text}, "padding": args.padding, **note} for text in args.text]
+        specs += [{"selector": {"id": id_}, "padding": args.padding, **note} for id_ in args.id]
+        try:
+            store.set_masks(args.name, (entry.masks if args.append else []) + specs)
+        except ValueError as exc:
+            print(str(exc), file=sys.stderr)
+            return 1
+        store.save()
+        print(json.dumps(store.lookup(args.name).to_dict()))
+        return 0
+    if args.command == "gc":
+        print(f"{store.gc()} unreferenced blobs removed", file=sys.stderr)
+        return 0
+
+    images = store.flat_images() if args.command == "migrate" else _generated_images(
+        Path(args.generated), args.names
+    )
+    result = store.approve(images)
+    store.save()
+    if args.command == "migrate":
+        for name, path in images:
+            if name in store and name not in result.errors:
+                path.unlink()
+    print(json.dumps(result.to_dict()))
+    print(
+        f"{len(result.added)} added, {len(result.updated)} updated, {len(result.unchanged)} unchanged, "
+        f"{len(result.errors)} errors; {result.blobs_written} blobs written",
+        file=sys.stderr,
+    )
+    return 1 if result.errors else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""
+Cost of the baseline store as the baseline set grows.
+
+A store of --screens small screenshots is built, then timed: loading the
+manifest, looking every name up, and approving a run where --changed
+screens differ, once passing every generated screen and once only the
+changed names.
+
+Usage:
+    python qa/benchmarks/bench_baseline_store.py [--screens 5000] [--changed 10]
+"""
+
+from __future__ import annotations
+
+import argparse
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+from PIL import Image
+
+QA_DIR = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(QA_DIR))
+
+from baseline_store import BaselineStore  # noqa: E402
+
+
+def write_screens(directory: Path, count: int, changed: int = 0) -> None:
+    directory.mkdir(parents=True, exist_ok=True)
+    for i in range(count):
+        image = np.full((96, 64, 3), i % 251, dtype=np.uint8)
+        image[:8, :8] = (i // 251) % 251
+        if i < changed:
+            image[40:50, 10:50] = 255 - image[40:50, 10:50]
+        Image.fromarray(image).save(directory / f"screen-{i:05d}.png")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--screens", type=int, default=5000)
+    parser.add_argument("--changed", type=int, default=10)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        write_screens(tmp / "v1", args.screens)
+        store = BaselineStore(tmp / "baselines")
+        images = [(p.name, p) for p in sorted((tmp / "v1").iterdir())]
+        start = time.perf_counter()
+        store.approve(images)
+        store.save()
+        print(f"initial approve of {args.screens}: {time.perf_counter() - start:6.2f} s")
+
+        write_screens(tmp / "v2", args.screens, args.changed)
+        start = time.perf_counter()
+        store = BaselineStore(tmp / "baselines")
+        load_ms = (time.perf_counter() - start) * 1000
+        start = time.perf_counter()
+        for name in store.names():
+            store.lookup(name)
+        lookup_us = (time.perf_counter() - start) / len(store) * 1e6
+        print(f"manifest load:        {load_ms:7.1f} ms")
+        print(f"lookup:               {lookup_us:7.2f} us/name")
+
+        everything = [(p.name, p) for p in sorted((tmp / "v2").iterdir())]
+        start = time.perf_counter()
+        result = store.approve(everything)
+        store.save()
+        all_s = time.perf_counter() - start
+        written = result.blobs_written
+        print(f"approve all, {len(result.updated)} changed: {all_s * 1000:7.1f} ms ({written} blobs written)")
+
+        store = BaselineStore(tmp / "baselines")
+        write_screens(tmp / "v3", args.changed)  # back to the v1 content for the changed screens
+        named = [(p.name, p) for p in sorted((tmp / "v3").iterdir())]
+        start = time.perf_counter()
+        result = store.approve(named)
+        store.save()
+        named_ms = (time.perf_counter() - start) * 1000
+        print(f"approve {len(named)} named:     {named_ms:7.1f} ms ({result.blobs_written} blobs written)")
+
+
+if __name__ == "__main__":
+    main()
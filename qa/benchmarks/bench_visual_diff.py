@@ -0,0 +1,149 @@
+#!/usr/bin/env python3
+"""
+Per-pair cost of the visual diff engine on phone-sized screenshots.
+
+Pairs are synthetic 1170x2532 screens (an iPhone 13 screenshot): identical,
+with sub-threshold noise, and with a changed button. Decode is timed
+separately from the NumPy comparison; "diff PNG" is render + save. The
+masked compare ignores the status bar and three selector-resolved rows of
+the changed screen; its mask cost is resolving and rasterizing the masks.
+
+The run section compares a --screens directory where most screenshots
+match their baselines: 90% byte-identical, 5% re-encoded with identical
+pixels, 5% changed. It is timed as a full decode-and-compare of every pair,
+and through compare_dirs() with a cold and a warm DecodeCache.
+
+Usage:
+    python qa/benchmarks/bench_visual_diff.py [--pairs 10] [--screens 200]
+"""
+
+from __future__ import annotations
+
+import argparse
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+from PIL import Image
+
+QA_DIR = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(QA_DIR))
+
+from visual_diff import (  # noqa: E402
+    DecodeCache, compare, compare_dirs, compare_files, ignore_mask, load_image, render_diff, resolve_regions,
+    save_png,
+)
+
+WIDTH, HEIGHT = 1170, 2532
+
+
+def make_screen(seed: int) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    image = np.full((HEIGHT, WIDTH, 3), 245, dtype=np.uint8)
+    for top in range(100, HEIGHT - 200, 300):
+        image[top:top + 180, 60:WIDTH - 60] = rng.integers(0, 255, size=3, dtype=np.uint8)
+        text = image[top + 40:top + 140:6, 100:WIDTH - 100]
+        text[:] = rng.integers(0, 60, size=text.shape, dtype=np.uint8)
+    return image
+
+
+def timed(fn, pairs: int) -> float:
+    start = time.perf_counter()
+    for _ in range(pairs):
+        fn()
+    return (time.perf_counter() - start) / pairs * 1000
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--pairs", type=int, default=10)
+    parser.add_argument("--screens", type=int, default=200)
+    args = parser.parse_args()
+
+    base = make_screen(0)
+    noisy = np.clip(base.astype(np.int16) + np.random.default_rng(1).integers(-3, 4, base.shape), 0, 255)
+    noisy = noisy.astype(np.uint8)
+    changed = base.copy()
+    changed[400:520, 200:700] = (20, 180, 60)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        paths = {}
+        for label, image in (("base", base), ("noisy", noisy), ("changed", changed)):
+            paths[label] = Path(tmp) / f"{label}.png"
+            Image.fromarray(image).save(paths[label])
+
+        decode = timed(lambda: load_image(paths["base"]), args.pairs)
+        print(f"decode PNG:          {decode:7.1f} ms/image")
+        for label, image in (("identical", base.copy()), ("noise", noisy), ("changed", changed)):
+            ms = timed(lambda: compare(base, image), args.pairs)
+            result, _ = compare(base, image)
+            print(f"compare {label:10s}   {ms:7.1f} ms/pair  -> {result.status}")
+        hierarchy = {"attributes": {"bounds": f"[0,0][{WIDTH // 3},{HEIGHT // 3}]"}, "children": [
+            {"attributes": {"text": f"{i} min ago", "bounds": f"[40,{40 + i * 100}][200,{60 + i * 100}]"}}
+            for i in range(3)
+        ]}
+        specs = [{"rect": [0, 0, WIDTH, 140]}, {"selector": {"text": r"\d+ min ago"}, "padding": 6}]
+
+        def masked_compare() -> None:
+            boxes, _ = resolve_regions(specs, (WIDTH, HEIGHT), hierarchy)
+            compare(base, changed, ignore=ignore_mask(boxes, (HEIGHT, WIDTH)))
+
+        def mask_only() -> None:
+            ignore_mask(resolve_regions(specs, (WIDTH, HEIGHT), hierarchy)[0], (HEIGHT, WIDTH))
+
+        print(f"mask regions:        {timed(mask_only, args.pairs):7.1f} ms/pair")
+        print(f"compare masked:      {timed(masked_compare, args.pairs):7.1f} ms/pair")
+        result, mask = compare(base, changed)
+        render = timed(lambda: save_png(render_diff(changed, mask, result.boxes), Path(tmp) / "d.png"), args.pairs)
+        print(f"diff PNG:            {render:7.1f} ms/pair")
+        total = timed(lambda: compare_files(paths["base"], paths["changed"], Path(tmp) / "d.png"), args.pairs)
+        print(f"compare_files:       {total:7.1f} ms/pair (changed, decode + compare + diff PNG)")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        run(Path(tmp), args.screens)
+
+
+def run(tmp: Path, screens: int) -> None:
+    baselines, generated = tmp / "baselines", tmp / "generated"
+    baselines.mkdir()
+    generated.mkdir()
+    changed = 0
+    for i in range(screens):
+        image = make_screen(i % 20)  # a suite revisits a handful of screen layouts
+        name = f"screen-{i:03d}.png"
+        Image.fromarray(image).save(baselines / name)
+        if i % 20 == 0:
+            image = image.copy()
+            image[400:520, 200:700] = (20, 180, 60)
+            Image.fromarray(image).save(generated / name)
+            changed += 1
+        elif i % 20 == 1:
+            Image.fromarray(image).save(generated / name, compress_level=9)
+        else:
+            (generated / name).write_bytes((baselines / name).read_bytes())
+
+    def full_decode() -> None:
+        for path in sorted(generated.iterdir()):
+            compare(load_image(baselines / path.name), load_image(path))
+
+    start = time.perf_counter()
+    full_decode()
+    full = time.perf_counter() - start
+    cache = DecodeCache(tmp / "cache")
+    start = time.perf_counter()
+    compare_dirs(baselines, generated, cache=cache)
+    cold_s = time.perf_counter() - start
+    start = time.perf_counter()
+    results = compare_dirs(baselines, generated, cache=cache)
+    warm_s = time.perf_counter() - start
+    stages = {stage: sum(r.stage == stage for r in results) for stage in ("file_hash", "pixel_hash", "pixels")}
+    print(f"run of {screens} screens ({changed} changed): {stages}")
+    print(f"  decode + compare all:  {full:6.2f} s")
+    print(f"  cold decode cache:     {cold_s:6.2f} s")
+    print(f"  warm decode cache:     {warm_s:6.2f} s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+"""
+Wall time of a full visual diff report for a large screenshot run.
+
+A run of --screens phone-sized screenshots (5% changed, the rest
+byte-identical or re-encoded) is reported with 1 worker and with -j
+workers, thumbnails on; the decode cache starts cold for each.
+
+Usage:
+    python qa/benchmarks/bench_visual_report.py [--screens 200] [-j 4]
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from PIL import Image
+
+QA_DIR = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(QA_DIR))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from bench_visual_diff import make_screen  # noqa: E402
+from visual_report import generate  # noqa: E402
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--screens", type=int, default=200)
+    parser.add_argument("-j", "--workers", type=int, default=os.cpu_count() or 1)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        baselines, generated = tmp / "baselines", tmp / "generated"
+        baselines.mkdir()
+        generated.mkdir()
+        for i in range(args.screens):
+            image = make_screen(i % 20)
+            name = f"screen-{i:03d}.png"
+            Image.fromarray(image).save(baselines / name)
+            if i % 20 == 0:
+                image = image.copy()
+                image[400 + i:520 + i, 200:700] = (20, 180, 60)
+            Image.fromarray(image).save(generated / name, compress_level=9 if i % 20 == 1 else 6)
+
+        for workers in sorted({1, args.workers}):
+            start = time.perf_counter()
+            results = generate(
+                baselines, generated, tmp / f"report-{workers}", workers=workers, cache_dir=str(tmp / f"cache-{workers}")
+            )
+            seconds = time.perf_counter() - start
+            changed = sum(r.status == "changed" for r in results)
+            print(f"{workers} worker(s): {seconds:6.2f} s for {len(results)} screens ({changed} changed, 10 thumbnails)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,5 @@
+import pathlib
+import sys
+
+# visual_diff.py and friends are flat modules in qa/, not an installed package
+sys.path.insert(0, str(pathlib.Path(__file__).parents[1]))
@@ -0,0 +1,148 @@
+import json
+
+import numpy as np
+import pytest
+from PIL import Image
+
+import baseline_store
+import visual_diff
+from baseline_store import BaselineStore
+
+
+def png(path, value=200, size=(40, 30), **save_args):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    image = np.full((size[1], size[0], 3), value, dtype=np.uint8)
+    image[5:10, 5:10] = 0
+    Image.fromarray(image).save(path, **save_args)
+    return path
+
+
+def test_approve_adds_entries_and_blobs(tmp_path):
+    store = BaselineStore(tmp_path / "baselines")
+    home = png(tmp_path / "gen" / "home.png")
+    result = store.approve([("home.png", home)], now="2026-01-01T00:00:00Z")
+    store.save()
+    assert result.added == ["home.png"] and result.blobs_written == 1
+
+    entry = BaselineStore(tmp_path / "baselines").lookup("home.png")
+    assert (entry.width, entry.height) == (40, 30)
+    assert entry.sha256 == visual_diff.file_sha256(home)
+    assert entry.approved_at == "2026-01-01T00:00:00Z"
+    assert store.path("home.png").read_bytes() == home.read_bytes()
+    manifest = json.loads((tmp_path / "baselines" / "manifest.json").read_text())
+    assert list(manifest["baselines"]) == ["home.png"]
+
+
+def test_unchanged_approvals_write_nothing(tmp_path):
+    store = BaselineStore(tmp_path / "baselines")
+    home = png(tmp_path / "gen" / "home.png")
+    store.approve([("home.png", home)], now="t0")
+    store.save()
+    manifest = (tmp_path / "baselines" / "manifest.json").stat().st_mtime_ns
+
+    reencoded = png(tmp_path / "gen2" / "home.png", compress_level=9)
+    assert reencoded.read_bytes() != home.read_bytes()
+    store = BaselineStore(tmp_path / "baselines")
+    result = store.approve([("home.png", home), ("home.png", reencoded)], now="t1")
+    store.save()
+    assert result.unchanged == ["home.png", "home.png"] and result.blobs_written == 0
+    assert (tmp_path / "baselines" / "manifest.json").stat().st_mtime_ns == manifest
+    assert store.lookup("home.png").approved_at == "t0"
+
+
+def test_identical_screens_share_a_blob(tmp_path):
+    store = BaselineStore(tmp_path / "baselines")
+    a, b = png(tmp_path / "gen" / "a.png"), png(tmp_path / "gen" / "b.png")
+    result = store.approve([("a.png", a), ("b.png", b)])
+    assert result.blobs_written == 1
+    assert store.path("a.png") == store.path("b.png")
+
+
+def test_update_and_gc(tmp_path):
+    store = BaselineStore(tmp_path / "baselines")
+    store.approve([("home.png", png(tmp_path / "v1.png", value=200))])
+    old_blob = store.path("home.png")
+    result = store.approve([("home.png", png(tmp_path / "v2.png", value=100))])
+    assert result.updated == ["home.png"]
+    assert store.gc() == 1
+    assert not old_blob.exists() and store.path("home.png").exists()
+
+
+def test_undecodable_images_are_reported(tmp_path):
+    pointer = tmp_path / "lfs.png"
+    pointer.write_text("version https://git-lfs.github.com/spec/v1\n")
+    store = BaselineStore(tmp_path / "baselines")
+    result = store.approve([("lfs.png", pointer), ("gone.png", tmp_path / "gone.png")])
+    assert set(result.errors) == {"lfs.png", "gone.png"}
+    assert len(store) == 0
+
+
+def test_comparison_uses_manifest_hashes(tmp_path, monkeypatch):
+    store = BaselineStore(tmp_path / "baselines")
+    store.approve([("home.png", png(tmp_path / "approved.png"))])
+    store.save()
+    gen = tmp_path / "generated"
+    png(gen / "home.png", compress_level=9)  # same pixels, different bytes
+
+    def no_baseline_decode(path):
+        assert "blobs" not in str(path), "baseline decoded despite a matching pixel hash"
+        return original(path)
+
+    original = visual_diff.load_image
+    monkeypatch.setattr(visual_diff, "load_image", no_baseline_decode)
+    [result] = visual_diff.compare_dirs(tmp_path / "baselines", gen, store=store)
+    assert (result.name, result.status, result.stage) == ("home.png", "identical", "pixel_hash")
+
+
+def test_cli_approve_and_migrate(tmp_path, capsys):
+    root, gen = tmp_path / "baselines", tmp_path / "generated"
+    png(root / "legacy.png", value=50)
+    png(gen / "home.png")
+    assert baseline_store.main(["--root", str(root), "migrate"]) == 0
+    assert not (root / "legacy.png").exists()
+    assert baseline_store.main(["--root", str(root), "approve", "--generated", str(gen)]) == 0
+    assert BaselineStore(root).names() == ["home.png", "legacy.png"]
+    capsys.readouterr()
+    assert baseline_store.main(["--root", str(root), "lookup", "home.png"]) == 0
+    assert json.loads(capsys.readouterr().out)["width"] == 40
+    assert baseline_store.main(["--root", str(root), "lookup", "nope.png"]) == 1
+
+    # The diff CLI picks the manifest up and ignores the blob directory
+    cache = ["--cache", str(tmp_path / "cache")]
+    assert visual_diff.main(["--baselines", str(root), "--generated", str(gen), *cache]) == 1  # legacy.png missing
+    png(gen / "legacy.png", value=50)
+    assert visual_diff.main(["--baselines", str(root), "--generated", str(gen), *cache]) == 0
+
+
+def test_masks_survive_approval_and_are_validated(tmp_path):
+    store = BaselineStore(tmp_path / "baselines")
+    store.approve([("home.png", png(tmp_path / "v1.png", value=200))])
+    store.set_masks("home.png", [{"rect": [0, 0, 40, 4], "reason": "status bar"}])
+    store.approve([("home.png", png(tmp_path / "v2.png", value=100))])
+    store.save()
+    entry = BaselineStore(tmp_path / "baselines").lookup("home.png")
+    assert entry.masks == [{"rect": [0, 0, 40, 4], "reason": "status bar"}]
+
+    for bad in ({"rect": [5, 5, 5, 9]}, {"rect": "top"}, {"selector": {"xpath": "//x"}}, {"region": 1}):
+        with pytest.raises(ValueError):
+            store.set_masks("home.png", [bad])
+    store.set_masks("home.png", [])
+    assert "masks" not in store.lookup("home.png").to_dict()
+
+
+def test_cli_mask(tmp_path, capsys):
+    root = tmp_path / "baselines"
+    store = BaselineStore(root)
+    store.approve([("home.png", png(tmp_path / "home.png"))])
+    store.save()
+    args = ["--root", str(root), "mask", "home.png"]
+    assert baseline_store.main([*args, "--rect", "0", "0", "40", "4", "--reason", "clock"]) == 0
+    assert baseline_store.main([*args, "--append", "--text", r"\d+ min ago", "--padding", "2"]) == 0
+    assert BaselineStore(root).lookup("home.png").masks == [
+        {"rect": [0, 0, 40, 4], "reason": "clock"},
+        {"selector": {"text": r"\d+ min ago"}, "padding": 2},
+    ]
+    assert baseline_store.main([*args, "--rect", "9", "0", "1", "4"]) == 1
+    assert baseline_store.main(["--root", str(root), "mask", "nope.png"]) == 1
+    assert baseline_store.main(args) == 0  # no regions: clear
+    assert BaselineStore(root).lookup("home.png").masks == []
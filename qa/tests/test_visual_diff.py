@@ -0,0 +1,309 @@
+import json
+
+import numpy as np
+import pytest
+from PIL import Image
+
+import visual_diff
+from visual_diff import (
+    DiffResult, ImageLoadError, Tolerance, bounding_boxes, compare, compare_dirs, compare_files,
+    load_image, tile_ssim,
+)
+
+
+def screen(seed=0, height=200, width=120):
+    """A screenshot-like image: flat panels with some text-like noise."""
+    rng = np.random.default_rng(seed)
+    image = np.full((height, width, 3), 245, dtype=np.uint8)
+    image[20:60, 10:width - 10] = (30, 90, 200)
+    rows = image[80::8, 10:width - 20]
+    rows[:] = rng.integers(0, 80, size=rows.shape, dtype=np.uint8)
+    return image
+
+
+def save(array, path):
+    Image.fromarray(array).save(path)
+    return path
+
+
+def test_identical_pair():
+    image = screen()
+    result, mask = compare(image, image.copy())
+    assert result.status == "identical"
+    assert result.changed_pixels == 0 and result.boxes == []
+    assert not mask.any()
+
+
+def test_noise_below_threshold_is_within_tolerance():
+    base = screen()
+    noisy = base.copy()
+    noisy[::3, ::3] = np.clip(noisy[::3, ::3].astype(int) + 4, 0, 255).astype(np.uint8)
+    result, _ = compare(base, noisy)
+    assert result.status == "within_tolerance"
+    assert result.changed_pixels == 0
+    assert result.max_delta == 4
+    assert result.min_ssim > 0.95
+
+
+def test_changed_region_is_boxed():
+    base = screen()
+    changed = base.copy()
+    changed[25:45, 70:95] = 255  # a label vanished from the CTA
+    result, mask = compare(base, changed)
+    assert result.status == "changed"
+    assert result.changed_pixels == 20 * 25 == int(mask.sum())
+    assert result.boxes == [(70, 25, 95, 45)]
+    assert result.min_ssim < 0.95
+
+
+def test_separate_regions_get_separate_boxes():
+    mask = np.zeros((256, 256), dtype=bool)
+    mask[5:10, 5:10] = True
+    mask[200:250, 150:160] = True
+    assert bounding_boxes(mask, tile=32) == [(5, 5, 10, 10), (150, 200, 160, 250)]
+
+
+def test_adjacent_tiles_merge_into_one_box():
+    mask = np.zeros((128, 128), dtype=bool)
+    mask[30:34, 0:100] = True  # crosses tile rows and columns
+    assert bounding_boxes(mask, tile=32) == [(0, 30, 100, 34)]
+
+
+def test_size_change_is_changed():
+    result, mask = compare(screen(), screen(height=220))
+    assert result.status == "changed"
+    assert mask is None
+    assert "size changed" in result.message
+    assert result.boxes == [(0, 0, 120, 220)]
+
+
+def test_tile_ssim_handles_partial_tiles():
+    image = screen(height=70, width=45)
+    ssim = tile_ssim(image, image, tile=32)
+    assert ssim.shape == (3, 2)
+    assert np.allclose(ssim, 1.0)
+
+
+def test_tolerance_is_configurable():
+    base = screen()
+    changed = base.copy()
+    changed[0:2, 0:10] = 0
+    strict, _ = compare(base, changed)
+    loose, _ = compare(base, changed, Tolerance(max_changed_ratio=0.01, min_ssim=0.0))
+    assert strict.status == "changed"
+    assert loose.status == "within_tolerance"
+
+
+def test_compare_files_writes_diff_png(tmp_path):
+    base = screen()
+    changed = base.copy()
+    changed[100:120, 20:40] = 0
+    result = compare_files(
+        save(base, tmp_path / "b.png"), save(changed, tmp_path / "g.png"), tmp_path / "out" / "diff.png"
+    )
+    assert result.status == "changed"
+    diff = np.asarray(Image.open(result.diff_path))
+    assert diff.shape == base.shape
+    assert (diff[110, 30] == (255, 0, 0)).all()
+    assert json.loads(json.dumps(result.to_dict()))["boxes"] == [[20, 100, 40, 120]]
+
+
+def test_no_diff_png_unless_changed(tmp_path):
+    path = save(screen(), tmp_path / "a.png")
+    result = compare_files(path, path, tmp_path / "diff.png")
+    assert result.status == "identical"
+    assert result.diff_path is None
+    assert not (tmp_path / "diff.png").exists()
+
+
+def test_rgba_is_composited_on_white(tmp_path):
+    rgba = np.zeros((4, 4, 4), dtype=np.uint8)
+    Image.fromarray(rgba, "RGBA").save(tmp_path / "t.png")
+    assert (load_image(tmp_path / "t.png") == 255).all()
+
+
+def test_lfs_pointer_and_missing_files(tmp_path):
+    pointer = tmp_path / "lfs.png"
+    pointer.write_text("version https://git-lfs.github.com/spec/v1\noid sha256:00\nsize 1\n")
+    with pytest.raises(ImageLoadError, match="LFS"):
+        load_image(pointer)
+    real = save(screen(), tmp_path / "real.png")
+    assert compare_files(pointer, real).status == "error"
+    assert compare_files(tmp_path / "nope.png", real).status == "missing"
+
+
+def test_compare_dirs_pairs_by_name(tmp_path):
+    base, gen = tmp_path / "baselines", tmp_path / "generated"
+    (base / "flows").mkdir(parents=True)
+    (gen / "flows").mkdir(parents=True)
+    image = screen()
+    save(image, base / "flows" / "home.png")
+    save(image, gen / "flows" / "home.png")
+    save(image, gen / "new.png")
+    results = compare_dirs(base, gen, tmp_path / "diffs")
+    assert [(r.name, r.status) for r in results] == [("flows/home.png", "identical"), ("new.png", "missing")]
+
+
+def test_cli_exit_status(tmp_path, capsys):
+    base, gen = tmp_path / "b", tmp_path / "g"
+    base.mkdir()
+    gen.mkdir()
+    image = screen()
+    save(image, base / "a.png")
+    save(image, gen / "a.png")
+    cache = ["--cache", str(tmp_path / "cache")]
+    assert visual_diff.main(["--baselines", str(base), "--generated", str(gen), *cache]) == 0
+    changed = image.copy()
+    changed[:50] = 0
+    save(changed, gen / "a.png")
+    out = ["--out", str(tmp_path / "d")]
+    assert visual_diff.main(["--baselines", str(base), "--generated", str(gen), *cache, *out]) == 1
+    line = capsys.readouterr().out.strip().splitlines()[-1]
+    assert DiffResult(**{**json.loads(line), "boxes": []}).status == "changed"
+    assert (tmp_path / "d" / "a.png").is_file()
+
+
+def test_banded_compare_matches_whole_image_statistics():
+    rng = np.random.default_rng(3)
+    base = rng.integers(0, 255, size=(300, 77, 3), dtype=np.uint8)
+    changed = base.copy()
+    changed[::5] = rng.integers(0, 255, size=changed[::5].shape, dtype=np.uint8)
+    result, mask = compare(base, changed, Tolerance(tile=16))
+    delta = visual_diff.pixel_delta(base, changed)
+    ssim = tile_ssim(base, changed, tile=16)
+    assert result.changed_pixels == int((delta > 16).sum()) == int(mask.sum())
+    assert result.max_delta == int(delta.max())
+    assert result.mean_delta == pytest.approx(float(delta.mean()))
+    assert result.min_ssim == pytest.approx(float(ssim.min()), abs=1e-5)
+    assert result.mean_ssim == pytest.approx(float(ssim.mean()), abs=1e-5)
+
+
+def test_early_exit_once_budget_is_spent():
+    base = screen(height=1000)
+    changed = base.copy()
+    changed[:100] = 0
+    full, full_mask = compare(base, changed)
+    quick, _ = compare(base, changed, exhaustive=False)
+    assert full.status == quick.status == "changed"
+    assert quick.early_exit and not full.early_exit
+    assert quick.changed_pixels <= full.changed_pixels == int(full_mask.sum())
+
+
+def test_compare_files_stages(tmp_path):
+    cache = visual_diff.DecodeCache(tmp_path / "cache")
+    image = screen()
+    base = save(image, tmp_path / "base.png")
+    same_bytes = tmp_path / "copy.png"
+    same_bytes.write_bytes(base.read_bytes())
+    reencoded = tmp_path / "reencoded.png"
+    Image.fromarray(image).save(reencoded, compress_level=9)
+    assert reencoded.read_bytes() != base.read_bytes()
+
+    first = compare_files(base, same_bytes, cache=cache)
+    assert (first.status, first.stage, first.width) == ("identical", "file_hash", 120)
+    assert list((tmp_path / "cache").glob("*.npy")) == []  # nothing was decoded
+
+    second = compare_files(base, reencoded, cache=cache)
+    assert (second.status, second.stage) == ("identical", "pixel_hash")
+    changed = image.copy()
+    changed[:20] = 0
+    third = compare_files(base, save(changed, tmp_path / "changed.png"), cache=cache)
+    assert (third.status, third.stage) == ("changed", "pixels")
+
+
+def test_decode_cache_maps_baselines(tmp_path):
+    cache = visual_diff.DecodeCache(tmp_path / "cache")
+    path = save(screen(), tmp_path / "base.png")
+    array, pixels = cache.get(path)
+    again, pixels_again = cache.get(path)
+    assert isinstance(again, np.memmap)
+    assert pixels == pixels_again == visual_diff.pixel_hash(load_image(path))
+    assert (np.asarray(again) == array).all()
+    with pytest.raises(ImageLoadError):
+        pointer = tmp_path / "lfs.png"
+        pointer.write_text("version https://git-lfs.github.com/spec/v1\n")
+        cache.get(pointer)
+
+
+def test_decode_cache_prunes_least_recently_used(tmp_path):
+    import os
+
+    cache = visual_diff.DecodeCache(tmp_path / "cache", max_bytes=0)
+    paths = [save(screen(seed), tmp_path / f"{seed}.png") for seed in range(3)]
+    for age, path in enumerate(paths):
+        cache.get(path)
+        digest = visual_diff.file_sha256(path)
+        os.utime(tmp_path / "cache" / f"{digest}.pixels", (1000 + age, 1000 + age))
+    entry = (tmp_path / "cache" / f"{visual_diff.file_sha256(paths[0])}.npy").stat().st_size
+    cache.max_bytes = entry
+    assert cache.prune() == 2
+    assert [p.stem for p in (tmp_path / "cache").glob("*.npy")] == [visual_diff.file_sha256(paths[2])]
+
+
+def test_ignore_mask_hides_dynamic_regions():
+    base = screen()
+    clock = base.copy()
+    clock[2:12, 80:110] = 0  # the status-bar clock ticked
+    result, _ = compare(base, clock)
+    assert result.status == "changed"
+
+    ignore = visual_diff.ignore_mask([(78, 0, 112, 14)], base.shape[:2])
+    result, mask = compare(base, clock, ignore=ignore)
+    assert result.status == "identical" and not mask.any()
+    assert result.masked_pixels == 34 * 14
+
+    moved = clock.copy()
+    moved[25:45, 70:95] = 255
+    result, _ = compare(base, moved, ignore=ignore)
+    assert result.status == "changed" and result.boxes == [(70, 25, 95, 45)]
+
+
+def test_resolve_regions_scales_selectors_and_reports_misses():
+    hierarchy = {
+        "attributes": {"bounds": "[0,0][60,100]"},
+        "children": [
+            {"attributes": {"text": "12:41", "bounds": "[40,0][55,6]"}},
+            {"attributes": {"resource-id": "feed_timestamp", "bounds": "[5,50][30,55]"}},
+        ],
+    }
+    specs = [
+        {"rect": [-5, 190, 200, 250]},
+        {"selector": {"text": r"\d+:\d+"}},
+        {"selector": {"id": "feed_.*"}, "padding": 1},
+        {"selector": {"text": "Welcome"}},
+    ]
+    boxes, notes = visual_diff.resolve_regions(specs, (120, 200), hierarchy)  # 2x pixel density
+    assert boxes == [(0, 190, 120, 200), (80, 0, 110, 12), (9, 99, 61, 111)]
+    assert notes == ['mask selector {"text": "Welcome"} matched nothing']
+
+
+def test_compare_files_applies_entry_masks(tmp_path):
+    base = screen()
+    clock = base.copy()
+    clock[2:12, 80:110] = 0
+    baseline, generated = save(base, tmp_path / "base.png"), save(clock, tmp_path / "home.png")
+    hierarchy = {"attributes": {"bounds": "[0,0][120,200]"}, "children": [
+        {"attributes": {"text": "9:41", "bounds": "[80,2][110,12]"}},
+    ]}
+    (tmp_path / "home.hierarchy.json").write_text(json.dumps(hierarchy))
+
+    class Entry:
+        sha256 = visual_diff.file_sha256(baseline)
+        pixel_hash = visual_diff.pixel_hash(base)
+        width, height = 120, 200
+        masks = [{"selector": {"text": r"\d+:\d+"}}, {"selector": {"id": "banner"}}]
+
+    result = compare_files(baseline, generated, tolerance=Tolerance(), baseline_entry=Entry)
+    assert result.status == "identical" and result.masked_pixels == 300
+    assert "matched nothing" in result.message
+
+    clock[150:170, 10:40] = 255
+    save(clock, generated)
+    result = compare_files(baseline, generated, tmp_path / "diff.png", baseline_entry=Entry)
+    assert result.status == "changed"
+    diff = load_image(tmp_path / "diff.png")
+    assert diff[5, 90, 2] > diff[5, 90, 0]  # ignored region tinted blue
+
+    (tmp_path / "home.hierarchy.json").unlink()
+    result = compare_files(baseline, generated, baseline_entry=Entry)
+    assert result.status == "error" and "home.hierarchy.json" in result.message
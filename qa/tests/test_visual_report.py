@@ -0,0 +1,113 @@
+import json
+
+import numpy as np
+from PIL import Image
+
+import visual_report
+from baseline_store import BaselineStore
+from visual_diff import DiffResult
+
+
+def png(path, image):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    Image.fromarray(image).save(path)
+
+
+def make_run(tmp_path, changes):
+    """One screen per entry of `changes`: the number of rows blacked out in the generated copy."""
+    base, gen = tmp_path / "baselines", tmp_path / "generated"
+    for i, rows in enumerate(changes):
+        image = np.full((120, 80, 3), 200, dtype=np.uint8)
+        image[10:20, 10:70] = i
+        png(base / f"screen-{i:02d}.png", image)
+        if rows:
+            image = image.copy()
+            image[40:40 + rows] = 0
+        png(gen / f"screen-{i:02d}.png", image)
+    return base, gen
+
+
+def test_rank_orders_by_status_then_magnitude():
+    results = [
+        DiffResult("same", "identical"),
+        DiffResult("small", "changed", changed_ratio=0.01, min_ssim=0.9),
+        DiffResult("gone", "missing"),
+        DiffResult("big", "changed", changed_ratio=0.2, min_ssim=0.5),
+        DiffResult("tie", "changed", changed_ratio=0.01, min_ssim=0.2),
+        DiffResult("noise", "within_tolerance"),
+    ]
+    assert [r.name for r in visual_report.rank(results)] == ["big", "tie", "small", "gone", "noise", "same"]
+
+
+def test_report_covers_every_screen(tmp_path):
+    changes = [0] * 20 + [5, 30, 1, 10]
+    base, gen = make_run(tmp_path, changes)
+    (gen / "extra.png").write_bytes((gen / "screen-00.png").read_bytes())
+    out = tmp_path / "reports"
+    results = visual_report.generate(base, gen, out, top=2, workers=1, cache_dir=str(tmp_path / "cache"))
+    assert len(results) == 25
+
+    report = json.loads((out / "visual-diff.json").read_text())
+    assert report["summary"]["total"] == 25
+    assert report["summary"]["changed"] == 4 and report["summary"]["missing"] == 1
+    ranked = [r["name"] for r in report["results"][:4]]
+    assert ranked == ["screen-21.png", "screen-23.png", "screen-20.png", "screen-22.png"]
+    assert [bool(r["thumbnail"]) for r in report["results"][:4]] == [True, True, False, False]
+
+    thumb = Image.open(report["results"][0]["thumbnail"])
+    assert thumb.width == visual_report.THUMB_WIDTH * 3 + 8
+
+    markdown = (out / "visual-diff-summary.md").read_text()
+    assert markdown.startswith("## Visual diff: 4 changed, 1 missing (25 screens, 20 identical)")
+    assert "### 1. `screen-21.png`" in markdown and "### 3." not in markdown
+    assert "2 more changed screens" in markdown and "`screen-22.png`" in markdown
+    assert "`extra.png` (missing)" in markdown
+
+
+def test_parallel_matches_serial(tmp_path, monkeypatch):
+    base, gen = make_run(tmp_path, [0, 3, 0, 12, 7, 0])
+    serial = visual_report.compare_run(base, gen, workers=1)
+    monkeypatch.setattr(visual_report, "PARALLEL_THRESHOLD", 1)
+    parallel = visual_report.compare_run(base, gen, workers=2, cache_dir=str(tmp_path / "cache"))
+    assert [r.to_dict() for r in parallel] == [r.to_dict() for r in serial]
+
+
+def test_link_prefix_and_store(tmp_path):
+    base, gen = make_run(tmp_path, [4])
+    store = BaselineStore(tmp_path / "store")
+    store.approve([(p.name, p) for p in base.iterdir()])
+    out = tmp_path / "reports"
+    visual_report.generate(tmp_path / "store", gen, out, workers=1, store=store, link_prefix="https://raw/")
+    markdown = (out / "visual-diff-summary.md").read_text()
+    assert "](https://raw/" in markdown
+
+
+def test_cli_exit_status(tmp_path):
+    base, gen = make_run(tmp_path, [0, 0])
+    args = ["--baselines", str(base), "--generated", str(gen), "-o", str(tmp_path / "r"), "--no-cache"]
+    assert visual_report.main(args) == 0
+    base, gen = make_run(tmp_path / "changed", [0, 9])
+    args = ["--baselines", str(base), "--generated", str(gen), "-o", str(tmp_path / "r"), "--no-cache"]
+    assert visual_report.main(args) == 1
+    empty = tmp_path / "empty"
+    empty.mkdir()
+    assert visual_report.main(["--baselines", str(empty), "--generated", str(empty), "-o", str(tmp_path / "r")]) == 2
+
+
+def test_without_thumbnails_links_before_and_after(tmp_path):
+    base, gen = make_run(tmp_path, [6])
+    out = tmp_path / "reports"
+    visual_report.generate(base, gen, out, workers=1, thumbnails=False, link_prefix="https://raw/")
+    markdown = (out / "visual-diff-summary.md").read_text()
+    assert "**Before:** ![baseline](https://raw/" in markdown
+    assert not (out / "thumbs").exists()
+
+
+def test_thumbnails_outside_the_repo_link_from_the_report(tmp_path):
+    base, gen = make_run(tmp_path, [6])
+    out = tmp_path / "reports"
+    visual_report.generate(base, gen, out, workers=1, link_prefix="https://raw/")
+    markdown = (out / "visual-diff-summary.md").read_text()
+    assert "![screen-00.png: baseline, generated, diff](thumbs/screen-00.png)" in markdown
+    assert (out / "thumbs" / "screen-00.png").is_file()
+    assert "**Before:** ![baseline](https://raw/" in markdown
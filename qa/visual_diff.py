@@ -0,0 +1,714 @@
+#!/usr/bin/env python3
+"""
+Pixel and perceptual diff of qa/generated screenshots against qa/baselines.
+
+Both PNGs are decoded into RGB NumPy arrays and compared in two passes:
+
+- per pixel: the largest channel difference of each pixel; a pixel whose
+  difference exceeds `Tolerance.pixel_threshold` counts as changed;
+- perceptual: SSIM of the luma channel, computed per `Tolerance.tile` x
+  `Tolerance.tile` tile from tile means, variances and covariance, so a
+  small shift or anti-aliasing change scores high while a moved button
+  does not.
+
+Each pair is classified as
+
+    identical         no pixel differs
+    within_tolerance  changed pixels <= max_changed_ratio and every tile's
+                      SSIM >= min_ssim
+    changed           anything else, including a size change
+    missing           only one side exists
+    error             a file cannot be decoded (e.g. a Git LFS pointer
+                      that was never fetched)
+
+Changed pixels are grouped into bounding boxes by connected components of
+changed tiles, each shrunk to the exact changed pixels. For changed pairs a
+diff PNG is written: the generated screen dimmed to gray, changed pixels in
+red and each box outlined.
+
+Most screenshots in a run match their baselines, so compare_files() tries
+the cheap answers first: equal file hashes, then equal pixel hashes after
+decoding, then pixels band by band, stopping once a pair is known to be
+changed unless a diff PNG was asked for. Decoded baselines are kept in a
+DecodeCache of memory-mapped raw arrays keyed by the PNG's sha256.
+
+A baseline's manifest entry may list masks: rectangles or selectors for
+dynamic content (clocks, timestamps) that are left out of the comparison.
+Selectors are resolved against the view hierarchy saved next to the
+screenshot (`home.png` -> `home.hierarchy.json`); see resolve_regions().
+The Maestro runner in server/src saves PNGs only, so that file has to be
+written by the flow or by hand (`maestro hierarchy > home.hierarchy.json`);
+a pair whose masks need it and do not find it is an error, not a silently
+unmasked comparison.
+
+    python qa/visual_diff.py                       # JSON line per pair
+    python qa/visual_diff.py --out qa/reports/diffs --max-changed-ratio 0.002
+
+    from visual_diff import compare_files
+    result = compare_files("qa/baselines/home.png", "qa/generated/home.png", "home-diff.png")
+
+Configuration (environment variables):
+    MAESTRO_QA_DECODE_CACHE   decoded-baseline cache (default $XDG_CACHE_HOME/maestro-qa/decoded)
+"""
+
+from __future__ import annotations
+
+import argparse
+import hashlib
+import json
+import os
+import re
+import sys
+import tempfile
+from collections import deque
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+from PIL import Image
+
+ROOT = Path(__file__).resolve().parents[1]
+BASELINES_DIR = ROOT / "qa" / "baselines"
+GENERATED_DIR = ROOT / "qa" / "generated"
+
+STATUSES = ("identical", "within_tolerance", "changed", "missing", "error")
+BAND_TILES = 4  # tile rows compared per step of compare()
+MAX_CACHE_BYTES = 4 << 30
+
+Box = Tuple[int, int, int, int]  # x0, y0, x1, y1; x1/y1 exclusive
+
+# SSIM stabilizers for 8-bit data (Wang et al. 2004)
+_C1 = (0.01 * 255) ** 2
+_C2 = (0.03 * 255) ** 2
+_LUMA = np.array([0.299, 0.587, 0.114], dtype=np.float32)
+_HIGHLIGHT = np.array([255, 0, 0], dtype=np.uint8)
+_IGNORED = np.array([60, 110, 255], dtype=np.uint8)
+_BOUNDS = re.compile(r"\[(-?\d+),\s*(-?\d+)\]\[(-?\d+),\s*(-?\d+)\]")
+# selector key -> hierarchy attributes it matches, as in Maestro's tapOn/assertVisible selectors
+_SELECTOR_ATTRIBUTES = {"text": ("text", "accessibilityText", "hintText"), "id": ("resource-id", "id")}
+HIERARCHY_SUFFIX = ".hierarchy.json"
+_LFS_POINTER = b"version https://git-lfs"
+
+
+def _default_cache_dir() -> Path:
+    cache_home = os.getenv("XDG_CACHE_HOME") or str(Path.home() / ".cache")
+    return Path(cache_home) / "maestro-qa" / "decoded"
+
+
+CACHE_DIR = Path(os.getenv("MAESTRO_QA_DECODE_CACHE") or _default_cache_dir())
+
+
+class ImageLoadError(ValueError):
+    """Raised by load_image() for a file that is not a decodable image."""
+
+
+class MissingHierarchyError(ValueError):
+    """Raised by entry_ignore_mask() when selector masks have no view hierarchy to resolve against."""
+
+
+@dataclass(frozen=True)
+class Tolerance:
+    pixel_threshold: int = 16  # largest channel difference still treated as equal
+    max_changed_ratio: float = 0.001  # fraction of changed pixels allowed
+    min_ssim: float = 0.95  # lowest tile SSIM allowed
+    tile: int = 32  # SSIM and bounding-box tile size in pixels
+
+
+@dataclass
+class DiffResult:
+    name: str
+    status: str
+    width: int = 0
+    height: int = 0
+    changed_pixels: int = 0
+    changed_ratio: float = 0.0
+    max_delta: int = 0
+    mean_delta: float = 0.0
+    min_ssim: float = 1.0
+    mean_ssim: float = 1.0
+    boxes: List[Box] = field(default_factory=list)
+    diff_path: Optional[str] = None
+    message: str = ""
+    stage: str = ""  # what decided the status: file_hash, pixel_hash or pixels
+    early_exit: bool = False
+    masked_pixels: int = 0
+
+    def to_dict(self) -> Dict[str, Any]:
+        data = asdict(self)
+        data["boxes"] = [list(box) for box in self.boxes]
+        return data
+
+
+def load_image(path: Union[str, Path]) -> np.ndarray:
+    """Decode a PNG (or any Pillow format) into an (H, W, 3) uint8 RGB array."""
+    path = Path(path)
+    try:
+        if _is_lfs_pointer(path):
+            raise ImageLoadError(f"{path} is a Git LFS pointer; run `git lfs pull`")
+        with Image.open(path) as image:
+            if image.mode != "RGB":
+                # Composite any transparency on white, as a browser shows the screenshot
+                rgba = image.convert("RGBA")
+                image = Image.new("RGB", rgba.size, (255, 255, 255))
+                image.paste(rgba, mask=rgba.getchannel("A"))
+            return np.asarray(image, dtype=np.uint8)
+    except ImageLoadError:
+        raise
+    except (OSError, ValueError) as exc:
+        raise ImageLoadError(f"cannot decode {path}: {exc}") from None
+
+
+def pixel_delta(baseline: np.ndarray, generated: np.ndarray) -> np.ndarray:
+    """(H, W) uint8: the largest absolute channel difference of each pixel."""
+    # max - min stays in uint8, avoiding a widened copy of both images
+    diff = np.maximum(baseline, generated)
+    diff -= np.minimum(baseline, generated)
+    return np.maximum(np.maximum(diff[..., 0], diff[..., 1]), diff[..., 2])
+
+
+def _pad(array: np.ndarray, tile: int) -> np.ndarray:
+    """`array` edge-padded so its height and width are whole tiles (no copy if they already are)."""
+    pad_h, pad_w = -array.shape[0] % tile, -array.shape[1] % tile
+    if not (pad_h or pad_w):
+        return array
+    return np.pad(array, ((0, pad_h), (0, pad_w)) + ((0, 0),) * (array.ndim - 2), mode="edge")
+
+
+def _tiles(array: np.ndarray, tile: int) -> np.ndarray:
+    """(rows, cols, tile, tile, ...) view of an image, edge-padded to whole tiles."""
+    array = _pad(array, tile)
+    rows, cols = array.shape[0] // tile, array.shape[1] // tile
+    return array.reshape(rows, tile, cols, tile, *array.shape[2:]).swapaxes(1, 2)
+
+
+def tile_grid(mask: np.ndarray, tile: int) -> np.ndarray:
+    """(rows, cols) bool: which tiles of a 2-D mask hold any True pixel."""
+    return _tiles(mask, tile).any(axis=(2, 3))
+
+
+def tile_ssim(
+    baseline: np.ndarray,
+    generated: np.ndarray,
+    tile: int = 32,
+    where: Optional[np.ndarray] = None,
+) -> np.ndarray:
+    """(rows, cols) float32 SSIM of the luma channel, one value per tile.
+
+    With `where` (a tile grid), only those tiles are computed and the rest
+    are 1.0; compare() passes the tiles holding any differing pixel, since
+    SSIM of an unchanged tile is exactly 1.
+    """
+    x, y = _tiles(baseline, tile), _tiles(generated, tile)
+    ssim = np.ones(x.shape[:2], dtype=np.float32)
+    if where is not None:
+        x, y = x[where], y[where]
+    x = (x.astype(np.float32) @ _LUMA).reshape(-1, tile * tile)
+    y = (y.astype(np.float32) @ _LUMA).reshape(-1, tile * tile)
+    mu_x, mu_y = x.mean(axis=1), y.mean(axis=1)
+    var_x, var_y = x.var(axis=1), y.var(axis=1)
+    cov = np.einsum("ij,ij->i", x, y) / (tile * tile) - mu_x * mu_y
+    numerator = (2 * mu_x * mu_y + _C1) * (2 * cov + _C2)
+    denominator = (mu_x ** 2 + mu_y ** 2 + _C1) * (var_x + var_y + _C2)
+    if where is None:
+        return (numerator / denominator).reshape(ssim.shape)
+    ssim[where] = numerator / denominator
+    return ssim
+
+
+def bounding_boxes(mask: np.ndarray, tile: int = 32) -> List[Box]:
+    """Boxes around the changed pixels of `mask`, one per group of touching changed tiles.
+
+    Components are found on the tile grid (a few thousand cells for a phone
+    screenshot), then each box is shrunk to the changed pixels it holds.
+    """
+    if not mask.any():
+        return []
+    grid = tile_grid(mask, tile)
+    rows, cols = grid.shape
+    seen = np.zeros_like(grid)
+    boxes: List[Box] = []
+    for r0, c0 in zip(*np.nonzero(grid)):
+        if seen[r0, c0]:
+            continue
+        seen[r0, c0] = True
+        queue = deque([(r0, c0)])
+        top, left, bottom, right = r0, c0, r0, c0
+        while queue:
+            r, c = queue.popleft()
+            top, bottom, left, right = min(top, r), max(bottom, r), min(left, c), max(right, c)
+            for nr in (r - 1, r, r + 1):
+                for nc in (c - 1, c, c + 1):
+                    if 0 <= nr < rows and 0 <= nc < cols and grid[nr, nc] and not seen[nr, nc]:
+                        seen[nr, nc] = True
+                        queue.append((nr, nc))
+        y0, x0 = top * tile, left * tile
+        region = mask[y0:(bottom + 1) * tile, x0:(right + 1) * tile]
+        ys, xs = np.nonzero(region.any(axis=1))[0], np.nonzero(region.any(axis=0))[0]
+        boxes.append((int(x0 + xs[0]), int(y0 + ys[0]), int(x0 + xs[-1] + 1), int(y0 + ys[-1] + 1)))
+    return boxes
+
+
+def load_hierarchy(screenshot: Union[str, Path]) -> Optional[Dict[str, Any]]:
+    """The view hierarchy saved next to a screenshot (`home.png` -> `home.hierarchy.json`), if any."""
+    try:
+        return json.loads(Path(screenshot).with_suffix(HIERARCHY_SUFFIX).read_text())
+    except (OSError, ValueError):
+        return None
+
+
+def _bounds(node: Dict[str, Any]) -> Optional[Box]:
+    match = _BOUNDS.fullmatch(str(node.get("attributes", {}).get("bounds", "")).strip())
+    return tuple(int(v) for v in match.groups()) if match else None
+
+
+def _matches(node: Dict[str, Any], selector: Dict[str, str]) -> bool:
+    attributes = node.get("attributes", {})
+    for key, pattern in selector.items():
+        values = [attributes.get(attr) for attr in _SELECTOR_ATTRIBUTES.get(key, (key,))]
+        values = [str(v) for v in values if v]
+        try:
+            if not any(re.fullmatch(pattern, v, re.S) for v in values):  # Maestro selectors are regexes
+                return False
+        except re.error:
+            if pattern not in values:
+                return False
+    return True
+
+
+def resolve_regions(
+    specs: Sequence[Dict[str, Any]],
+    size: Tuple[int, int],
+    hierarchy: Optional[Dict[str, Any]] = None,
+) -> Tuple[List[Box], List[str]]:
+    """Pixel boxes for mask specs, and a note for each spec that matched nothing.
+
+    A spec is {"rect": [x0, y0, x1, y1]} in screenshot pixels, or
+    {"selector": {"text": ..., "id": ...}, "padding": 4} resolved against
+    the screenshot's view hierarchy (Maestro's `hierarchy` JSON). Hierarchy
+    bounds are scaled to the screenshot by the root node's width, since iOS
+    reports points rather than pixels. Boxes are clipped to `size` (W, H).
+    """
+    width, height = size
+    boxes: List[Box] = []
+    notes: List[str] = []
+    nodes: List[Dict[str, Any]] = []
+    scale = 1.0
+    if hierarchy is not None:
+        stack = [hierarchy]
+        while stack:
+            node = stack.pop()
+            nodes.append(node)
+            stack.extend(node.get("children") or ())
+        root = next((b for b in map(_bounds, nodes) if b is not None), None)
+        if root is not None and root[2] - root[0] > 0:
+            scale = width / (root[2] - root[0])
+
+    def add(x0: float, y0: float, x1: float, y1: float) -> None:
+        box = (max(int(x0), 0), max(int(y0), 0), min(int(round(x1)), width), min(int(round(y1)), height))
+        if box[0] < box[2] and box[1] < box[3]:
+            boxes.append(box)
+
+    for spec in specs:
+        if "rect" in spec:
+            add(*spec["rect"])
+            continue
+        selector = spec.get("selector") or {}
+        found = [b for b in map(_bounds, (n for n in nodes if _matches(n, selector))) if b is not None]
+        if not found:
+            notes.append(f"mask selector {json.dumps(selector)} matched nothing")
+        pad = spec.get("padding", 0)
+        for x0, y0, x1, y1 in found:
+            add(x0 * scale - pad, y0 * scale - pad, x1 * scale + pad, y1 * scale + pad)
+    return boxes, notes
+
+
+def ignore_mask(boxes: Sequence[Box], shape: Tuple[int, int]) -> Optional[np.ndarray]:
+    """(H, W) bool mask that is True inside `boxes`, or None when there are none."""
+    if not boxes:
+        return None
+    mask = np.zeros(shape, dtype=bool)
+    for x0, y0, x1, y1 in boxes:
+        mask[y0:y1, x0:x1] = True
+    return mask
+
+
+def entry_ignore_mask(
+    entry: Optional[Any],
+    generated_path: Union[str, Path],
+    shape: Tuple[int, int],
+) -> Tuple[Optional[np.ndarray], List[str]]:
+    """The ignore mask for a manifest entry's masks on one screenshot, and notes on unmatched selectors.
+
+    Raises MissingHierarchyError when a selector mask has no hierarchy file.
+    """
+    specs = getattr(entry, "masks", None)
+    if not specs:
+        return None, []
+    hierarchy = None
+    if any("selector" in spec for spec in specs):
+        hierarchy = load_hierarchy(generated_path)
+        if hierarchy is None:
+            path = Path(generated_path).with_suffix(HIERARCHY_SUFFIX)
+            raise MissingHierarchyError(f"selector masks need the view hierarchy {path}; none was saved")
+    boxes, notes = resolve_regions(specs, (shape[1], shape[0]), hierarchy)
+    return ignore_mask(boxes, shape), notes
+
+
+def render_diff(
+    generated: np.ndarray,
+    mask: np.ndarray,
+    boxes: Sequence[Box],
+    ignore: Optional[np.ndarray] = None,
+) -> np.ndarray:
+    """The generated screen dimmed to gray, with changed pixels red, boxes outlined and ignored regions blue."""
+    gray = (generated.astype(np.float32) @ _LUMA * 0.35 + 150).astype(np.uint8)
+    out = np.repeat(gray[:, :, None], 3, axis=2)
+    if ignore is not None:
+        out[ignore] = out[ignore] // 2 + _IGNORED // 2
+    out[mask] = _HIGHLIGHT
+    height, width = mask.shape
+    for x0, y0, x1, y1 in boxes:
+        x0, y0, x1, y1 = max(x0 - 2, 0), max(y0 - 2, 0), min(x1 + 2, width), min(y1 + 2, height)
+        out[y0:y0 + 2, x0:x1] = _HIGHLIGHT
+        out[max(y1 - 2, y0):y1, x0:x1] = _HIGHLIGHT
+        out[y0:y1, x0:x0 + 2] = _HIGHLIGHT
+        out[y0:y1, max(x1 - 2, x0):x1] = _HIGHLIGHT
+    return out
+
+
+def save_png(array: np.ndarray, path: Union[str, Path]) -> None:
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    # Fast zlib level: diff images are review artifacts, not committed assets
+    Image.fromarray(array).save(path, compress_level=1)
+
+
+def file_sha256(path: Union[str, Path]) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as fh:
+        for chunk in iter(lambda: fh.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def pixel_hash(array: np.ndarray) -> str:
+    """sha256 of an image's shape and raw pixels: equal for identical screens in any encoding."""
+    digest = hashlib.sha256(repr(array.shape).encode())
+    digest.update(memoryview(np.ascontiguousarray(array)).cast("B"))
+    return digest.hexdigest()
+
+
+def _is_lfs_pointer(path: Path) -> bool:
+    with open(path, "rb") as fh:
+        return fh.read(len(_LFS_POINTER)) == _LFS_POINTER
+
+
+class DecodeCache:
+    """Decoded baselines as raw .npy files keyed by PNG content hash, read back memory-mapped.
+
+    Baselines rarely change between runs, so each is decoded once; later
+    runs map the raw pixels instead of inflating the PNG, and the OS page
+    cache shares them across worker processes. Next to each array a small
+    file holds its pixel hash. Entries are written atomically (mkstemp +
+    os.replace), so concurrent workers may fill the cache at once; prune()
+    drops the least recently used entries beyond `max_bytes`.
+    """
+
+    def __init__(self, path: Optional[Union[str, Path]] = None, max_bytes: int = MAX_CACHE_BYTES):
+        self.path = Path(path) if path is not None else CACHE_DIR
+        self.max_bytes = max_bytes
+
+    def _write(self, target: Path, write) -> None:
+        fd, tmp = tempfile.mkstemp(dir=str(self.path), suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as fh:
+                write(fh)
+            os.replace(tmp, target)
+        except BaseException:
+            os.unlink(tmp)
+            raise
+
+    def get(self, path: Union[str, Path], digest: Optional[str] = None) -> Tuple[np.ndarray, str]:
+        """(pixels, pixel hash) of an image, decoding and storing it on a miss.
+
+        Raises ImageLoadError like load_image(); a cache that cannot be
+        written only costs the decode.
+        """
+        digest = digest or file_sha256(path)
+        array_path, hash_path = self.path / f"{digest}.npy", self.path / f"{digest}.pixels"
+        try:
+            pixels = hash_path.read_text()
+            array = np.load(array_path, mmap_mode="r")
+            os.utime(hash_path)  # recency for prune()
+            return array, pixels
+        except (OSError, ValueError):
+            pass
+        array = load_image(path)
+        pixels = pixel_hash(array)
+        try:
+            self.path.mkdir(parents=True, exist_ok=True)
+            self._write(array_path, lambda fh: np.save(fh, array))
+            self._write(hash_path, lambda fh: fh.write(pixels.encode()))
+        except OSError:
+            pass
+        return array, pixels
+
+    def prune(self) -> int:
+        """Delete least recently used entries until the cache fits max_bytes; returns entries removed."""
+        try:
+            entries = [(p.stat().st_mtime, p) for p in self.path.glob("*.pixels")]
+        except OSError:
+            return 0
+        sizes = {}
+        for _, hash_path in entries:
+            try:
+                sizes[hash_path] = hash_path.with_suffix(".npy").stat().st_size
+            except OSError:
+                sizes[hash_path] = 0
+        total = sum(sizes.values())
+        removed = 0
+        for _, hash_path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            for stale in (hash_path, hash_path.with_suffix(".npy")):
+                try:
+                    stale.unlink()
+                except OSError:
+                    pass
+            total -= sizes[hash_path]
+            removed += 1
+        return removed
+
+
+def compare(
+    baseline: np.ndarray,
+    generated: np.ndarray,
+    tolerance: Tolerance = Tolerance(),
+    name: str = "",
+    exhaustive: bool = True,
+    ignore: Optional[np.ndarray] = None,
+) -> Tuple[DiffResult, Optional[np.ndarray]]:
+    """Classify one decoded pair; also returns the changed-pixel mask (None if sizes differ).
+
+    The images are compared in bands of BAND_TILES tile rows, and bands
+    that are byte-equal are skipped. With `exhaustive=False` the comparison
+    stops at the first band that makes the pair `changed` (changed pixels
+    over the max_changed_ratio budget, or a tile under min_ssim); the
+    result then has `early_exit` set and its statistics and boxes cover
+    only the bands read so far.
+
+    `ignore` is an (H, W) bool mask of dynamic regions (see ignore_mask()).
+    In bands it touches, ignored pixels of the generated image are replaced
+    by the baseline's before comparing, so they change no statistic; the
+    changed-pixel budget is taken over the pixels that are compared.
+    """
+    height, width = generated.shape[:2]
+    if baseline.shape != generated.shape:
+        message = f"size changed from {baseline.shape[1]}x{baseline.shape[0]} to {width}x{height}"
+        return DiffResult(
+            name, "changed", width, height, width * height, 1.0, min_ssim=0.0, mean_ssim=0.0,
+            boxes=[(0, 0, width, height)], message=message, stage="pixels",
+        ), None
+    mask = np.zeros((height, width), dtype=bool)
+    masked = int(np.count_nonzero(ignore)) if ignore is not None else 0
+    if np.array_equal(baseline, generated):
+        return DiffResult(name, "identical", width, height, stage="pixels", masked_pixels=masked), mask
+
+    tile = tolerance.tile
+    band = tile * BAND_TILES
+    area = max(width * height - masked, 1)
+    budget = tolerance.max_changed_ratio * area
+    tiles = -(-height // tile) * -(-width // tile)
+    changed = max_delta = delta_sum = 0
+    min_ssim, ssim_deficit = 1.0, 0.0  # unchanged tiles have SSIM 1, so only the deficit is summed
+    early_exit = False
+    for top in range(0, height, band):
+        b, g = baseline[top:top + band], generated[top:top + band]
+        if np.array_equal(b, g):
+            continue
+        if masked:
+            skip = ignore[top:top + band]
+            if skip.any():
+                g = np.where(skip[..., None], b, g)  # copies the band, so only for bands that differ
+                if np.array_equal(b, g):
+                    continue
+        delta = pixel_delta(b, g)
+        band_mask = mask[top:top + band]
+        np.greater(delta, tolerance.pixel_threshold, out=band_mask)
+        changed += int(np.count_nonzero(band_mask))
+        max_delta = max(max_delta, int(delta.max()))
+        delta_sum += int(delta.sum(dtype=np.uint64))
+        ssim = tile_ssim(b, g, tile, where=tile_grid(delta > 0, tile))
+        min_ssim = min(min_ssim, float(ssim.min()))
+        ssim_deficit += float((1.0 - ssim).sum())
+        if not exhaustive and (changed > budget or min_ssim < tolerance.min_ssim):
+            early_exit = top + band < height
+            break
+    result = DiffResult(
+        name, "changed", width, height, changed, changed / area, max_delta,
+        delta_sum / area, min_ssim, 1.0 - ssim_deficit / tiles, bounding_boxes(mask, tile),
+        stage="pixels", early_exit=early_exit, masked_pixels=masked,
+    )
+    if max_delta == 0:
+        result.status = "identical"  # every difference was inside an ignored region
+    elif changed <= budget and min_ssim >= tolerance.min_ssim:
+        result.status = "within_tolerance"
+    return result, mask
+
+
+def _size(path: Path) -> Tuple[int, int]:
+    try:
+        with Image.open(path) as image:  # reads the header only
+            return image.size
+    except (OSError, ValueError):
+        return 0, 0
+
+
+def compare_files(
+    baseline_path: Union[str, Path],
+    generated_path: Union[str, Path],
+    diff_path: Optional[Union[str, Path]] = None,
+    tolerance: Tolerance = Tolerance(),
+    name: Optional[str] = None,
+    cache: Optional["DecodeCache"] = None,
+    baseline_entry: Optional[Any] = None,
+    exhaustive: Optional[bool] = None,
+) -> DiffResult:
+    """Compare two image files; never raises for missing or undecodable inputs.
+
+    Cheapest checks first: byte-identical files are identical without
+    decoding; then the decoded generated image's pixel hash is checked
+    against the baseline's (cached with the decode when `cache` is given),
+    which catches re-encoded but identical screenshots; only then are
+    pixels compared. `baseline_entry` is the baseline's manifest entry
+    (baseline_store.BaselineEntry); its sha256 and pixel hash spare reading
+    and decoding the baseline when the screenshot is unchanged, and its
+    masks are ignored in the pixel comparison.
+
+    Unless `exhaustive` is set, the pixel comparison may stop early (see
+    compare()) when no `diff_path` is given. A diff PNG is written to
+    `diff_path` only when the pair is changed.
+    """
+    baseline_path, generated_path = Path(baseline_path), Path(generated_path)
+    name = name or generated_path.name
+    for label, path in (("baseline", baseline_path), ("generated", generated_path)):
+        if not path.is_file():
+            return DiffResult(name, "missing", message=f"no {label} image at {path}")
+    try:
+        expected = baseline_entry.sha256 if baseline_entry is not None else file_sha256(baseline_path)
+        if file_sha256(generated_path) == expected and not _is_lfs_pointer(generated_path):
+            if baseline_entry is not None:
+                width, height = baseline_entry.width, baseline_entry.height
+            else:
+                width, height = _size(generated_path)
+            return DiffResult(name, "identical", width, height, stage="file_hash")
+        generated = load_image(generated_path)
+        baseline = None
+        known_pixels = baseline_entry.pixel_hash if baseline_entry is not None else None
+        if known_pixels is None and cache is not None:
+            baseline, known_pixels = cache.get(baseline_path, expected)
+        if known_pixels is not None and known_pixels == pixel_hash(generated):
+            height, width = generated.shape[:2]
+            return DiffResult(name, "identical", width, height, stage="pixel_hash")
+        if baseline is None:
+            baseline = cache.get(baseline_path, expected)[0] if cache is not None else load_image(baseline_path)
+    except ImageLoadError as exc:
+        return DiffResult(name, "error", message=str(exc))
+    except OSError as exc:
+        return DiffResult(name, "error", message=f"cannot read {name}: {exc}")
+    if exhaustive is None:
+        exhaustive = diff_path is not None
+    try:
+        ignore, notes = entry_ignore_mask(baseline_entry, generated_path, generated.shape[:2])
+    except MissingHierarchyError as exc:
+        height, width = generated.shape[:2]
+        return DiffResult(name, "error", width, height, message=str(exc))
+    result, mask = compare(baseline, generated, tolerance, name, exhaustive=exhaustive, ignore=ignore)
+    if notes:
+        result.message = "; ".join([result.message, *notes] if result.message else notes)
+    if diff_path is not None and result.status == "changed":
+        if mask is None:
+            mask = np.ones(generated.shape[:2], dtype=bool)
+        save_png(render_diff(generated, mask, result.boxes, ignore), diff_path)
+        result.diff_path = str(diff_path)
+    return result
+
+
+def image_pairs(
+    baselines_dir: Path,
+    generated_dir: Path,
+    store: Optional[Any] = None,
+) -> List[Tuple[str, Path, Path]]:
+    """(name, baseline, generated) for every PNG on either side, by relative path.
+
+    With a baseline_store.BaselineStore, baselines are the manifest's
+    entries plus any loose PNGs not yet migrated into it.
+    """
+    if store is not None:
+        loose = {name: path for name, path in store.flat_images()}
+        baselines = {name: store.path(name) for name in store.names()}
+        baselines = {**loose, **baselines}
+    else:
+        baselines = {str(p.relative_to(baselines_dir)): p for p in baselines_dir.rglob("*.png")}
+    generated = (
+        {str(p.relative_to(generated_dir)): p for p in generated_dir.rglob("*.png")} if generated_dir.is_dir() else {}
+    )
+    return [
+        (name, baselines.get(name, baselines_dir / name), generated.get(name, generated_dir / name))
+        for name in sorted(set(baselines) | set(generated))
+    ]
+
+
+def compare_dirs(
+    baselines_dir: Union[str, Path] = BASELINES_DIR,
+    generated_dir: Union[str, Path] = GENERATED_DIR,
+    diff_dir: Optional[Union[str, Path]] = None,
+    tolerance: Tolerance = Tolerance(),
+    cache: Optional[DecodeCache] = None,
+    store: Optional[Any] = None,
+) -> List[DiffResult]:
+    """compare_files() over every baseline/generated pair, in name order."""
+    results = []
+    for name, baseline, generated in image_pairs(Path(baselines_dir), Path(generated_dir), store):
+        diff_path = Path(diff_dir) / name if diff_dir is not None else None
+        entry = store.lookup(name) if store is not None else None
+        results.append(compare_files(baseline, generated, diff_path, tolerance, name, cache, entry))
+    return results
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    defaults = Tolerance()
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--baselines", default=str(BASELINES_DIR))
+    parser.add_argument("--generated", default=str(GENERATED_DIR))
+    parser.add_argument("--out", help="directory for diff PNGs of changed pairs")
+    parser.add_argument("--pixel-threshold", type=int, default=defaults.pixel_threshold)
+    parser.add_argument("--max-changed-ratio", type=float, default=defaults.max_changed_ratio)
+    parser.add_argument("--min-ssim", type=float, default=defaults.min_ssim)
+    parser.add_argument("--tile", type=int, default=defaults.tile)
+    parser.add_argument("--cache", default=str(CACHE_DIR), help="decoded-baseline cache directory")
+    parser.add_argument("--no-cache", action="store_true", help="decode every baseline and leave the cache alone")
+    args = parser.parse_args(argv)
+
+    tolerance = Tolerance(args.pixel_threshold, args.max_changed_ratio, args.min_ssim, args.tile)
+    cache = None if args.no_cache else DecodeCache(args.cache)
+    from baseline_store import BaselineStore
+
+    store = BaselineStore(args.baselines)
+    store = store if store.manifest_path.exists() else None
+    results = compare_dirs(args.baselines, args.generated, args.out, tolerance, cache, store)
+    if cache is not None:
+        cache.prune()
+    if not results:
+        print("no PNG files found", file=sys.stderr)
+        return 2
+    for result in results:
+        print(json.dumps(result.to_dict()))
+    counts = {status: sum(r.status == status for r in results) for status in STATUSES}
+    print(", ".join(f"{n} {status}" for status, n in counts.items() if n), file=sys.stderr)
+    return 1 if counts["changed"] or counts["missing"] or counts["error"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
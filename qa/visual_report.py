@@ -0,0 +1,329 @@
+#!/usr/bin/env python3
+"""
+Visual diff report for a whole screenshot run, for the PR comment and CI.
+
+Every generated/baseline pair is compared with visual_diff.compare_files()
+on a process pool (small runs stay in-process, where pool start-up would
+cost more than it saves). Changed pairs are ranked by change magnitude:
+the changed-pixel ratio, then the lowest tile SSIM. The report has
+
+- visual-diff.json: every result, ranked, with run totals;
+- visual-diff-summary.md: totals, a table of changed screens, a
+  thumbnail (baseline | generated | highlighted diff) for each of the top
+  --top changed screens, and compact lists of everything else;
+- thumbs/<name>.png: the thumbnails, rendered only for the top screens.
+
+visual-diff.md is left alone; it holds the written analysis of the run.
+Image links in the markdown are repo-relative ("qa/reports/thumbs/...")
+unless --link-prefix is given, e.g. a raw.githubusercontent.com URL.
+Thumbnails written outside the repo (--out in a temp dir) cannot be
+reached through that prefix: they are linked relative to the summary,
+and the screen's before/after images are linked as well.
+
+    python qa/visual_report.py                       # writes into qa/reports/
+    python qa/visual_report.py --top 20 -j 4 --no-thumbnails
+
+Exit status is 0 when nothing changed, 1 when any screen changed, is
+missing or cannot be decoded, 2 when no screenshots were found.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+from PIL import Image
+
+import visual_diff
+from visual_diff import (
+    BASELINES_DIR, GENERATED_DIR, ROOT, STATUSES, DecodeCache, DiffResult, Tolerance, compare_files, image_pairs,
+)
+
+REPORTS_DIR = ROOT / "qa" / "reports"
+JSON_NAME = "visual-diff.json"
+MARKDOWN_NAME = "visual-diff-summary.md"
+THUMBS_NAME = "thumbs"
+PARALLEL_THRESHOLD = 16  # fewer pairs than this are compared in-process
+THUMB_WIDTH = 240  # per panel
+TOP_N = 10
+
+# status order in the report; changed screens are further ranked by magnitude
+_STATUS_RANK = {"changed": 0, "missing": 1, "error": 2, "within_tolerance": 3, "identical": 4}
+
+Task = Tuple[str, str, str, Optional[Any]]  # name, baseline path, generated path, manifest entry
+
+_worker_cache: Optional[DecodeCache] = None
+_worker_tolerance = Tolerance()
+
+
+def _init_worker(cache_dir: Optional[str], tolerance: Tolerance) -> None:
+    global _worker_cache, _worker_tolerance
+    _worker_cache = DecodeCache(cache_dir) if cache_dir else None
+    _worker_tolerance = tolerance
+
+
+def _compare(task: Task) -> DiffResult:
+    name, baseline, generated, entry = task
+    # Exhaustive, so every changed screen has its full magnitude for ranking
+    return compare_files(
+        baseline, generated, tolerance=_worker_tolerance, name=name, cache=_worker_cache,
+        baseline_entry=entry, exhaustive=True,
+    )
+
+
+def magnitude(result: DiffResult) -> Tuple[float, float]:
+    return (result.changed_ratio, 1.0 - result.min_ssim)
+
+
+def rank(results: Sequence[DiffResult]) -> List[DiffResult]:
+    """Changed screens first, largest change first; then missing, errors, within tolerance, identical."""
+    return sorted(
+        results,
+        key=lambda r: (_STATUS_RANK.get(r.status, 5), tuple(-m for m in magnitude(r)), r.name),
+    )
+
+
+def _run(tasks: Sequence[Task], workers: int, cache_dir: Optional[str], tolerance: Tolerance, fn) -> Iterator:
+    if workers <= 1 or len(tasks) < PARALLEL_THRESHOLD:
+        _init_worker(cache_dir, tolerance)
+        yield from map(fn, tasks)
+        return
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(cache_dir, tolerance)) as pool:
+        yield from pool.map(fn, tasks, chunksize=max(1, len(tasks) // (workers * 8)))
+
+
+def compare_run(
+    baselines_dir: Path = BASELINES_DIR,
+    generated_dir: Path = GENERATED_DIR,
+    tolerance: Tolerance = Tolerance(),
+    workers: Optional[int] = None,
+    cache_dir: Optional[str] = None,
+    store: Optional[Any] = None,
+) -> List[DiffResult]:
+    """Compare every pair of a run on a process pool; results in rank() order."""
+    workers = workers or os.cpu_count() or 1
+    tasks = [
+        (name, str(baseline), str(generated), store.lookup(name) if store is not None else None)
+        for name, baseline, generated in image_pairs(Path(baselines_dir), Path(generated_dir), store)
+    ]
+    return rank(list(_run(tasks, workers, cache_dir, tolerance, _compare)))
+
+
+def _panel(image: np.ndarray, width: int) -> Image.Image:
+    panel = Image.fromarray(np.ascontiguousarray(image))
+    height = max(1, round(panel.height * width / panel.width))
+    return panel.resize((width, height), Image.Resampling.BILINEAR, reducing_gap=2.0)
+
+
+def render_thumbnail(
+    baseline_path: Path,
+    generated_path: Path,
+    out: Path,
+    tolerance: Tolerance,
+    entry: Optional[Any] = None,
+) -> None:
+    """baseline | generated | highlighted diff, each THUMB_WIDTH wide, side by side."""
+    baseline, generated = visual_diff.load_image(baseline_path), visual_diff.load_image(generated_path)
+    ignore, _ = visual_diff.entry_ignore_mask(entry, generated_path, generated.shape[:2])
+    result, mask = visual_diff.compare(baseline, generated, tolerance, ignore=ignore)
+    if mask is None:  # size changed: everything is new
+        mask = np.ones(generated.shape[:2], dtype=bool)
+    diff = visual_diff.render_diff(generated, mask, result.boxes, ignore)
+    panels = [_panel(image, THUMB_WIDTH) for image in (baseline, generated, diff)]
+    sheet = Image.new("RGB", (THUMB_WIDTH * 3 + 8, max(p.height for p in panels)), (255, 255, 255))
+    for i, panel in enumerate(panels):
+        sheet.paste(panel, (i * (THUMB_WIDTH + 4), 0))
+    out.parent.mkdir(parents=True, exist_ok=True)
+    sheet.save(out, compress_level=6)
+
+
+def _thumbnail(task: Tuple[str, str, str, str, Optional[Any]]) -> Optional[str]:
+    name, baseline, generated, out, entry = task
+    try:
+        render_thumbnail(Path(baseline), Path(generated), Path(out), _worker_tolerance, entry)
+    except (OSError, visual_diff.ImageLoadError, visual_diff.MissingHierarchyError):
+        return None
+    return out
+
+
+def _thumb_name(name: str) -> str:
+    return name.replace("/", "__")
+
+
+def _in_repo(path: Path) -> bool:
+    try:
+        path.resolve().relative_to(ROOT)
+    except ValueError:
+        return False
+    return True
+
+
+def _link(path: Path, prefix: str) -> str:
+    try:
+        relative = path.resolve().relative_to(ROOT).as_posix()
+    except ValueError:
+        relative = path.as_posix()
+    return prefix + relative
+
+
+def _thumb_link(thumb: Path, prefix: str) -> str:
+    """Repo thumbnails go through `prefix`; others are relative to the summary next to thumbs/."""
+    return _link(thumb, prefix) if _in_repo(thumb) else f"{THUMBS_NAME}/{thumb.name}"
+
+
+def _percent(ratio: float) -> str:
+    return f"{ratio * 100:.2f}%" if ratio >= 0.0001 or ratio == 0 else "<0.01%"
+
+
+def summary(results: Sequence[DiffResult]) -> Dict[str, int]:
+    counts = {status: 0 for status in STATUSES}
+    for result in results:
+        counts[result.status] = counts.get(result.status, 0) + 1
+    return {"total": len(results), **counts}
+
+
+def render_markdown(
+    results: Sequence[DiffResult],
+    thumbnails: Dict[str, Path],
+    top: int,
+    link_prefix: str = "",
+    images: Optional[Dict[str, Tuple[Path, Path]]] = None,
+) -> str:
+    """The markdown summary; top screens without a thumbnail in the repo link their before/after `images`."""
+    counts = summary(results)
+    statuses = ("changed", "missing", "error", "within_tolerance")
+    parts = ", ".join(f"{counts[s]} {s.replace('_', ' ')}" for s in statuses if counts[s]) or "no changes"
+    lines = [f"## Visual diff: {parts} ({counts['total']} screens, {counts['identical']} identical)", ""]
+    changed = [r for r in results if r.status == "changed"]
+    if changed:
+        lines += ["| # | Screen | Changed pixels | Min SSIM | Regions |", "|---|---|---|---|---|"]
+        for i, r in enumerate(changed[:top], 1):
+            lines.append(f"| {i} | `{r.name}` | {_percent(r.changed_ratio)} | {r.min_ssim:.3f} | {len(r.boxes)} |")
+        lines.append("")
+        for i, r in enumerate(changed[:top], 1):
+            lines.append(f"### {i}. `{r.name}`")
+            lines.append("")
+            if r.message:
+                lines += [r.message, ""]
+            thumb = thumbnails.get(r.name)
+            if thumb is not None:
+                lines += [f"![{r.name}: baseline, generated, diff]({_thumb_link(thumb, link_prefix)})", ""]
+            if (thumb is None or not _in_repo(thumb)) and images and r.name in images:
+                before, after = images[r.name]
+                lines += [
+                    f"**Before:** ![baseline]({_link(before, link_prefix)}) "
+                    f"**After:** ![generated]({_link(after, link_prefix)})",
+                    "",
+                ]
+            boxes = ", ".join(f"({x0},{y0})-({x1},{y1})" for x0, y0, x1, y1 in r.boxes[:5])
+            more = f" and {len(r.boxes) - 5} more" if len(r.boxes) > 5 else ""
+            lines += [f"Changed regions: {boxes}{more}", ""]
+        rest = changed[top:]
+        if rest:
+            lines += [f"<details><summary>{len(rest)} more changed screens</summary>", ""]
+            lines += [f"- `{r.name}`: {_percent(r.changed_ratio)}, min SSIM {r.min_ssim:.3f}" for r in rest]
+            lines += ["", "</details>", ""]
+    problems = [r for r in results if r.status in ("missing", "error")]
+    if problems:
+        lines += ["### Missing or unreadable", ""]
+        lines += [f"- `{r.name}` ({r.status}): {r.message}" for r in problems]
+        lines.append("")
+    within = [r.name for r in results if r.status == "within_tolerance"]
+    if within:
+        lines += [f"<details><summary>{len(within)} within tolerance</summary>", ""]
+        lines += [", ".join(f"`{name}`" for name in within), "", "</details>", ""]
+    return "\n".join(lines)
+
+
+def generate(
+    baselines_dir: Path = BASELINES_DIR,
+    generated_dir: Path = GENERATED_DIR,
+    out_dir: Path = REPORTS_DIR,
+    tolerance: Tolerance = Tolerance(),
+    top: int = TOP_N,
+    workers: Optional[int] = None,
+    cache_dir: Optional[str] = None,
+    store: Optional[Any] = None,
+    thumbnails: bool = True,
+    link_prefix: str = "",
+) -> List[DiffResult]:
+    """Compare a run and write the JSON report, markdown summary and top-N thumbnails."""
+    started = time.perf_counter()
+    workers = workers or os.cpu_count() or 1
+    results = compare_run(baselines_dir, generated_dir, tolerance, workers, cache_dir, store)
+    out_dir = Path(out_dir)
+    paths = {name: (b, g) for name, b, g in image_pairs(Path(baselines_dir), Path(generated_dir), store)}
+    thumbs: Dict[str, Path] = {}
+    if thumbnails:
+        tasks = [
+            (
+                r.name, str(paths[r.name][0]), str(paths[r.name][1]), str(out_dir / THUMBS_NAME / _thumb_name(r.name)),
+                store.lookup(r.name) if store is not None else None,
+            )
+            for r in results if r.status == "changed"
+        ][:top]
+        for task, written in zip(tasks, _run(tasks, workers, cache_dir, tolerance, _thumbnail)):
+            if written is not None:
+                thumbs[task[0]] = Path(written)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    report = {
+        "summary": {**summary(results), "seconds": round(time.perf_counter() - started, 3)},
+        "results": [
+            {"rank": i, **r.to_dict(), "thumbnail": str(thumbs[r.name]) if r.name in thumbs else None}
+            for i, r in enumerate(results, 1)
+        ],
+    }
+    (out_dir / JSON_NAME).write_text(json.dumps(report, indent=1) + "\n")
+    (out_dir / MARKDOWN_NAME).write_text(render_markdown(results, thumbs, top, link_prefix, paths))
+    return results
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    defaults = Tolerance()
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--baselines", default=str(BASELINES_DIR))
+    parser.add_argument("--generated", default=str(GENERATED_DIR))
+    parser.add_argument("-o", "--out", default=str(REPORTS_DIR), help="report directory")
+    parser.add_argument("--top", type=int, default=TOP_N, help="changed screens shown with thumbnails")
+    parser.add_argument("-j", "--workers", type=int, default=None, help="worker processes (default: CPU count)")
+    parser.add_argument("--no-thumbnails", action="store_true")
+    parser.add_argument("--link-prefix", default="", help="prefix for image links, e.g. a raw content URL")
+    parser.add_argument("--pixel-threshold", type=int, default=defaults.pixel_threshold)
+    parser.add_argument("--max-changed-ratio", type=float, default=defaults.max_changed_ratio)
+    parser.add_argument("--min-ssim", type=float, default=defaults.min_ssim)
+    parser.add_argument("--cache", default=str(visual_diff.CACHE_DIR), help="decoded-baseline cache directory")
+    parser.add_argument("--no-cache", action="store_true")
+    args = parser.parse_args(argv)
+
+    from baseline_store import BaselineStore
+
+    store = BaselineStore(args.baselines)
+    store = store if store.manifest_path.exists() else None
+    tolerance = Tolerance(args.pixel_threshold, args.max_changed_ratio, args.min_ssim, defaults.tile)
+    cache_dir = None if args.no_cache else args.cache
+    results = generate(
+        Path(args.baselines), Path(args.generated), Path(args.out), tolerance, args.top, args.workers,
+        cache_dir, store, not args.no_thumbnails, args.link_prefix,
+    )
+    if cache_dir:
+        DecodeCache(cache_dir).prune()
+    if not results:
+        print("no PNG files found", file=sys.stderr)
+        return 2
+    counts = summary(results)
+    print(
+        ", ".join(f"{counts[s]} {s}" for s in STATUSES if counts[s]) + f"; report in {args.out}",
+        file=sys.stderr,
+    )
+    return 1 if counts["changed"] or counts["missing"] or counts["error"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,93 @@
+import * as path from 'path';
+import * as fs from 'fs';
+import { spawn } from 'child_process';
+import { fileURLToPath } from 'url';
+
+export interface LintDiagnostic {
+  rule: string;
+  severity: 'error' | 'warning';
+  message: string;
+  line: number;
+  column: number;
+  end_line: number;
+  end_column: number;
+  flow: string;
+}
+
+export interface FlowLintReport {
+  diagnostics: LintDiagnostic[];
+  // Resolved flow path -> its error diagnostics; flows listed here are not worth a Maestro run
+  errorsByFile: Map<string, LintDiagnostic[]>;
+}
+
+const LINT_TIMEOUT_MS = 30000;
+
+function findLintScript(): string | null {
+  // server/src (tsx) or server/dist (build) -> repo root
+  const here = path.dirname(fileURLToPath(import.meta.url));
+  const candidates = [
+    path.resolve(here, '..', '..', 'TestGen', 'flow_lint.py'),
+    path.join(process.cwd(), 'TestGen', 'flow_lint.py'),
+  ];
+  return candidates.find(p => fs.existsSync(p)) ?? null;
+}
+
+/**
+ * Statically check flow files with TestGen/flow_lint.py before they are run.
+ * runFlow / runScript paths resolve from each flow's directory, as in Maestro;
+ * `sources` (app files) enable the unintroduced-text warning.
+ * Resolves to null when the linter is disabled (FLOW_LINT=0), missing or
+ * crashes, so a broken linter never blocks a run.
+ */
+export async function lintFlowFiles(files: string[], sources: string[] = []): Promise<FlowLintReport | null> {
+  const script = findLintScript();
+  if (process.env.FLOW_LINT === '0' || !script || files.length === 0) return null;
+  const python = process.env.FLOW_LINT_PYTHON || 'python3';
+  const args = [script, ...files];
+  if (sources.length > 0) args.push('--sources', ...sources);
+
+  return new Promise(resolve => {
+    let stdout = '';
+    let stderr = '';
+    let failed = false;
+    const child = spawn(python, args, { stdio: ['ignore', 'pipe', 'pipe'] });
+    const timer = setTimeout(() => child.kill('SIGKILL'), LINT_TIMEOUT_MS);
+    child.stdout.on('data', chunk => { stdout += chunk.toString(); });
+    child.stderr.on('data', chunk => { stderr += chunk.toString(); });
+    child.on('error', error => {
+      failed = true;
+      clearTimeout(timer);
+      console.log(`⚠️  Flow lint unavailable: ${error.message}`);
+      resolve(null);
+    });
+    child.on('close', code => {
+      clearTimeout(timer);
+      if (failed) return; // spawn failed; already resolved
+      // 0: clean, 1: errors found; anything else means the linter itself failed
+      if (code !== 0 && code !== 1) {
+        console.log(`⚠️  Flow lint exited with ${code}; running flows unchecked\n${stderr}`);
+        return resolve(null);
+      }
+      const diagnostics: LintDiagnostic[] = [];
+      for (const line of stdout.split('\n')) {
+        if (!line.trim()) continue;
+        try {
+          diagnostics.push(JSON.parse(line));
+        } catch {
+          // ignore stray output
+        }
+      }
+      const errorsByFile = new Map<string, LintDiagnostic[]>();
+      for (const d of diagnostics) {
+        if (d.severity !== 'error') continue;
+        const key = path.resolve(d.flow);
+        errorsByFile.set(key, [...(errorsByFile.get(key) ?? []), d]);
+      }
+      resolve({ diagnostics, errorsByFile });
+    });
+  });
+}
+
+export function formatLintDiagnostics(diagnostics: LintDiagnostic[]): string {
+  return diagnostics.map(d => `line ${d.line}: ${d.message} (${d.rule})`).join('\n');
+}
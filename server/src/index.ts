@@ -5,8 +5,10 @@ import morgan from 'morgan';
 import { v4 as uuidv4 } from 'uuid';
 import axios from 'axios';
 import { spawn } from 'node:child_process';
+import { EventEmitter } from 'node:events';
 import { generateUnitTests } from './maestroGenerator.js';
 import { runMultipleMaestroTests, writeMaestroFlows, runMaestro } from './maestroTestRunner.js';
+import { lintFlowFiles, formatLintDiagnostics, LintDiagnostic } from './flowLint.js';
 
 const app = express();
 app.use(express.json({ limit: '2mb' }));
@@ -42,6 +44,15 @@ export interface JobRecord {
 
 const jobs = new Map<string, JobRecord>();
 
+// Emits `job:<id>` on every record update so /api/job/:id/wait can wake long-pollers
+const jobEvents = new EventEmitter();
+jobEvents.setMaxListeners(0);
+
+function setJob(id: string, record: JobRecord) {
+  jobs.set(id, record);
+  jobEvents.emit(`job:${id}`, record);
+}
+
 // Config via env
 const PORT = Number(process.env.PORT || 5055);
 const MAESTRO_BIN = process.env.MAESTRO_BIN || 'maestro';
@@ -62,6 +73,7 @@ interface RetryResult {
   files: string[];
   results: Array<{ filePath: string; result?: any; error?: string }>;
   retryCount: number;
+  lint: LintDiagnostic[];
 }
 
 function collectTextsFromHierarchy(node: any, out: Set<string>) {
@@ -215,16 +227,36 @@ async function runTestsWithRetry(options: {
   let currentTests = initialTests;
   let currentFiles = initialFiles;
   let retryCount = 0;
+  let lint: LintDiagnostic[] = [];
+  const lintSources = [...modifiedFiles.map(f => f.path), ...relatedFiles];
 
   for (let attempt = 0; attempt <= maxRetries; attempt++) {
     const attemptMsg = `\n🔄 Test attempt ${attempt + 1}/${maxRetries + 1}`;
     console.log(attemptMsg);
     onProgress?.(attemptMsg);
 
+    // Static pre-flight: a flow with lint errors would fail in Maestro, so it is not run
+    const lintReport = await lintFlowFiles(currentFiles, lintSources);
+    lint = lintReport?.diagnostics ?? [];
+    const lintErrors = lintReport?.errorsByFile ?? new Map<string, LintDiagnostic[]>();
+    const blocked = new Map<string, LintDiagnostic[]>();
+    for (const file of currentFiles) {
+      const errors = lintErrors.get(path.resolve(file));
+      if (errors) blocked.set(file, errors);
+    }
+    if (blocked.size > 0) {
+      onProgress?.(`Flow lint: ${blocked.size}/${currentFiles.length} flow(s) have errors and are not run.`);
+    }
+
     // Run the current tests
-    const runResults = await runMultipleMaestroTests(currentFiles, {
-      maestroBin,
-      workspace,
+    const runnable = currentFiles.filter(f => !blocked.has(f));
+    const ran = runnable.length > 0 ? await runMultipleMaestroTests(runnable, { maestroBin, workspace }) : [];
+    const ranByFile = new Map(ran.map(r => [r.filePath, r]));
+    const runResults = currentFiles.map(filePath => {
+      const errors = blocked.get(filePath);
+      return errors
+        ? { filePath, error: `Flow lint failed:\n${formatLintDiagnostics(errors)}` }
+        : ranByFile.get(filePath)!;
     });
     const passCount = runResults.filter(r => r.result?.success).length;
     onProgress?.(`Attempt ${attempt + 1}: ${passCount}/${runResults.length} flow(s) passed.`);
@@ -246,7 +278,8 @@ async function runTestsWithRetry(options: {
         tests: currentTests,
         files: currentFiles,
         results: runResults,
-        retryCount: attempt
+        retryCount: attempt,
+        lint
       };
     }
 
@@ -263,7 +296,8 @@ async function runTestsWithRetry(options: {
         tests: currentTests,
         files: currentFiles,
         results: runResults,
-        retryCount: attempt
+        retryCount: attempt,
+        lint
       };
     }
 
@@ -273,6 +307,8 @@ async function runTestsWithRetry(options: {
       if (!result.result?.success && result.result?.debugDir) {
         const feedback = await extractFailureFeedback(result.result.debugDir);
         combinedFeedback += `\nFailure in ${path.basename(result.filePath)}:\n${feedback}\n`;
+      } else if (blocked.has(result.filePath)) {
+        combinedFeedback += `\nFailure in ${path.basename(result.filePath)}:\n${result.error}\n`;
       }
     }
 
@@ -323,7 +359,8 @@ async function runTestsWithRetry(options: {
     tests: currentTests,
     files: currentFiles,
     results: [],
-    retryCount
+    retryCount,
+    lint
   };
 }
 
@@ -376,7 +413,7 @@ app.post('/api/generate-tests', async (req: Request, res: Response) => {
       result: null,
       error: null,
     };
-    jobs.set(jobId, record);
+    setJob(jobId, record);
 
     console.log('received modification context', JSON.stringify(record, null, 2));
 
@@ -386,7 +423,7 @@ app.post('/api/generate-tests', async (req: Request, res: Response) => {
         const progress: string[] = base.progress || [];
         const push = (m: string) => {
           progress.push(m);
-          jobs.set(jobId, { ...base, status: 'running', progress });
+          setJob(jobId, { ...base, status: 'running', progress });
         };
         push('Started job');
 
@@ -426,6 +463,8 @@ app.post('/api/generate-tests', async (req: Request, res: Response) => {
           tests: finalResults.tests,
           files: finalResults.files,
           results: finalResults.results,
+          // flow_lint diagnostics of the final attempt's flows
+          lint: finalResults.lint,
           // Present a friendlier summary for UIs
           summary: finalResults.results.map(r => ({
             file: r.filePath,
@@ -442,12 +481,12 @@ app.post('/api/generate-tests', async (req: Request, res: Response) => {
           },
         };
 
-        jobs.set(jobId, { ...record, status: 'generated', result: responsePayload, progress });
+        setJob(jobId, { ...record, status: 'generated', result: responsePayload, progress });
       } catch (err: any) {
         const base = jobs.get(jobId) || record;
         const progress = base.progress || [];
         progress.push(`Error: ${err?.message ?? String(err)}`);
-        jobs.set(jobId, { ...record, status: 'failed', error: err?.message ?? String(err), progress });
+        setJob(jobId, { ...record, status: 'failed', error: err?.message ?? String(err), progress });
       }
     };
 
@@ -475,6 +514,50 @@ app.get('/api/job/:id', (req: Request, res: Response) => {
   return res.json({ id, status: record.status, result: record.result, error: record.error, progress: record.progress || [] });
 });
 
+// Long-poll variant: hold the request until the job's status differs from
+// ?status= (the caller's last seen state) or ?timeoutMs= elapses (max 25s).
+// Replaces 1s client-side polling loops with a single request per state change.
+const MAX_WAIT_MS = 25_000;
+
+// ?timeoutMs= clamped to [0, MAX_WAIT_MS]; only a missing or non-numeric value
+// means the full wait, so timeoutMs=0 answers at once like a plain status read.
+function waitTimeoutMs(raw: unknown): number {
+  const requested = typeof raw === 'string' && raw.trim() !== '' ? Number(raw) : NaN;
+  return Math.max(0, Math.min(MAX_WAIT_MS, Number.isFinite(requested) ? requested : MAX_WAIT_MS));
+}
+
+app.get('/api/job/:id/wait', (req: Request, res: Response) => {
+  const id = String(req.params.id);
+  const seen = typeof req.query.status === 'string' ? req.query.status : '';
+  const timeoutMs = waitTimeoutMs(req.query.timeoutMs);
+
+  const reply = (record: JobRecord, changed: boolean) =>
+    res.json({ id, status: record.status, result: record.result, error: record.error, progress: record.progress || [], changed });
+
+  const initial = jobs.get(id);
+  if (!initial) return res.status(404).json({ error: 'job not found', id });
+  if (initial.status !== seen) return reply(initial, true);
+
+  const eventName = `job:${id}`;
+  let timer: NodeJS.Timeout | null = null;
+  const cleanup = () => {
+    jobEvents.off(eventName, onUpdate);
+    if (timer) clearTimeout(timer);
+    res.off('close', cleanup);
+  };
+  const onUpdate = (record: JobRecord) => {
+    if (record.status === seen) return;
+    cleanup();
+    reply(record, true);
+  };
+  timer = setTimeout(() => {
+    cleanup();
+    reply(jobs.get(id) || initial, false);
+  }, timeoutMs);
+  jobEvents.on(eventName, onUpdate);
+  res.on('close', cleanup);
+});
+
 // Simple route to manually run a specific Maestro flow by file name
 // Example:
 //   curl "http://localhost:${PORT}/api/test-maestrorunner?name=25d35967-7e41-44fa-b2f7-20ef01e9af25-1.yml"
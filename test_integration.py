@@ -14,6 +14,7 @@ Usage:
     python test_integration.py --mock
 """
 
+import asyncio
 import json
 import sys
 import os
@@ -127,12 +128,12 @@ def test_integration(use_mock=False):
             print(f"\nTest Case {i}: {test_case['name']}")
             print("-" * 40)
             
-            # Call the MCP function
-            result = test_modification(
+            # Call the MCP function (an async tool)
+            result = asyncio.run(test_modification(
                 user_message=test_case["user_message"],
                 modified_files=test_case["modified_files"],
                 related_files=test_case["related_files"]
-            )
+            ))
             
             # Verify result
             try: